@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Restaurant, AvailabilityRule, Season, ExceptionDate
+from .models import (
+    Restaurant, AvailabilityRule, Season, ExceptionDate, SlotLedger, SlotOccupancy
+)
 
 
 @admin.register(Restaurant)
@@ -20,7 +22,7 @@ class AvailabilityRuleAdmin(admin.ModelAdmin):
 
 @admin.register(Season)
 class SeasonAdmin(admin.ModelAdmin):
-    list_display = ('name', 'restaurant', 'start_date', 'end_date', 'capacity_multiplier', 'is_active')
+    list_display = ('name', 'restaurant', 'start_date', 'end_date', 'capacity_multiplier', 'priority', 'is_active')
     list_filter = ('restaurant', 'is_active', 'start_date')
     search_fields = ('name', 'restaurant__name')
     readonly_fields = ('created_at', 'updated_at')
@@ -32,3 +34,17 @@ class ExceptionDateAdmin(admin.ModelAdmin):
     list_filter = ('restaurant', 'date', 'is_closed')
     search_fields = ('reason', 'restaurant__name')
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(SlotLedger)
+class SlotLedgerAdmin(admin.ModelAdmin):
+    list_display = ('restaurant', 'date', 'slot_time', 'booked')
+    list_filter = ('restaurant', 'date')
+    readonly_fields = ('restaurant', 'date', 'slot_time', 'booked')
+
+
+@admin.register(SlotOccupancy)
+class SlotOccupancyAdmin(admin.ModelAdmin):
+    list_display = ('restaurant', 'date', 'slot_time', 'covers', 'reservation_count')
+    list_filter = ('restaurant', 'date')
+    readonly_fields = ('restaurant', 'date', 'slot_time', 'covers', 'reservation_count')
@@ -5,3 +5,9 @@ class AvailabilityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'availability'
     verbose_name = 'Gestión de Disponibilidad'
+
+    def ready(self):
+        # Registra las señales que invalidan los horarios compilados
+        from . import signals  # noqa: F401
+        # Check de base de datos: reglas solapadas ya guardadas
+        from . import checks  # noqa: F401
@@ -0,0 +1,258 @@
+"""
+Versiones async de las consultas de disponibilidad, para servir con ASGI
+(config.asgi). DRF no admite vistas async, así que son vistas de Django que
+devuelven el mismo JSON que AvailabilityViewSet. Mientras una consulta espera
+a la base de datos el worker sigue atendiendo otras peticiones.
+"""
+import json
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .engine.indexes import OverlappingRulesError
+from .models import Restaurant
+from .services import AvailabilityService
+from .views import _availability_etag, _parse_num_people
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _invalid_schedule_as_409(view):
+    """Como AvailabilityViewSet.handle_exception: reglas solapadas -> 409."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except OverlappingRulesError as exc:
+            return _error(str(exc), 409)
+    return wrapper
+
+
+def _not_modified(request, etag):
+    if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def _set_etag(response, etag):
+    if etag:
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+
+
+async def _get_restaurant(restaurant_id):
+    try:
+        return await Restaurant.objects.aget(id=restaurant_id)
+    except Restaurant.DoesNotExist:
+        return None
+
+
+@require_GET
+@_invalid_schedule_as_409
+async def check_date(request):
+    """Como AvailabilityViewSet.check_date. Query: restaurant_id, date, num_people."""
+    restaurant_id = request.GET.get('restaurant_id')
+    date_str = request.GET.get('date')
+    num_people_str = request.GET.get('num_people', '')
+
+    if not restaurant_id or not date_str:
+        return _error('restaurant_id y date son requeridos', 400)
+
+    etag = await sync_to_async(_availability_etag)(
+        restaurant_id, date_str, date_str, num_people_str
+    )
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    restaurant = await _get_restaurant(restaurant_id)
+    if restaurant is None:
+        return _error('Restaurante no encontrado', 404)
+
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return _error('Formato de fecha inválido. Use YYYY-MM-DD', 400)
+
+    num_people = _parse_num_people(num_people_str)
+    if num_people is False:
+        return _error('num_people debe ser un entero mayor que 0', 400)
+
+    day = await AvailabilityService().aget_day_availability(restaurant, date, num_people)
+
+    response = JsonResponse({
+        'restaurant': restaurant.name,
+        'date': date,
+        'num_people': num_people,
+        'availability': day['availability'],
+        'slots': day['slots'],
+    })
+    _set_etag(response, etag)
+    return response
+
+
+@require_GET
+@_invalid_schedule_as_409
+async def check_range(request):
+    """Como AvailabilityViewSet.check_range. Query: restaurant_id, start, end, num_people."""
+    restaurant_id = request.GET.get('restaurant_id')
+    start_str = request.GET.get('start')
+    end_str = request.GET.get('end')
+    num_people_str = request.GET.get('num_people', '2')
+
+    if not restaurant_id or not start_str or not end_str:
+        return _error('restaurant_id, start y end son requeridos', 400)
+
+    etag = await sync_to_async(_availability_etag)(
+        restaurant_id, start_str, end_str, num_people_str
+    )
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    restaurant = await _get_restaurant(restaurant_id)
+    if restaurant is None:
+        return _error('Restaurante no encontrado', 404)
+
+    try:
+        start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date()
+        num_people = int(num_people_str)
+        if num_people < 1:
+            raise ValueError(num_people)
+    except ValueError:
+        return _error('Parámetros inválidos. Use YYYY-MM-DD y un num_people entero', 400)
+
+    max_days = getattr(settings, 'AVAILABILITY_MAX_RANGE_DAYS', 90)
+    if end < start or (end - start).days + 1 > max_days:
+        return _error(f'El rango debe ser válido y de como máximo {max_days} días', 400)
+
+    days = await AvailabilityService().aget_availability_by_range(
+        restaurant, start, end, num_people
+    )
+
+    response = JsonResponse({
+        'restaurant': restaurant.name,
+        'start': start,
+        'end': end,
+        'num_people': num_people,
+        'days': days
+    })
+    _set_etag(response, etag)
+    return response
+
+
+@require_GET
+@_invalid_schedule_as_409
+async def search(request):
+    """Como AvailabilityViewSet.search. Query: city, date, time_from, time_to, time, num_people."""
+    city = request.GET.get('city')
+    date_str = request.GET.get('date')
+
+    if not city or not date_str:
+        return _error('city y date son requeridos', 400)
+
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        time_from = datetime.strptime(request.GET.get('time_from', '00:00'), '%H:%M').time()
+        time_to = datetime.strptime(request.GET.get('time_to', '23:59'), '%H:%M').time()
+        preferred = request.GET.get('time')
+        preferred_time = datetime.strptime(preferred, '%H:%M').time() if preferred else None
+        num_people = int(request.GET.get('num_people', '2'))
+        if num_people < 1 or time_to < time_from:
+            raise ValueError(num_people)
+    except ValueError:
+        return _error('Parámetros inválidos. Use YYYY-MM-DD, HH:MM y un num_people entero', 400)
+
+    matches = await AvailabilityService().asearch_availability(
+        Restaurant.objects.filter(city__iexact=city),
+        date,
+        time_from,
+        time_to,
+        num_people,
+        preferred_time,
+    )
+
+    # Misma paginación que la vista DRF (count, next, previous, results)
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    try:
+        page = paginator.paginate_queryset(matches, Request(request))
+    except NotFound as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=404)
+
+    return JsonResponse(paginator.get_paginated_response([
+        {
+            'restaurant_id': match['restaurant'].id,
+            'name': match['restaurant'].name,
+            'address': match['restaurant'].address,
+            'best_time': match['best_slot'].time,
+            'slots': [
+                {'time': slot.time, 'remaining': slot.remaining}
+                for slot in match['slots']
+            ],
+        }
+        for match in page
+    ]).data)
+
+
+@csrf_exempt
+@require_POST
+@_invalid_schedule_as_409
+async def check_slot(request):
+    """Como AvailabilityViewSet.check_slot. Body JSON: restaurant_id, date, time, num_people."""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return _error('JSON inválido', 400)
+        if not isinstance(data, dict):
+            return _error('El cuerpo debe ser un objeto JSON', 400)
+    else:
+        data = request.POST
+
+    restaurant_id = data.get('restaurant_id')
+    date_str = data.get('date')
+    time_str = data.get('time')
+    num_people = data.get('num_people')
+
+    if not all([restaurant_id, date_str, time_str, num_people]):
+        return _error('Todos los parámetros son requeridos', 400)
+
+    num_people = _parse_num_people(num_people)
+    if num_people is False:
+        return _error('num_people debe ser un entero mayor que 0', 400)
+
+    restaurant = await _get_restaurant(restaurant_id)
+    if restaurant is None:
+        return _error('Restaurante no encontrado', 404)
+
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        time = datetime.strptime(time_str, '%H:%M').time()
+    except (TypeError, ValueError):
+        return _error('Formato de fecha/hora inválido', 400)
+
+    is_available = await AvailabilityService().acheck_availability(
+        restaurant, date, time, num_people
+    )
+
+    return JsonResponse({
+        'restaurant': restaurant.name,
+        'date': date,
+        'time': time,
+        'num_people': num_people,
+        'is_available': is_available
+    })
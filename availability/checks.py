@@ -0,0 +1,48 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections
+
+
+@register(Tags.database)
+def check_overlapping_rules(app_configs=None, databases=None, **kwargs):
+    """
+    Informa de reglas disponibles ya guardadas que se solapan en el mismo día.
+    Esos días quedan inválidos en el horario compilado (no se puede reservar
+    en ellos) hasta corregir las filas. Solo se ejecuta con
+    `manage.py check --database default`, como el resto de checks de base de datos.
+    """
+    from .engine.indexes import find_overlap
+    from .models import AvailabilityRule
+
+    errors = []
+    for alias in databases or ():
+        if alias not in connections:
+            continue
+        # Base de datos sin migrar: no hay filas que revisar
+        table = AvailabilityRule._meta.db_table
+        if table not in connections[alias].introspection.table_names():
+            continue
+        rules = (
+            AvailabilityRule.objects.using(alias)
+            .filter(is_available=True)
+            .order_by("restaurant_id", "day_of_week", "start_time", "id")
+        )
+        by_day = {}
+        for rule in rules:
+            by_day.setdefault((rule.restaurant_id, rule.day_of_week), []).append(rule)
+
+        for (restaurant_id, day_of_week), day_rules in by_day.items():
+            overlap = find_overlap(day_rules)
+            if overlap is None:
+                continue
+            previous, current = overlap
+            errors.append(
+                Error(
+                    f"Restaurante {restaurant_id}, día {day_of_week}: la regla #{current.pk} "
+                    f"({current.start_time}-{current.end_time}) se solapa con la #{previous.pk} "
+                    f"({previous.start_time}-{previous.end_time}).",
+                    hint="Ajusta o desactiva una de las dos; mientras tanto ese día no admite reservas.",
+                    obj=current,
+                    id="availability.E001",
+                )
+            )
+    return errors
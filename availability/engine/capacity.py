@@ -1,24 +1,228 @@
-from django.db.models import Sum
-from reservations.models import Reservation
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from availability.models import SlotOccupancy
+from reservations.models import ACTIVE_STATUSES, Reservation
 
+from .timing import instrument
 
+
+def time_to_seconds(time_obj):
+    return time_obj.hour * 3600 + time_obj.minute * 60 + time_obj.second
+
+
+class DiningDurations:
+    """
+    Duración de estancia (minutos) según la hora de inicio de una reserva.
+    rules: reglas del día con dining_duration efectiva (regla o restaurante).
+    default: duración del restaurante para horas fuera de toda regla.
+    Sin duración configurada una reserva solo ocupa su propia hora.
+    """
+
+    def __init__(self, rules=(), default=None):
+        self.rules = tuple(rules)
+        self.default = default
+
+    @property
+    def configured(self):
+        return self.default is not None or any(
+            rule.dining_duration for rule in self.rules
+        )
+
+    def for_time(self, time_obj):
+        for rule in self.rules:
+            if rule.start_time <= time_obj < rule.end_time:
+                return rule.dining_duration or self.default
+        return self.default
+
+
+def sweep_occupancy(starts, times, durations=None):
+    """
+    Ocupación en cada hora de `times` como suma de las reservas solapadas.
+    starts: {hora_de_inicio: personas}. Una reserva que empieza en r con
+    duración d ocupa [r, r + d). Barrido con eventos +/- ordenados:
+    O(reservas + horas) tras ordenar, sin consultas adicionales.
+    """
+    events = []
+    for start, covers in starts.items():
+        start_seconds = time_to_seconds(start)
+        duration = durations.for_time(start) if durations else None
+        # Sin duración: ocupa solo su propio instante (comportamiento clásico)
+        end_seconds = start_seconds + (duration * 60 if duration else 1)
+        events.append((start_seconds, covers))
+        events.append((end_seconds, -covers))
+    events.sort()
+
+    occupancy = {}
+    running = 0
+    position = 0
+    for time_obj in sorted(times):
+        seconds = time_to_seconds(time_obj)
+        while position < len(events) and events[position][0] <= seconds:
+            running += events[position][1]
+            position += 1
+        occupancy[time_obj] = running
+    return occupancy
+
+
+@instrument("capacity")
 class CapacityEngine:
-    def __init__(self, model=None):
+    # True si reserve() comprueba y suma de forma atómica por sí mismo, sin
+    # necesitar select_for_update sobre las reglas y excepciones del día
+    atomic_reserve = False
+
+    def __init__(self, model=None, occupancy_model=None):
         self.model = model or Reservation
+        # Resumen por slot mantenido con cada cambio de Reservation
+        # (ver engine/occupancy.py): las lecturas no agregan el histórico
+        self.occupancy_model = occupancy_model or SlotOccupancy
+
+    def _occupied(self, **filters):
+        return self.occupancy_model.objects.filter(covers__gt=0, **filters).order_by()
 
     def get_current_occupancy(self, restaurant, date_obj, time_obj):
-        # Sumamos personas de reservas confirmadas o pendientes
-        result = self.model.objects.filter(
-            restaurant=restaurant,
-            reservation_date=date_obj,
-            reservation_time=time_obj,
-            status__in=["confirmed", "pending"],
-        ).aggregate(total=Sum("num_people"))
+        # Personas de reservas confirmadas o pendientes en el slot (una fila)
+        covers = (
+            self._occupied(restaurant=restaurant, date=date_obj, slot_time=time_obj)
+            .values_list("covers", flat=True)
+            .first()
+        )
+        return covers or 0
+
+    def get_occupancy_by_time(self, restaurant, date_obj):
+        """
+        Ocupación de todo un día en una sola consulta sobre SlotOccupancy.
+        Retorna un dict {time: personas}; los slots sin reservas no aparecen.
+        """
+        return dict(
+            self._occupied(restaurant=restaurant, date=date_obj).values_list(
+                "slot_time", "covers"
+            )
+        )
+
+    def get_occupancy_in_range(self, restaurant, start_date, end_date):
+        """
+        Ocupación de un rango de fechas en una sola consulta.
+        Retorna un dict {fecha: {time: personas}}.
+        """
+        rows = self._occupied(
+            restaurant=restaurant, date__gte=start_date, date__lte=end_date
+        ).values_list("date", "slot_time", "covers")
+
+        occupancy = {}
+        for date_obj, slot_time, covers in rows:
+            occupancy.setdefault(date_obj, {})[slot_time] = covers
+        return occupancy
 
-        return result["total"] or 0
+    def get_occupancy_for_restaurants(self, restaurant_ids, date_obj):
+        """
+        Ocupación de una fecha para varios restaurantes en una sola consulta.
+        Retorna {restaurant_id: {time: personas}}.
+        """
+        rows = self._occupied(
+            restaurant_id__in=restaurant_ids, date=date_obj
+        ).values_list("restaurant_id", "slot_time", "covers")
+
+        occupancy = {}
+        for restaurant_id, slot_time, covers in rows:
+            occupancy.setdefault(restaurant_id, {})[slot_time] = covers
+        return occupancy
+
+    def get_occupancy_for_days(self, days):
+        """
+        Ocupación de varios pares (restaurant_id, fecha) en una sola consulta.
+        Retorna {(restaurant_id, fecha): {time: personas}} con todos los pares.
+        """
+        days = set(days)
+        occupancy = {day: {} for day in days}
+        if not days:
+            return occupancy
+
+        rows = self._occupied(
+            restaurant_id__in={restaurant_id for restaurant_id, _ in days},
+            date__in={date_obj for _, date_obj in days},
+        ).values_list("restaurant_id", "date", "slot_time", "covers")
+        for restaurant_id, date_obj, slot_time, covers in rows:
+            # El filtro es el producto restaurantes x fechas: sobran pares
+            day = occupancy.get((restaurant_id, date_obj))
+            if day is not None:
+                day[slot_time] = covers
+        return occupancy
 
     def check_availability(
-        self, restaurant, date_obj, time_obj, num_people, max_capacity
+        self,
+        restaurant,
+        date_obj,
+        time_obj,
+        num_people,
+        max_capacity,
+        window=None,
+        durations=None,
+    ):
+        """
+        window: lista [(time, capacidad)] de horas que ocupará la reserva
+        (por defecto solo time_obj). Con duraciones configuradas la ocupación
+        de cada hora es la suma de reservas solapadas y todas deben tener sitio.
+        """
+        if not durations or not durations.configured:
+            current_occupancy = self.get_current_occupancy(
+                restaurant, date_obj, time_obj
+            )
+            return (current_occupancy + num_people) <= max_capacity
+
+        window = window or [(time_obj, max_capacity)]
+        occupancy = sweep_occupancy(
+            self.get_occupancy_by_time(restaurant, date_obj),
+            [slot_time for slot_time, _ in window],
+            durations,
+        )
+        return all(
+            occupancy[slot_time] + num_people <= capacity
+            for slot_time, capacity in window
+        )
+
+    def reserve(
+        self,
+        restaurant,
+        date_obj,
+        time_obj,
+        num_people,
+        max_capacity,
+        window=None,
+        durations=None,
     ):
-        current_occupancy = self.get_current_occupancy(restaurant, date_obj, time_obj)
-        return (current_occupancy + num_people) <= max_capacity
+        """
+        Comprueba y reserva capacidad para una reserva nueva.
+        En base de datos la propia fila de Reservation es la reserva, así que
+        basta con la comprobación; otros backends llevan su propio contador.
+        """
+        return self.check_availability(
+            restaurant, date_obj, time_obj, num_people, max_capacity, window, durations
+        )
+
+    def release(self, restaurant, date_obj, time_obj, num_people, window=None):
+        """Libera la capacidad de una reserva que deja de estar activa."""
+
+
+def get_capacity_engine(model=None):
+    """
+    CapacityEngine según AVAILABILITY_CAPACITY_BACKEND
+    ('database', 'ledger', 'redis', 'memory').
+    """
+    backend = getattr(settings, "AVAILABILITY_CAPACITY_BACKEND", "database")
+
+    if backend == "database":
+        return CapacityEngine(model)
+
+    if backend == "ledger":
+        from .ledger import LedgerCapacityEngine
+
+        return LedgerCapacityEngine(model)
+
+    if backend in ("redis", "memory"):
+        from .redis_capacity import RedisCapacityEngine, get_counter_store
+
+        return RedisCapacityEngine(model, store=get_counter_store(backend))
+
+    raise ImproperlyConfigured(
+        f"AVAILABILITY_CAPACITY_BACKEND desconocido: {backend!r}"
+    )
@@ -1,23 +1,69 @@
 from availability.models import ExceptionDate
+from availability.engine.schedule import schedule_cache
+from availability.engine.timing import instrument
 
 
+@instrument("exceptions")
 class ExceptionEngine:
     """
     Motor para gestionar excepciones de disponibilidad.
     Maneja días cerrados o con capacidad personalizada.
     """
 
-    def __init__(self, model=None):
+    def __init__(self, model=None, schedules=None):
         self.model = model or ExceptionDate
+        self.schedules = schedules or schedule_cache
 
     def get_exception(self, restaurant, date_obj, use_lock=False):
         """
         Busca una excepción para el restaurante y fecha dados.
-        Retorna la instancia de ExceptionDate o None.
+        Retorna la excepción (del horario compilado) o None.
+        Con use_lock=True consulta y bloquea la fila en la base de datos.
         """
-        queryset = self.model.objects.filter(restaurant=restaurant, date=date_obj)
-
         if use_lock:
-            queryset = queryset.select_for_update()
+            return (
+                self.model.objects.filter(restaurant=restaurant, date=date_obj)
+                .select_for_update()
+                .first()
+            )
+
+        return self.schedules.get(restaurant).get_exception(date_obj)
+
+    def lock_exceptions(self, days):
+        """
+        Bloquea en una consulta las excepciones de varios pares
+        (restaurant_id, fecha); como en lock_rules_for_days, el filtro es el
+        producto restaurantes x fechas.
+        """
+        days = set(days)
+        if not days:
+            return []
+        return list(
+            self.model.objects.filter(
+                restaurant_id__in={restaurant_id for restaurant_id, _ in days},
+                date__in={date_obj for _, date_obj in days},
+            )
+            .order_by("id")
+            .select_for_update()
+        )
 
-        return queryset.first()
+    def get_exceptions_in_range(self, restaurant, start_date, end_date):
+        """
+        Excepciones de un rango de fechas (inclusive).
+        Retorna un dict {fecha: excepción}.
+        """
+        return self.schedules.get(restaurant).get_exceptions_in_range(
+            start_date, end_date
+        )
+
+    def get_exceptions_for_restaurants(self, restaurant_ids, date_obj):
+        """
+        Excepciones de varios restaurantes en una fecha, en una sola consulta.
+        Retorna un dict {restaurant_id: excepción}.
+        """
+        return {
+            exception.restaurant_id: exception
+            for exception in self.model.objects.filter(
+                restaurant_id__in=restaurant_ids, date=date_obj
+            ).order_by()
+        }
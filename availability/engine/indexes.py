@@ -0,0 +1,150 @@
+from bisect import bisect_right
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def season_precedence(season):
+    """
+    Orden de prioridad entre temporadas solapadas (menor = gana):
+    1. Mayor priority
+    2. Rango más corto (la más específica)
+    3. Inicio más temprano y, por último, id
+    """
+    span = (season.end_date - season.start_date).days
+    return (-season.priority, span, season.start_date, season.id)
+
+
+class SeasonIndex:
+    """
+    Índice de fronteras ordenadas sobre las temporadas activas de un restaurante.
+    Cada par de fronteras consecutivas delimita un tramo con una única temporada
+    ganadora (ya resuelta al construir), así que una consulta es un bisect: O(log n).
+    """
+
+    def __init__(self, seasons):
+        seasons = list(seasons)
+        # Fronteras: inicio de cada temporada y el día siguiente a su fin
+        boundaries = sorted(
+            {season.start_date for season in seasons}
+            | {season.end_date + timedelta(days=1) for season in seasons}
+        )
+
+        winners = []
+        for segment_start in boundaries:
+            covering = [
+                season
+                for season in seasons
+                if season.start_date <= segment_start <= season.end_date
+            ]
+            winners.append(min(covering, key=season_precedence) if covering else None)
+
+        self.boundaries = boundaries
+        self.winners = winners
+
+    def lookup(self, date_obj):
+        """Temporada vigente en la fecha, o None."""
+        position = bisect_right(self.boundaries, date_obj) - 1
+        if position < 0:
+            return None
+        return self.winners[position]
+
+    def resolve_range(self, start_date, end_date):
+        """
+        Temporada vigente para cada día del rango (inclusive): {fecha: temporada}.
+        Un solo bisect al principio; después se avanza tramo a tramo.
+        """
+        resolved = {}
+        position = bisect_right(self.boundaries, start_date) - 1
+        date_obj = start_date
+        while date_obj <= end_date:
+            while (
+                position + 1 < len(self.boundaries)
+                and self.boundaries[position + 1] <= date_obj
+            ):
+                position += 1
+            season = self.winners[position] if position >= 0 else None
+            if season:
+                resolved[date_obj] = season
+            date_obj += timedelta(days=1)
+        return resolved
+
+
+class OverlappingRulesError(ImproperlyConfigured):
+    """Dos reglas disponibles del mismo día se solapan en el tiempo."""
+
+
+def find_overlap(rules):
+    """Primer par (anterior, siguiente) de reglas solapadas, ya ordenadas, o None."""
+    for previous, rule in zip(rules, rules[1:]):
+        if rule.start_time < previous.end_time:
+            return previous, rule
+    return None
+
+
+class DayRules(tuple):
+    """
+    Reglas de un día ordenadas por start_time. Es una tupla, así que se usa
+    igual que la lista de reglas; match() encuentra la regla de una hora con un
+    bisect sobre los inicios: O(log n).
+    Las reglas solapadas se rechazan al escribirlas (AvailabilityRule.clean y
+    el serializer); si aun así hay filas solapadas guardadas, el día queda
+    marcado como inválido (error) y solo las consultas de ese día lanzan
+    OverlappingRulesError: el resto del horario sigue funcionando.
+    """
+
+    def __new__(cls, rules=()):
+        rules = sorted(rules, key=lambda rule: (rule.start_time, rule.id))
+        day_rules = super().__new__(cls, rules)
+        day_rules.starts = tuple(rule.start_time for rule in rules)
+        day_rules.error = None
+        overlap = find_overlap(rules)
+        if overlap:
+            previous, rule = overlap
+            day_rules.error = (
+                f"Reglas solapadas (día {rule.day_of_week}): "
+                f"#{previous.id} {previous.start_time}-{previous.end_time} y "
+                f"#{rule.id} {rule.start_time}-{rule.end_time}"
+            )
+        return day_rules
+
+    def __reduce__(self):
+        return (DayRules, (tuple(self),))
+
+    def check(self):
+        """Lanza OverlappingRulesError si el día tiene reglas solapadas."""
+        if self.error:
+            raise OverlappingRulesError(self.error)
+
+    def match(self, time_obj):
+        """Regla que cubre la hora dada, o None. Lanza error si el día es inválido."""
+        self.check()
+        position = bisect_right(self.starts, time_obj) - 1
+        if position < 0:
+            return None
+        rule = self[position]
+        return rule if time_obj < rule.end_time else None
+
+
+class RuleIndex:
+    """
+    Reglas de un restaurante por día de la semana (una DayRules por día).
+    Un día con reglas solapadas queda marcado como inválido sin afectar al resto.
+    """
+
+    def __init__(self, rules_by_weekday):
+        self.days = tuple(DayRules(rules) for rules in rules_by_weekday)
+
+    def lookup(self, date_obj, time_obj):
+        """Regla vigente en la fecha y hora, o None."""
+        return self.days[date_obj.weekday()].match(time_obj)
+
+    def lookup_many(self, slots):
+        """
+        Regla de cada (fecha, hora) de slots, en el mismo orden: un bisect
+        por par, sin consultas. Retorna una lista de reglas o None.
+        """
+        days = self.days
+        return [
+            days[date_obj.weekday()].match(time_obj) for date_obj, time_obj in slots
+        ]
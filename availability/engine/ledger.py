@@ -0,0 +1,151 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from availability.models import SlotLedger
+from .capacity import CapacityEngine, sweep_occupancy
+from .timing import instrument
+
+
+class SlotFull(Exception):
+    """Un slot de la estancia no tiene sitio: deshace los UPDATE anteriores."""
+
+
+@instrument("capacity")
+class LedgerCapacityEngine(CapacityEngine):
+    """
+    CapacityEngine que reserva sobre SlotLedger con un UPDATE condicional:
+
+        UPDATE ... SET booked = booked + n
+        WHERE restaurant = r AND date = d AND slot_time = t AND booked + n <= capacidad
+
+    El número de filas actualizadas decide la reserva. Solo se bloquea la fila
+    del slot, así que reservas de slots distintos no se esperan entre sí y no
+    hace falta el select_for_update sobre las reglas.
+    Las lecturas salen de SlotOccupancy, como en CapacityEngine; una fila del
+    ledger que no existe se inicializa con esa ocupación (barrida con la
+    duración de estancia) la primera vez que se reserva en ese slot.
+    """
+
+    atomic_reserve = True
+
+    def __init__(self, model=None, ledger_model=None):
+        super().__init__(model)
+        self.ledger_model = ledger_model or SlotLedger
+
+    def _slot(self, restaurant, date_obj, slot_time):
+        return self.ledger_model.objects.filter(
+            restaurant_id=getattr(restaurant, "pk", restaurant),
+            date=date_obj,
+            slot_time=slot_time,
+        )
+
+    def _book(self, restaurant, date_obj, slot_time, num_people, capacity):
+        return (
+            self._slot(restaurant, date_obj, slot_time)
+            .filter(booked__lte=capacity - num_people)
+            .update(booked=F("booked") + num_people)
+        )
+
+    def _seed(self, restaurant, date_obj, slot_time, durations):
+        """
+        Crea la fila del slot con la ocupación actual de SlotOccupancy.
+        Retorna False si ya existía (el UPDATE falló por capacidad).
+        """
+        if self._slot(restaurant, date_obj, slot_time).exists():
+            return False
+
+        occupancy = sweep_occupancy(
+            self.get_occupancy_by_time(restaurant, date_obj), [slot_time], durations
+        )
+        # Si otra transacción crea la fila a la vez, gana la suya
+        self.ledger_model.objects.bulk_create(
+            [
+                self.ledger_model(
+                    restaurant_id=getattr(restaurant, "pk", restaurant),
+                    date=date_obj,
+                    slot_time=slot_time,
+                    booked=occupancy[slot_time],
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        return True
+
+    def reserve(
+        self,
+        restaurant,
+        date_obj,
+        time_obj,
+        num_people,
+        max_capacity,
+        window=None,
+        durations=None,
+    ):
+        """
+        Un UPDATE condicional por slot de la estancia (uno solo sin duración).
+        Los slots se actualizan en orden de hora para que dos reservas
+        solapadas bloqueen las filas en el mismo orden y no se interbloqueen.
+        """
+        if not window or not durations or not durations.configured:
+            window = [(time_obj, max_capacity)]
+
+        window = sorted(window)
+        if len(window) == 1:
+            # Un solo slot: el UPDATE ya es atómico, sin savepoint
+            slot_time, capacity = window[0]
+            return self._reserve_slot(
+                restaurant, date_obj, slot_time, num_people, capacity, durations
+            )
+
+        try:
+            with transaction.atomic():
+                for slot_time, capacity in window:
+                    if not self._reserve_slot(
+                        restaurant, date_obj, slot_time, num_people, capacity, durations
+                    ):
+                        raise SlotFull
+        except SlotFull:
+            return False
+        return True
+
+    def _reserve_slot(
+        self, restaurant, date_obj, slot_time, num_people, capacity, durations
+    ):
+        if self._book(restaurant, date_obj, slot_time, num_people, capacity):
+            return True
+        # 0 filas: o el slot está lleno o su fila aún no existe
+        return bool(
+            self._seed(restaurant, date_obj, slot_time, durations)
+            and self._book(restaurant, date_obj, slot_time, num_people, capacity)
+        )
+
+    def release(self, restaurant, date_obj, time_obj, num_people, window=None):
+        times = [slot_time for slot_time, _ in window] if window else [time_obj]
+        self.ledger_model.objects.filter(
+            restaurant_id=getattr(restaurant, "pk", restaurant),
+            date=date_obj,
+            slot_time__in=times,
+        ).update(booked=Greatest(F("booked") - num_people, 0))
+
+    def rebuild(self, restaurant, start_date, end_date):
+        """
+        Descarta las filas del rango; se vuelven a inicializar desde
+        SlotOccupancy en la siguiente reserva de cada slot (tras un cambio
+        masivo, reconstruir antes SlotOccupancy con occupancy_table.rebuild).
+        """
+        self.ledger_model.objects.filter(
+            restaurant_id=getattr(restaurant, "pk", restaurant),
+            date__gte=start_date,
+            date__lte=end_date,
+        ).delete()
+
+    def get_booked(self, restaurant, date_obj):
+        """Filas del libro de un día: {slot_time: personas}."""
+        return dict(
+            self.ledger_model.objects.filter(
+                restaurant_id=getattr(restaurant, "pk", restaurant), date=date_obj
+            )
+            .order_by()
+            .values_list("slot_time", "booked")
+        )
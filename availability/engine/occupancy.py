@@ -0,0 +1,238 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+
+from availability.models import SlotOccupancy
+from reservations.models import Reservation
+from .capacity import ACTIVE_STATUSES
+
+# Campos de Reservation que determinan su aportación a SlotOccupancy
+STATE_FIELDS = (
+    "restaurant_id",
+    "reservation_date",
+    "reservation_time",
+    "num_people",
+    "status",
+)
+
+# Estado desconocido: la instancia se cargó sin alguno de STATE_FIELDS
+UNKNOWN = object()
+
+
+class OccupancyTable:
+    """
+    Mantiene SlotOccupancy, el resumen (personas, reservas) por
+    (restaurante, fecha, hora de inicio) de las reservas activas.
+
+    Cada cambio de una reserva se traduce en deltas sobre una o dos filas
+    (la de su slot anterior y la del nuevo) con UPDATE ... SET covers =
+    covers + n, así que el coste no depende del histórico del restaurante.
+    Las señales de Reservation aplican los deltas (ver availability/signals.py);
+    bulk_create() y queryset.update() no emiten señales: tras usarlos hay que
+    llamar a add_reservations() o a rebuild() a mano.
+    """
+
+    def __init__(self, model=None, reservation_model=None):
+        self.model = model or SlotOccupancy
+        self.reservation_model = reservation_model or Reservation
+
+    @staticmethod
+    def state(reservation):
+        """
+        Aportación de una reserva: ((restaurante, fecha, hora), personas),
+        None si no está activa o UNKNOWN si falta algún campo en la instancia.
+        Lee __dict__ para no disparar la carga de campos diferidos.
+        """
+        values = reservation.__dict__
+        if any(field not in values for field in STATE_FIELDS):
+            return UNKNOWN
+        if values["status"] not in ACTIVE_STATUSES:
+            return None
+        key = (
+            values["restaurant_id"],
+            values["reservation_date"],
+            values["reservation_time"],
+        )
+        return key, values["num_people"]
+
+    def load_state(self, pk):
+        """Aportación guardada en base de datos de la reserva pk."""
+        values = (
+            self.reservation_model.objects.filter(pk=pk).values(*STATE_FIELDS).first()
+        )
+        if values is None or values["status"] not in ACTIVE_STATUSES:
+            return None
+        key = (
+            values["restaurant_id"],
+            values["reservation_date"],
+            values["reservation_time"],
+        )
+        return key, values["num_people"]
+
+    def apply(self, old, new):
+        """Aplica el paso de una reserva del estado old al estado new."""
+        if old == new:
+            return
+        if old and new and old[0] == new[0]:
+            # Mismo slot: solo cambia el tamaño del grupo
+            self._add(new[0], new[1] - old[1], 0)
+            return
+        if old:
+            self._add(old[0], -old[1], -1)
+        if new:
+            self._add(new[0], new[1], 1)
+
+    def add_reservations(self, reservations):
+        """
+        Suma reservas nuevas insertadas con bulk_create() con un número fijo
+        de consultas: crea las filas que falten, las bloquea en orden y suma
+        con un UPDATE ... SET covers = covers + n por cada delta distinto
+        (en un lote de grupos del mismo tamaño, uno solo).
+        """
+        totals = {}
+        for reservation in reservations:
+            state = self.state(reservation)
+            if state and state is not UNKNOWN:
+                covers, count = totals.get(state[0], (0, 0))
+                totals[state[0]] = (covers + state[1], count + 1)
+        if not totals:
+            return
+
+        # select_for_update necesita transacción; dentro de otra no abre savepoint
+        with transaction.atomic(savepoint=False):
+            self.model.objects.bulk_create(
+                [
+                    self.model(restaurant_id=restaurant_id, date=date_obj, slot_time=slot_time)
+                    for restaurant_id, date_obj, slot_time in sorted(totals)
+                ],
+                ignore_conflicts=True,
+            )
+            rows = self.model.objects.select_for_update().filter(
+                restaurant_id__in={key[0] for key in totals},
+                date__in={key[1] for key in totals},
+                slot_time__in={key[2] for key in totals},
+            ).order_by("restaurant_id", "date", "slot_time")
+
+            ids_by_delta = {}
+            for pk, *key in rows.values_list("pk", "restaurant_id", "date", "slot_time"):
+                delta = totals.get(tuple(key))
+                if delta:
+                    ids_by_delta.setdefault(delta, []).append(pk)
+            for (covers, count), ids in ids_by_delta.items():
+                self.model.objects.filter(pk__in=ids).update(
+                    covers=F("covers") + covers,
+                    reservation_count=F("reservation_count") + count,
+                )
+
+    def _add(self, key, covers, count):
+        restaurant_id, date_obj, slot_time = key
+        rows = self.model.objects.filter(
+            restaurant_id=restaurant_id, date=date_obj, slot_time=slot_time
+        )
+        changes = {
+            "covers": Greatest(F("covers") + covers, 0),
+            "reservation_count": Greatest(F("reservation_count") + count, 0),
+        }
+        if rows.update(**changes) or covers <= 0:
+            # Un delta negativo sin fila no tiene nada que descontar
+            return
+
+        # Primera reserva del slot: si otra transacción crea la fila a la vez, gana la suya
+        self.model.objects.bulk_create(
+            [self.model(restaurant_id=restaurant_id, date=date_obj, slot_time=slot_time)],
+            ignore_conflicts=True,
+        )
+        rows.update(**changes)
+
+    def compute(self, restaurant_id, start_date, end_date):
+        """
+        Ocupación del rango calculada desde Reservation:
+        {(fecha, hora): (personas, reservas)}.
+        """
+        rows = (
+            self.reservation_model.objects.filter(
+                restaurant_id=restaurant_id,
+                reservation_date__gte=start_date,
+                reservation_date__lte=end_date,
+                status__in=ACTIVE_STATUSES,
+            )
+            .values("reservation_date", "reservation_time")
+            # COUNT(*): con el índice parcial no hace falta leer la tabla
+            .annotate(covers=Sum("num_people"), count=Count("*"))
+            .order_by()
+        )
+        return {
+            (row["reservation_date"], row["reservation_time"]): (
+                row["covers"],
+                row["count"],
+            )
+            for row in rows
+        }
+
+    def stored(self, restaurant_id, start_date, end_date):
+        """Filas no vacías de SlotOccupancy en el rango, con el formato de compute()."""
+        rows = (
+            self.model.objects.filter(
+                restaurant_id=restaurant_id,
+                date__gte=start_date,
+                date__lte=end_date,
+            )
+            .exclude(covers=0, reservation_count=0)
+            .order_by()
+            .values_list("date", "slot_time", "covers", "reservation_count")
+        )
+        return {
+            (date_obj, slot_time): (covers, count)
+            for date_obj, slot_time, covers, count in rows
+        }
+
+    def rebuild(self, restaurant_id, start_date, end_date):
+        """
+        Recalcula desde Reservation las filas del rango en una transacción.
+        Retorna el número de filas escritas.
+        """
+        with transaction.atomic():
+            expected = self.compute(restaurant_id, start_date, end_date)
+            self.model.objects.filter(
+                restaurant_id=restaurant_id,
+                date__gte=start_date,
+                date__lte=end_date,
+            ).delete()
+            self.model.objects.bulk_create(
+                [
+                    self.model(
+                        restaurant_id=restaurant_id,
+                        date=date_obj,
+                        slot_time=slot_time,
+                        covers=covers,
+                        reservation_count=count,
+                    )
+                    for (date_obj, slot_time), (covers, count) in expected.items()
+                ]
+            )
+        return len(expected)
+
+    def drift(self, restaurant_id, start_date, end_date):
+        """
+        Slots cuya fila no coincide con Reservation.
+        Retorna una lista ordenada [(fecha, hora, esperado, guardado)], con
+        esperado y guardado como (personas, reservas).
+        """
+        expected = self.compute(restaurant_id, start_date, end_date)
+        stored = self.stored(restaurant_id, start_date, end_date)
+        drift = []
+        for date_obj, slot_time in sorted(expected.keys() | stored.keys()):
+            key = (date_obj, slot_time)
+            if expected.get(key) != stored.get(key):
+                drift.append(
+                    (
+                        date_obj,
+                        slot_time,
+                        expected.get(key, (0, 0)),
+                        stored.get(key, (0, 0)),
+                    )
+                )
+        return drift
+
+
+occupancy_table = OccupancyTable()
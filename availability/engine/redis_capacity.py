@@ -0,0 +1,426 @@
+import threading
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .capacity import CapacityEngine, sweep_occupancy, time_to_seconds
+from .timing import instrument
+
+# Campo que marca un hash como inicializado desde la base de datos.
+# Sin él no se puede distinguir "sin reservas" de "contador perdido".
+SEEDED_FIELD = "_seeded"
+
+# Días que se conservan los contadores después de la fecha de la reserva
+COUNTER_TTL_DAYS = 2
+
+# KEYS[1]: hash de inicios {HH:MM:SS: personas}
+# ARGV: campo, personas, duración por defecto (s), nº de reglas,
+#       [inicio, fin, duración] por regla (s), [hora, capacidad] por slot ocupado
+RESERVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local num_people = tonumber(ARGV[2])
+local default_duration = tonumber(ARGV[3])
+local rules = {}
+local index = 5
+for i = 1, tonumber(ARGV[4]) do
+    rules[i] = {tonumber(ARGV[index]), tonumber(ARGV[index + 1]), tonumber(ARGV[index + 2])}
+    index = index + 3
+end
+
+local function duration_for(start)
+    for _, rule in ipairs(rules) do
+        if rule[1] <= start and start < rule[2] then
+            if rule[3] > 0 then
+                return rule[3]
+            end
+            return default_duration
+        end
+    end
+    return default_duration
+end
+
+local intervals = {}
+local starts = redis.call('HGETALL', KEYS[1])
+for i = 1, #starts, 2 do
+    if starts[i] ~= '_seeded' then
+        local h, m, s = string.match(starts[i], '(%d+):(%d+):(%d+)')
+        local start = tonumber(h) * 3600 + tonumber(m) * 60 + tonumber(s)
+        local duration = duration_for(start)
+        if duration == 0 then
+            duration = 1
+        end
+        intervals[#intervals + 1] = {start, start + duration, tonumber(starts[i + 1])}
+    end
+end
+
+while index < #ARGV do
+    local point = tonumber(ARGV[index])
+    local total = 0
+    for _, interval in ipairs(intervals) do
+        if interval[1] <= point and point < interval[2] then
+            total = total + interval[3]
+        end
+    end
+    if total + num_people > tonumber(ARGV[index + 1]) then
+        return 0
+    end
+    index = index + 2
+end
+
+redis.call('HINCRBY', KEYS[1], ARGV[1], num_people)
+return 1
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local value = redis.call('HINCRBY', KEYS[1], ARGV[1], -tonumber(ARGV[2]))
+if value < 0 then
+    redis.call('HSET', KEYS[1], ARGV[1], 0)
+end
+return 1
+"""
+
+SEED_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], '_seeded', 1)
+for i = 2, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIREAT', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class RedisCounterStore:
+    """
+    Contadores de personas por slot en Redis: un hash por (restaurante, fecha)
+    con un campo por hora. Cada operación de escritura es un script Lua atómico.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+        self._seed = client.register_script(SEED_SCRIPT)
+
+    def reserve(self, key, field, num_people, window, durations=None):
+        """
+        Comprueba cada (hora, capacidad) de window y suma la reserva en field.
+        1 = reservado, 0 = sin capacidad, -1 = contador sin inicializar.
+        """
+        rules = [
+            rule
+            for rule in (durations.rules if durations else ())
+            if rule.dining_duration
+        ]
+        args = [field, num_people, _duration_seconds(durations and durations.default)]
+        args.append(len(rules))
+        for rule in rules:
+            args.extend(
+                [
+                    time_to_seconds(rule.start_time),
+                    time_to_seconds(rule.end_time),
+                    _duration_seconds(rule.dining_duration),
+                ]
+            )
+        for slot_time, capacity in window:
+            args.extend([time_to_seconds(slot_time), capacity])
+        return int(self._reserve(keys=[key], args=args))
+
+    def release(self, key, field, num_people):
+        self._release(keys=[key], args=[field, num_people])
+
+    def seed(self, key, counts, expire_at):
+        args = [expire_at]
+        for field, value in counts.items():
+            args.extend([field, value])
+        self._seed(keys=[key], args=args)
+
+    def get_many(self, keys):
+        """Retorna un dict por clave, o None si la clave no está inicializada."""
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.hgetall(key)
+
+        results = []
+        for raw in pipeline.execute():
+            counts = {
+                (field.decode() if isinstance(field, bytes) else field): int(value)
+                for field, value in raw.items()
+            }
+            results.append(
+                counts if counts.pop(SEEDED_FIELD, None) is not None else None
+            )
+        return results
+
+    def replace(self, key, counts, expire_at):
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.delete(key)
+        pipeline.hset(key, mapping={SEEDED_FIELD: 1, **counts})
+        pipeline.expireat(key, expire_at)
+        pipeline.execute()
+
+
+class InMemoryCounterStore:
+    """
+    Doble en proceso de RedisCounterStore para tests y desarrollo local.
+    Un lock garantiza la misma atomicidad que los scripts Lua; no expira claves.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key, field, num_people, window, durations=None):
+        with self._lock:
+            counts = self._data.get(key)
+            if counts is None:
+                return -1
+            occupancy = sweep_occupancy(
+                {time.fromisoformat(start): covers for start, covers in counts.items()},
+                [slot_time for slot_time, _ in window],
+                durations,
+            )
+            if any(
+                occupancy[slot_time] + num_people > capacity
+                for slot_time, capacity in window
+            ):
+                return 0
+            counts[field] = counts.get(field, 0) + num_people
+            return 1
+
+    def release(self, key, field, num_people):
+        with self._lock:
+            counts = self._data.get(key)
+            if counts is not None:
+                counts[field] = max(counts.get(field, 0) - num_people, 0)
+
+    def seed(self, key, counts, expire_at):
+        with self._lock:
+            self._data.setdefault(key, dict(counts))
+
+    def get_many(self, keys):
+        with self._lock:
+            return [
+                dict(self._data[key]) if key in self._data else None for key in keys
+            ]
+
+    def replace(self, key, counts, expire_at):
+        with self._lock:
+            self._data[key] = dict(counts)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def _duration_seconds(minutes):
+    return minutes * 60 if minutes else 0
+
+
+memory_store = InMemoryCounterStore()
+_redis_store = None
+
+
+def get_counter_store(backend):
+    """Store para AVAILABILITY_CAPACITY_BACKEND ('redis' o 'memory')."""
+    global _redis_store
+
+    if backend == "memory":
+        return memory_store
+
+    if _redis_store is None:
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                "AVAILABILITY_CAPACITY_BACKEND='redis' requiere el paquete 'redis'"
+            )
+        _redis_store = RedisCounterStore(
+            redis.Redis.from_url(
+                getattr(settings, "AVAILABILITY_REDIS_URL", "redis://localhost:6379/0")
+            )
+        )
+    return _redis_store
+
+
+@instrument("capacity")
+class RedisCapacityEngine(CapacityEngine):
+    """
+    CapacityEngine con la ocupación en contadores por (restaurante, fecha, slot).
+    reserve() comprueba y reserva en un único script atómico, así la ruta de
+    reserva no ejecuta el SUM(num_people) sobre Reservation. Un día sin
+    contador se inicializa desde la base de datos la primera vez que se usa.
+    """
+
+    KEY = "availability:occupancy:{restaurant_id}:{date}"
+    atomic_reserve = True
+
+    def __init__(self, model=None, store=None):
+        super().__init__(model)
+        self.store = store or get_counter_store("redis")
+
+    def _key(self, restaurant, date_obj):
+        return self.KEY.format(
+            restaurant_id=getattr(restaurant, "pk", restaurant),
+            date=date_obj.isoformat(),
+        )
+
+    @staticmethod
+    def _expire_at(date_obj):
+        expires = datetime.combine(
+            date_obj + timedelta(days=COUNTER_TTL_DAYS), time.min
+        )
+        return int(expires.timestamp())
+
+    @staticmethod
+    def _to_fields(occupancy):
+        return {time_obj.isoformat(): covers for time_obj, covers in occupancy.items()}
+
+    def _load_days(self, restaurant, dates):
+        """Ocupación {fecha: {time: personas}}; inicializa los días sin contador."""
+        keys = [self._key(restaurant, date_obj) for date_obj in dates]
+        occupancy = {}
+        missing = []
+        for date_obj, counts in zip(dates, self.store.get_many(keys)):
+            if counts is None:
+                missing.append(date_obj)
+                continue
+            occupancy[date_obj] = {
+                time.fromisoformat(field): covers
+                for field, covers in counts.items()
+                if covers
+            }
+
+        if missing:
+            # Una consulta agrupada para todos los días que faltan
+            from_db = super().get_occupancy_in_range(
+                restaurant, min(missing), max(missing)
+            )
+            for date_obj in missing:
+                day = from_db.get(date_obj, {})
+                self.store.seed(
+                    self._key(restaurant, date_obj),
+                    self._to_fields(day),
+                    self._expire_at(date_obj),
+                )
+                occupancy[date_obj] = day
+
+        return occupancy
+
+    def get_current_occupancy(self, restaurant, date_obj, time_obj):
+        return self._load_days(restaurant, [date_obj])[date_obj].get(time_obj, 0)
+
+    def get_occupancy_by_time(self, restaurant, date_obj):
+        return self._load_days(restaurant, [date_obj])[date_obj]
+
+    def get_occupancy_in_range(self, restaurant, start_date, end_date):
+        dates = [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        return self._load_days(restaurant, dates)
+
+    def get_occupancy_for_restaurants(self, restaurant_ids, date_obj):
+        """Un pipeline para todos los contadores; los que faltan, en una consulta."""
+        restaurant_ids = list(restaurant_ids)
+        keys = [self._key(restaurant_id, date_obj) for restaurant_id in restaurant_ids]
+        occupancy = {}
+        missing = []
+        for restaurant_id, counts in zip(restaurant_ids, self.store.get_many(keys)):
+            if counts is None:
+                missing.append(restaurant_id)
+                continue
+            occupancy[restaurant_id] = {
+                time.fromisoformat(field): covers
+                for field, covers in counts.items()
+                if covers
+            }
+
+        if missing:
+            from_db = super().get_occupancy_for_restaurants(missing, date_obj)
+            for restaurant_id in missing:
+                day = from_db.get(restaurant_id, {})
+                self.store.seed(
+                    self._key(restaurant_id, date_obj),
+                    self._to_fields(day),
+                    self._expire_at(date_obj),
+                )
+                occupancy[restaurant_id] = day
+
+        return occupancy
+
+    def get_occupancy_for_days(self, days):
+        """Un pipeline para todos los pares; los que faltan, en una consulta."""
+        days = list(dict.fromkeys(days))
+        keys = [self._key(restaurant_id, date_obj) for restaurant_id, date_obj in days]
+        occupancy = {}
+        missing = []
+        for day, counts in zip(days, self.store.get_many(keys)):
+            if counts is None:
+                missing.append(day)
+                continue
+            occupancy[day] = {
+                time.fromisoformat(field): covers
+                for field, covers in counts.items()
+                if covers
+            }
+
+        if missing:
+            from_db = super().get_occupancy_for_days(missing)
+            for restaurant_id, date_obj in missing:
+                day = from_db[(restaurant_id, date_obj)]
+                self.store.seed(
+                    self._key(restaurant_id, date_obj),
+                    self._to_fields(day),
+                    self._expire_at(date_obj),
+                )
+                occupancy[(restaurant_id, date_obj)] = day
+
+        return occupancy
+
+    def reserve(
+        self,
+        restaurant,
+        date_obj,
+        time_obj,
+        num_people,
+        max_capacity,
+        window=None,
+        durations=None,
+    ):
+        key = self._key(restaurant, date_obj)
+        field = time_obj.isoformat()
+        if not window or not durations or not durations.configured:
+            window = [(time_obj, max_capacity)]
+
+        result = self.store.reserve(key, field, num_people, window, durations)
+        if result == -1:
+            self._load_days(restaurant, [date_obj])
+            result = self.store.reserve(key, field, num_people, window, durations)
+        return result == 1
+
+    def release(self, restaurant, date_obj, time_obj, num_people, window=None):
+        # El hash guarda horas de inicio: la ventana no hace falta
+        self.store.release(
+            self._key(restaurant, date_obj), time_obj.isoformat(), num_people
+        )
+
+    def rebuild(self, restaurant, start_date, end_date):
+        """Reescribe los contadores del rango a partir de las filas de Reservation."""
+        from_db = super().get_occupancy_in_range(restaurant, start_date, end_date)
+        date_obj = start_date
+        while date_obj <= end_date:
+            self.store.replace(
+                self._key(restaurant, date_obj),
+                self._to_fields(from_db.get(date_obj, {})),
+                self._expire_at(date_obj),
+            )
+            date_obj += timedelta(days=1)
@@ -1,22 +1,120 @@
 from availability.models import AvailabilityRule
+from availability.engine.schedule import schedule_cache
+from availability.engine.capacity import DiningDurations
+from availability.engine.indexes import DayRules
+from availability.engine.timing import instrument
 
 
+@instrument("rules")
 class RuleEngine:
-    def __init__(self, model=None):
+    def __init__(self, model=None, schedules=None):
         self.model = model or AvailabilityRule
+        self.schedules = schedules or schedule_cache
 
     def get_rule(self, restaurant, date_obj, time_obj=None, use_lock=False):
-        # 0=Lunes, 6=Domingo
-        day_of_week = date_obj.weekday()
+        """
+        Regla del día que cubre time_obj (o la primera del día), o None.
+        Lanza OverlappingRulesError si las reglas de ese día se solapan.
+        """
+        if use_lock:
+            # Bloqueo real de las filas: solo posible contra la base de datos.
+            # Se bloquean todas las del día para validar que no se solapan
+            rules = DayRules(self.lock_rules_for_day(restaurant, date_obj))
+        else:
+            # 0=Lunes, 6=Domingo
+            rules = self.schedules.get(restaurant).get_rules(date_obj.weekday())
 
-        queryset = self.model.objects.filter(
-            restaurant=restaurant, day_of_week=day_of_week, is_available=True
+        if time_obj:
+            return rules.match(time_obj)
+        rules.check()
+        return rules[0] if rules else None
+
+    def lock_rules_for_day(self, restaurant, date_obj):
+        """Bloquea (select_for_update) todas las reglas disponibles del día."""
+        return list(
+            self.model.objects.filter(
+                restaurant=restaurant,
+                day_of_week=date_obj.weekday(),
+                is_available=True,
+            )
+            .order_by("start_time", "id")
+            .select_for_update()
         )
 
-        if time_obj:
-            queryset = queryset.filter(start_time__lte=time_obj, end_time__gt=time_obj)
+    def lock_rules_for_days(self, days):
+        """
+        Bloquea en una consulta las reglas disponibles de varios pares
+        (restaurant_id, fecha). El filtro es el producto restaurantes x días
+        de la semana, así que puede bloquear alguna regla de más.
+        """
+        days = set(days)
+        if not days:
+            return []
+        return list(
+            self.model.objects.filter(
+                restaurant_id__in={restaurant_id for restaurant_id, _ in days},
+                day_of_week__in={date_obj.weekday() for _, date_obj in days},
+                is_available=True,
+            )
+            .order_by("id")
+            .select_for_update()
+        )
 
-        if use_lock:
-            queryset = queryset.select_for_update()
+    def get_rules_for_day(self, restaurant, date_obj):
+        """
+        Todas las reglas disponibles del día (DayRules), en el mismo orden que
+        usa get_rule. La selección por hora se hace luego con match_rule.
+        """
+        return self.schedules.get(restaurant).get_rules(date_obj.weekday())
+
+    def get_rules_for_slots(self, restaurant, slots):
+        """
+        Regla de cada (fecha, hora) de slots, en el mismo orden (o None).
+        Sale del índice del horario compilado: un bisect por par, sin consultas.
+        """
+        return self.schedules.get(restaurant).rule_index.lookup_many(slots)
+
+    def get_rules_by_weekday(self, restaurant):
+        """
+        Todas las reglas disponibles del restaurante agrupadas por día de la semana.
+        Retorna un dict {day_of_week: [reglas]}.
+        """
+        schedule = self.schedules.get(restaurant)
+        return {
+            day_of_week: rules
+            for day_of_week, rules in enumerate(schedule.rules_by_weekday)
+            if rules
+        }
+
+    def get_rules_for_restaurants(self, restaurant_ids, date_obj):
+        """
+        Reglas disponibles del día de varios restaurantes en una sola consulta,
+        en el mismo orden que el horario compilado.
+        Retorna un dict {restaurant_id: DayRules}.
+        """
+        rules = {}
+        queryset = self.model.objects.filter(
+            restaurant_id__in=restaurant_ids,
+            day_of_week=date_obj.weekday(),
+            is_available=True,
+        ).order_by("restaurant_id", "start_time", "id")
+        for rule in queryset:
+            rules.setdefault(rule.restaurant_id, []).append(rule)
+        return {restaurant_id: DayRules(day) for restaurant_id, day in rules.items()}
+
+    def get_dining_durations(self, restaurant, date_obj):
+        """Duraciones de estancia aplicables a las reservas del día."""
+        schedule = self.schedules.get(restaurant)
+        return DiningDurations(
+            schedule.get_rules(date_obj.weekday()), schedule.dining_duration
+        )
 
-        return queryset.first()
+    @staticmethod
+    def match_rule(rules, time_obj):
+        """
+        Regla que cubre la hora dada: bisect sobre DayRules, O(log n).
+        Otra secuencia de reglas se ordena y valida antes.
+        """
+        if not isinstance(rules, DayRules):
+            rules = DayRules(rules)
+        return rules.match(time_obj)
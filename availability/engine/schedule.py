@@ -0,0 +1,268 @@
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from availability.models import Restaurant, AvailabilityRule, Season, ExceptionDate
+from availability.engine.indexes import RuleIndex, SeasonIndex
+
+# Copias inmutables de las filas que usan los motores. Exponen los mismos
+# atributos que los modelos, así que el resto del código no distingue entre ambos.
+RuleEntry = namedtuple(
+    "RuleEntry",
+    [
+        "id",
+        "day_of_week",
+        "start_time",
+        "end_time",
+        "capacity",
+        "is_available",
+        "dining_duration",
+        "slot_interval",
+    ],
+)
+SeasonEntry = namedtuple(
+    "SeasonEntry",
+    [
+        "id",
+        "name",
+        "start_date",
+        "end_date",
+        "capacity_multiplier",
+        "is_active",
+        "priority",
+    ],
+)
+ExceptionEntry = namedtuple(
+    "ExceptionEntry", ["id", "date", "reason", "is_closed", "capacity"]
+)
+
+
+class CompiledSchedule:
+    """
+    Horario compilado e inmutable de un restaurante.
+    - rules_by_weekday: tupla de 7 DayRules (reglas ordenadas por start_time)
+    - rule_index: RuleIndex sobre esas reglas; un día con reglas solapadas
+      se compila marcado como inválido (DayRules.error) y solo sus consultas
+      lanzan OverlappingRulesError
+    - seasons: temporadas activas ordenadas por start_date
+    - season_index: SeasonIndex sobre seasons (resuelve solapamientos)
+    - exceptions: dict {fecha: excepción}
+    - dining_duration: duración de estancia del restaurante (minutos o None);
+      cada regla ya lleva su duración y su intervalo entre slots efectivos
+      (los suyos o los del restaurante)
+    """
+
+    __slots__ = (
+        "restaurant_id",
+        "version",
+        "rules_by_weekday",
+        "rule_index",
+        "seasons",
+        "season_index",
+        "exceptions",
+        "dining_duration",
+    )
+
+    def __init__(
+        self,
+        restaurant_id,
+        version,
+        rules_by_weekday,
+        seasons,
+        exceptions,
+        dining_duration=None,
+    ):
+        object.__setattr__(self, "restaurant_id", restaurant_id)
+        object.__setattr__(self, "version", version)
+        rule_index = RuleIndex(rules_by_weekday)
+        object.__setattr__(self, "rules_by_weekday", rule_index.days)
+        object.__setattr__(self, "rule_index", rule_index)
+        object.__setattr__(self, "seasons", seasons)
+        object.__setattr__(self, "season_index", SeasonIndex(seasons))
+        object.__setattr__(self, "exceptions", exceptions)
+        object.__setattr__(self, "dining_duration", dining_duration)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledSchedule es inmutable")
+
+    def __reduce__(self):
+        return (
+            CompiledSchedule,
+            (
+                self.restaurant_id,
+                self.version,
+                self.rules_by_weekday,
+                self.seasons,
+                self.exceptions,
+                self.dining_duration,
+            ),
+        )
+
+    @classmethod
+    def compile(cls, restaurant_id, version):
+        """Construye el horario con una consulta por tabla (4 en total)."""
+        dining_duration, slot_interval = (
+            Restaurant.objects.filter(pk=restaurant_id)
+            .order_by()
+            .values_list("dining_duration", "slot_interval")
+            .first()
+        ) or (None, None)
+
+        rules_by_weekday = [[] for _ in range(7)]
+        rules = AvailabilityRule.objects.filter(
+            restaurant_id=restaurant_id, is_available=True
+        ).order_by("day_of_week", "start_time", "id")
+        for rule in rules:
+            rules_by_weekday[rule.day_of_week].append(
+                RuleEntry(
+                    rule.id,
+                    rule.day_of_week,
+                    rule.start_time,
+                    rule.end_time,
+                    rule.capacity,
+                    rule.is_available,
+                    rule.dining_duration or dining_duration,
+                    rule.slot_interval or slot_interval,
+                )
+            )
+
+        seasons = tuple(
+            SeasonEntry(
+                season.id,
+                season.name,
+                season.start_date,
+                season.end_date,
+                season.capacity_multiplier,
+                season.is_active,
+                season.priority,
+            )
+            for season in Season.objects.filter(
+                restaurant_id=restaurant_id, is_active=True
+            ).order_by("start_date", "id")
+        )
+
+        exceptions = {
+            exception.date: ExceptionEntry(
+                exception.id,
+                exception.date,
+                exception.reason,
+                exception.is_closed,
+                exception.capacity,
+            )
+            for exception in ExceptionDate.objects.filter(restaurant_id=restaurant_id)
+        }
+
+        return cls(
+            restaurant_id,
+            version,
+            tuple(tuple(day_rules) for day_rules in rules_by_weekday),
+            seasons,
+            exceptions,
+            dining_duration,
+        )
+
+    def get_rules(self, day_of_week):
+        return self.rules_by_weekday[day_of_week]
+
+    def get_exception(self, date_obj):
+        return self.exceptions.get(date_obj)
+
+    def get_exceptions_in_range(self, start_date, end_date):
+        return {
+            date_obj: exception
+            for date_obj, exception in self.exceptions.items()
+            if start_date <= date_obj <= end_date
+        }
+
+
+class ScheduleCache:
+    """
+    Caché de horarios compilados en dos niveles: en proceso y en el framework
+    de caché de Django, bajo una clave de versión por restaurante.
+    Las señales de AvailabilityRule, Season y ExceptionDate cambian la versión
+    (ver availability/signals.py); queryset.update() y bulk_create() no emiten
+    señales, así que tras usarlos hay que llamar a invalidate() a mano.
+
+    Con un backend de caché compartido (Redis, Memcached) la invalidación es
+    inmediata en todos los procesos. Con LocMemCache cada proceso tiene su
+    propia versión y los cambios de otros procesos se ven al expirar
+    AVAILABILITY_SCHEDULE_CACHE_TIMEOUT.
+    """
+
+    VERSION_KEY = "availability:schedule:version:{restaurant_id}"
+    # Incluye el formato de RuleEntry: un despliegue que lo cambia no lee
+    # horarios serializados por la versión anterior
+    SCHEDULE_KEY = "availability:schedule:v2:{restaurant_id}:{version}"
+
+    def __init__(self, cache_alias="default"):
+        self.cache_alias = cache_alias
+        self._local = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def timeout(self):
+        return getattr(settings, "AVAILABILITY_SCHEDULE_CACHE_TIMEOUT", 300)
+
+    def get_version(self, restaurant_id):
+        key = self.VERSION_KEY.format(restaurant_id=restaurant_id)
+        version = self.cache.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not self.cache.add(key, version, timeout=None):
+                version = self.cache.get(key) or version
+        return version
+
+    def get(self, restaurant):
+        """Retorna el CompiledSchedule vigente del restaurante (instancia o id)."""
+        restaurant_id = getattr(restaurant, "pk", restaurant)
+        version = self.get_version(restaurant_id)
+
+        local = self._local.get(restaurant_id)
+        if local:
+            schedule, expires_at = local
+            if schedule.version == version and expires_at > time.monotonic():
+                return schedule
+
+        schedule_key = self.SCHEDULE_KEY.format(
+            restaurant_id=restaurant_id, version=version
+        )
+        schedule = self.cache.get(schedule_key)
+        if schedule is None:
+            schedule = CompiledSchedule.compile(restaurant_id, version)
+            self.cache.set(schedule_key, schedule, timeout=self.timeout)
+
+        with self._lock:
+            self._local[restaurant_id] = (schedule, time.monotonic() + self.timeout)
+        return schedule
+
+    def bump(self, restaurant_id):
+        self.cache.set(
+            self.VERSION_KEY.format(restaurant_id=restaurant_id),
+            uuid.uuid4().hex,
+            timeout=None,
+        )
+
+    def invalidate(self, restaurant_id):
+        """
+        Cambia la versión ahora (lecturas en la misma transacción) y otra vez
+        tras el commit, para descartar un horario compilado por otro proceso
+        con los datos anteriores mientras la transacción seguía abierta.
+        """
+        self.bump(restaurant_id)
+        transaction.on_commit(lambda: self.bump(restaurant_id))
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+schedule_cache = ScheduleCache()
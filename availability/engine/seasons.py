@@ -1,19 +1,50 @@
 from availability.models import Season
+from availability.engine.schedule import schedule_cache
+from availability.engine.indexes import season_precedence
+from availability.engine.timing import instrument
 
 
+@instrument("seasons")
 class SeasonEngine:
-    def __init__(self, model=None):
+    def __init__(self, model=None, schedules=None):
         self.model = model or Season
+        self.schedules = schedules or schedule_cache
 
-    def apply_multiplier(self, restaurant, date_obj, base_capacity):
-        season = self.model.objects.filter(
-            restaurant=restaurant,
+    def get_season(self, restaurant, date_obj):
+        return self.schedules.get(restaurant).season_index.lookup(date_obj)
+
+    def get_seasons_by_date(self, restaurant, start_date, end_date):
+        """Temporada vigente de cada día del rango: {fecha: temporada}."""
+        return self.schedules.get(restaurant).season_index.resolve_range(
+            start_date, end_date
+        )
+
+    def get_seasons_for_restaurants(self, restaurant_ids, date_obj):
+        """
+        Temporada vigente en una fecha para varios restaurantes, en una sola
+        consulta y con la misma precedencia que SeasonIndex.
+        Retorna un dict {restaurant_id: temporada}.
+        """
+        covering = {}
+        for season in self.model.objects.filter(
+            restaurant_id__in=restaurant_ids,
+            is_active=True,
             start_date__lte=date_obj,
             end_date__gte=date_obj,
-            is_active=True,
-        ).first()
+        ).order_by():
+            covering.setdefault(season.restaurant_id, []).append(season)
+        return {
+            restaurant_id: min(seasons, key=season_precedence)
+            for restaurant_id, seasons in covering.items()
+        }
 
+    @staticmethod
+    def apply_season(season, base_capacity):
         if season:
             return int(base_capacity * season.capacity_multiplier)
 
         return base_capacity
+
+    def apply_multiplier(self, restaurant, date_obj, base_capacity):
+        season = self.get_season(restaurant, date_obj)
+        return self.apply_season(season, base_capacity)
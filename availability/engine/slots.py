@@ -1,16 +1,60 @@
-from datetime import datetime, timedelta
+from array import array
+from datetime import time
+from functools import lru_cache
 
+from .timing import instrument
+
+# Intervalo entre slots consecutivos si ni la regla ni el restaurante lo fijan
+SLOT_INTERVAL_MINUTES = 15
+
+MINUTES_PER_DAY = 24 * 60
+
+# Una instancia de time por minuto del día, compartida: convertir un minuto
+# de la rejilla en time es una indexación, sin crear objetos
+SLOT_TIMES = tuple(time(minute // 60, minute % 60) for minute in range(MINUTES_PER_DAY))
+
+
+def time_to_minute(time_obj):
+    return time_obj.hour * 60 + time_obj.minute
 
-class SlotGenerator:
-    def generate_slots(self, date_obj, start_time, end_time, interval_minutes=15):
-        slots = []
 
-        # Combinar fecha y hora para operaciones aritméticas
-        current_dt = datetime.combine(date_obj, start_time)
-        end_dt = datetime.combine(date_obj, end_time)
+def minute_to_time(minute):
+    return SLOT_TIMES[minute]
+
+
+@lru_cache(maxsize=1024)
+def slot_grid(start_minute, end_minute, interval_minutes):
+    """
+    Rejilla de slots [start_minute, end_minute) cada interval_minutes, como
+    minutos del día en un array compacto de solo lectura (2 bytes por slot).
+    Memorizada: todas las reglas con el mismo horario comparten la misma.
+    """
+    if interval_minutes < 1:
+        raise ValueError("interval_minutes debe ser mayor que 0")
+    grid = array(
+        "H", range(start_minute, min(end_minute, MINUTES_PER_DAY), interval_minutes)
+    )
+    return memoryview(grid).toreadonly()
+
+
+@instrument("slots")
+class SlotGenerator:
+    """
+    Genera los slots de una franja. La resolución es de un minuto: los
+    segundos de start_time y end_time se ignoran.
+    """
 
-        while current_dt < end_dt:
-            slots.append(current_dt.time())
-            current_dt += timedelta(minutes=interval_minutes)
+    def grid(self, start_time, end_time, interval_minutes=SLOT_INTERVAL_MINUTES):
+        """Minutos del día de cada slot (memoryview de solo lectura, memorizada)."""
+        return slot_grid(
+            time_to_minute(start_time), time_to_minute(end_time), interval_minutes
+        )
 
-        return slots
+    def generate_slots(
+        self, date_obj, start_time, end_time, interval_minutes=SLOT_INTERVAL_MINUTES
+    ):
+        """Slots de la franja como lista de time (compartidos, ver SLOT_TIMES)."""
+        return [
+            SLOT_TIMES[minute]
+            for minute in self.grid(start_time, end_time, interval_minutes)
+        ]
@@ -0,0 +1,82 @@
+import functools
+import time
+from contextvars import ContextVar
+
+# Medición de la petición en curso; None si la petición no se mide
+_current = ContextVar("availability_request_timing", default=None)
+
+
+class RequestTiming:
+    """
+    Tiempos de una petición: consultas SQL (como execute_wrapper) y tiempo
+    por motor. La activa ServerTimingMiddleware con activate()/deactivate().
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.engines = {}
+        self._active = set()
+        self._token = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - started
+
+    def activate(self):
+        self._token = _current.set(self)
+        return self
+
+    def deactivate(self):
+        _current.reset(self._token)
+        self._token = None
+
+    def add(self, engine, seconds):
+        self.engines[engine] = self.engines.get(engine, 0.0) + seconds
+
+
+def get_current_timing():
+    return _current.get()
+
+
+def _timed(engine, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        timing = _current.get()
+        # Sin medición activa, o llamada anidada del mismo motor: directo
+        if timing is None or engine in timing._active:
+            return method(*args, **kwargs)
+
+        timing._active.add(engine)
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timing.add(engine, time.perf_counter() - started)
+            timing._active.discard(engine)
+
+    return wrapper
+
+
+def instrument(engine):
+    """
+    Decorador de clase: mide los métodos públicos definidos en la clase bajo
+    el nombre `engine`. Los staticmethod no se envuelven (son los bucles
+    internos, como match_rule). Sin medición activa el coste es una lectura
+    de ContextVar por llamada.
+    """
+
+    def decorate(cls):
+        for name, attribute in list(vars(cls).items()):
+            if name.startswith("_") or not callable(attribute):
+                continue
+            if isinstance(attribute, (staticmethod, classmethod, type)):
+                continue
+            setattr(cls, name, _timed(engine, attribute))
+        return cls
+
+    return decorate
@@ -0,0 +1,117 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from availability.engine.schedule import schedule_cache
+
+
+class AvailabilityVersions:
+    """
+    Versión de la disponibilidad de un restaurante por fecha, para ETags.
+    La ETag combina la versión del horario compilado (cambia con reglas,
+    temporadas, excepciones y el propio restaurante) y la versión de cada
+    día (cambia con las reservas de esa fecha, ver availability/signals.py).
+
+    Solo las escrituras crean claves de día; leer no añade entradas a la
+    caché (con LocMemCache, miles de claves de día desalojarían los horarios
+    compilados). Un día sin clave usa la versión base del restaurante, que
+    también cambia en cada bump(): si la clave de un día se desaloja, su
+    versión nunca vuelve a un valor ya servido.
+
+    Todas las versiones se leen con un único cache.get_many y caducan a los
+    AVAILABILITY_ETAG_TIMEOUT segundos.
+
+    Una ETag solo es válida si todas las escrituras cambian las versiones que
+    leen todos los procesos: con una caché local (LocMemCache) un worker
+    respondería 304 con datos que otro ya cambió. Por eso, salvo que
+    AVAILABILITY_ETAG_ENABLED lo fuerce, las ETags solo se emiten con una
+    caché compartida (Redis, Memcached, base de datos) y etag() retorna None.
+    """
+
+    # Cachés que no comparten estado entre procesos
+    LOCAL_CACHES = (LocMemCache, DummyCache)
+
+    BASE_KEY = "availability:day:version:{restaurant_id}"
+    DAY_KEY = "availability:day:version:{restaurant_id}:{date}"
+
+    def __init__(self, schedules=None):
+        self.schedules = schedules or schedule_cache
+
+    @property
+    def cache(self):
+        return self.schedules.cache
+
+    @property
+    def timeout(self):
+        return getattr(settings, "AVAILABILITY_ETAG_TIMEOUT", 60)
+
+    @property
+    def enabled(self):
+        enabled = getattr(settings, "AVAILABILITY_ETAG_ENABLED", None)
+        if enabled is None:
+            return not isinstance(self.cache, self.LOCAL_CACHES)
+        return enabled
+
+    def _day_key(self, restaurant_id, date_obj):
+        return self.DAY_KEY.format(
+            restaurant_id=restaurant_id, date=date_obj.isoformat()
+        )
+
+    def etag(self, restaurant_id, dates, variant=()):
+        """
+        ETag (entre comillas) de un restaurante para las fechas dadas.
+        variant: otros parámetros que cambian la respuesta (p. ej. num_people).
+        Retorna None si las ETags están desactivadas (ver enabled).
+        """
+        if not self.enabled:
+            return None
+        schedule_key = self.schedules.VERSION_KEY.format(restaurant_id=restaurant_id)
+        base_key = self.BASE_KEY.format(restaurant_id=restaurant_id)
+        day_keys = [self._day_key(restaurant_id, date_obj) for date_obj in dates]
+        versions = self.cache.get_many([schedule_key, base_key] + day_keys)
+
+        schedule_version = versions.get(schedule_key)
+        if schedule_version is None:
+            schedule_version = self.schedules.get_version(restaurant_id)
+        base_version = versions.get(base_key)
+        if base_version is None:
+            base_version = uuid.uuid4().hex
+            if not self.cache.add(base_key, base_version, timeout=self.timeout):
+                base_version = self.cache.get(base_key) or base_version
+
+        parts = [schedule_version]
+        parts.extend(versions.get(key, base_version) for key in day_keys)
+        parts.extend(str(value) for value in variant)
+        digest = hashlib.md5("|".join(parts).encode(), usedforsecurity=False)
+        return f'"{digest.hexdigest()}"'
+
+    def bump(self, restaurant_id, date_obj):
+        self.bump_many([(restaurant_id, date_obj)])
+
+    def bump_many(self, days):
+        """Cambia las versiones de varios (restaurante, fecha) con un set_many."""
+        versions = {}
+        for restaurant_id, date_obj in days:
+            versions[self._day_key(restaurant_id, date_obj)] = uuid.uuid4().hex
+            versions[self.BASE_KEY.format(restaurant_id=restaurant_id)] = (
+                uuid.uuid4().hex
+            )
+        if versions:
+            self.cache.set_many(versions, timeout=self.timeout)
+
+    def invalidate(self, restaurant_id, date_obj):
+        """Como ScheduleCache.invalidate: ahora y otra vez tras el commit."""
+        self.invalidate_many([(restaurant_id, date_obj)])
+
+    def invalidate_many(self, days):
+        """invalidate() de varios (restaurante, fecha), p. ej. un lote de bulk/."""
+        days = list(days)
+        self.bump_many(days)
+        transaction.on_commit(lambda: self.bump_many(days))
+
+
+availability_versions = AvailabilityVersions()
@@ -0,0 +1,47 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from availability.models import Restaurant
+from availability.engine.capacity import get_capacity_engine
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los contadores de ocupación por slot (backends ledger/redis/memory) "
+        "a partir de las filas de Reservation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='ID del restaurante (por defecto todos)')
+        parser.add_argument('--start', help='Fecha inicial YYYY-MM-DD (por defecto hoy)')
+        parser.add_argument('--days', type=int, default=90, help='Número de días a reconstruir')
+
+    def handle(self, *args, **options):
+        engine = get_capacity_engine()
+        if not hasattr(engine, 'rebuild'):
+            raise CommandError(
+                'AVAILABILITY_CAPACITY_BACKEND no usa contadores: no hay nada que reconstruir'
+            )
+
+        try:
+            start = (
+                datetime.strptime(options['start'], '%Y-%m-%d').date()
+                if options['start'] else date.today()
+            )
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+        end = start + timedelta(days=options['days'] - 1)
+
+        restaurants = Restaurant.objects.all()
+        if options['restaurant']:
+            restaurants = restaurants.filter(id=options['restaurant'])
+
+        count = 0
+        for restaurant in restaurants.iterator():
+            engine.rebuild(restaurant, start, end)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Contadores reconstruidos para {count} restaurante(s) del {start} al {end}'
+        ))
@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from availability.models import Restaurant
+from availability.engine.occupancy import occupancy_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla SlotOccupancy a partir de las filas de Reservation, "
+        "por bloques de días. Con --verify solo informa de las diferencias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='ID del restaurante (por defecto todos)')
+        parser.add_argument('--start', help='Fecha inicial YYYY-MM-DD (por defecto hoy)')
+        parser.add_argument('--days', type=int, default=90, help='Número de días a recalcular')
+        parser.add_argument(
+            '--chunk-days', type=int, default=31,
+            help='Días por bloque; cada bloque se recalcula en su propia transacción'
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='No escribe: compara con Reservation y falla si hay diferencias'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = (
+                datetime.strptime(options['start'], '%Y-%m-%d').date()
+                if options['start'] else date.today()
+            )
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+        if options['days'] < 1 or options['chunk_days'] < 1:
+            raise CommandError('--days y --chunk-days deben ser mayores que 0')
+        end = start + timedelta(days=options['days'] - 1)
+
+        restaurants = Restaurant.objects.all()
+        if options['restaurant']:
+            restaurants = restaurants.filter(id=options['restaurant'])
+
+        count = 0
+        rows = 0
+        drift = 0
+        for restaurant_id in restaurants.values_list('id', flat=True).iterator():
+            for chunk_start, chunk_end in self._chunks(start, end, options['chunk_days']):
+                if options['verify']:
+                    for date_obj, slot_time, expected, stored in occupancy_table.drift(
+                        restaurant_id, chunk_start, chunk_end
+                    ):
+                        drift += 1
+                        self.stdout.write(
+                            f'Restaurante {restaurant_id} {date_obj} {slot_time}: '
+                            f'esperado {expected[0]} personas / {expected[1]} reservas, '
+                            f'guardado {stored[0]} / {stored[1]}'
+                        )
+                else:
+                    rows += occupancy_table.rebuild(restaurant_id, chunk_start, chunk_end)
+            count += 1
+
+        if options['verify']:
+            if drift:
+                raise CommandError(
+                    f'{drift} slot(s) con diferencias del {start} al {end}; '
+                    'ejecute rebuild_occupancy sin --verify para corregirlos'
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f'Ocupación correcta para {count} restaurante(s) del {start} al {end}'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Ocupación recalculada para {count} restaurante(s) del {start} al {end} '
+            f'({rows} slot(s) con reservas)'
+        ))
+
+    @staticmethod
+    def _chunks(start, end, chunk_days):
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+            yield chunk_start, chunk_end
+            chunk_start = chunk_end + timedelta(days=1)
@@ -0,0 +1,71 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .engine.timing import RequestTiming
+
+logger = logging.getLogger('availability.timing')
+
+# Orden de las métricas en la cabecera Server-Timing
+ENGINES = ('exceptions', 'rules', 'seasons', 'capacity', 'slots')
+
+
+class ServerTimingMiddleware:
+    """
+    Mide consultas SQL, tiempo de SQL y tiempo por motor de cada petición
+    muestreada y lo devuelve en la cabecera Server-Timing y en una línea de
+    log JSON (logger 'availability.timing').
+
+    Opt-in con AVAILABILITY_TIMING_ENABLED. Desactivado, Django descarta el
+    middleware al arrancar (MiddlewareNotUsed) y no añade coste por petición.
+    AVAILABILITY_TIMING_SAMPLE_RATE (0-1) fija la fracción de peticiones medidas.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'AVAILABILITY_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'AVAILABILITY_TIMING_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timing = RequestTiming().activate()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timing):
+                response = self.get_response(request)
+        finally:
+            timing.deactivate()
+        total = time.perf_counter() - started
+
+        response['Server-Timing'] = self.server_timing(timing, total)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': _ms(total),
+            'db_ms': _ms(timing.sql_seconds),
+            'queries': timing.queries,
+            'engines': {name: _ms(seconds) for name, seconds in timing.engines.items()},
+        }))
+        return response
+
+    @staticmethod
+    def server_timing(timing, total):
+        metrics = [f'db;dur={_ms(timing.sql_seconds)};desc="{timing.queries} queries"']
+        for name in ENGINES:
+            if name in timing.engines:
+                metrics.append(f'{name};dur={_ms(timing.engines[name])}')
+        metrics.append(f'total;dur={_ms(total)}')
+        return ', '.join(metrics)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('availability', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='season',
+            name='priority',
+            field=models.IntegerField(default=0, help_text='Si varias temporadas se solapan gana la de mayor prioridad; a igual prioridad, la de rango más corto.', verbose_name='Prioridad'),
+        ),
+    ]
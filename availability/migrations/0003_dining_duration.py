@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:01
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0002_season_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="availabilityrule",
+            name="dining_duration",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Sobrescribe la duración del restaurante para esta franja.",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name="Duración de la estancia (minutos)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="dining_duration",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Tiempo que una reserva ocupa la mesa. Vacío: solo ocupa su slot.",
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name="Duración de la estancia (minutos)",
+            ),
+        ),
+    ]
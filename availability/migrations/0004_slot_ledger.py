@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0003_dining_duration"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotLedger",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Fecha")),
+                ("slot_time", models.TimeField(verbose_name="Hora del slot")),
+                (
+                    "booked",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Personas reservadas"
+                    ),
+                ),
+                (
+                    "restaurant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slot_ledger",
+                        to="availability.restaurant",
+                        verbose_name="Restaurante",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ocupación de slot",
+                "verbose_name_plural": "Ocupación de slots",
+                "ordering": ["date", "slot_time"],
+                "unique_together": {("restaurant", "date", "slot_time")},
+            },
+        ),
+    ]
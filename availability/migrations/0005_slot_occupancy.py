@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_slot_occupancy(apps, schema_editor):
+    """Inicializa SlotOccupancy con las reservas activas existentes."""
+    Reservation = apps.get_model("reservations", "Reservation")
+    SlotOccupancy = apps.get_model("availability", "SlotOccupancy")
+    rows = (
+        Reservation.objects.filter(status__in=["confirmed", "pending"])
+        .values("restaurant_id", "reservation_date", "reservation_time")
+        .annotate(covers=Sum("num_people"), count=Count("id"))
+        .order_by()
+    )
+    SlotOccupancy.objects.bulk_create(
+        (
+            SlotOccupancy(
+                restaurant_id=row["restaurant_id"],
+                date=row["reservation_date"],
+                slot_time=row["reservation_time"],
+                covers=row["covers"],
+                reservation_count=row["count"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0004_slot_ledger"),
+        ("reservations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="Fecha")),
+                ("slot_time", models.TimeField(verbose_name="Hora del slot")),
+                (
+                    "covers",
+                    models.PositiveIntegerField(default=0, verbose_name="Personas"),
+                ),
+                (
+                    "reservation_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Número de reservas"
+                    ),
+                ),
+                (
+                    "restaurant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="slot_occupancy",
+                        to="availability.restaurant",
+                        verbose_name="Restaurante",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ocupación diaria por slot",
+                "verbose_name_plural": "Ocupación diaria por slot",
+                "ordering": ["date", "slot_time"],
+                "unique_together": {("restaurant", "date", "slot_time")},
+            },
+        ),
+        migrations.RunPython(fill_slot_occupancy, migrations.RunPython.noop),
+    ]
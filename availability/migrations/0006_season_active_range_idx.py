@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0005_slot_occupancy"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="season",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["restaurant", "start_date", "end_date"],
+                name="season_active_range_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:27
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0006_season_active_range_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="availabilityrule",
+            name="slot_interval",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Sobrescribe el intervalo del restaurante para esta franja.",
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(240),
+                ],
+                verbose_name="Intervalo entre slots (minutos)",
+            ),
+        ),
+        migrations.AddField(
+            model_name="restaurant",
+            name="slot_interval",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Vacío: 15 minutos.",
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(1),
+                    django.core.validators.MaxValueValidator(240),
+                ],
+                verbose_name="Intervalo entre slots (minutos)",
+            ),
+        ),
+    ]
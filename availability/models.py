@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from datetime import time
@@ -28,6 +29,20 @@ class Restaurant(models.Model):
         validators=[MinValueValidator(1)],
         verbose_name=_('Capacidad por defecto')
     )
+    dining_duration = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        verbose_name=_('Duración de la estancia (minutos)'),
+        help_text=_('Tiempo que una reserva ocupa la mesa. Vacío: solo ocupa su slot.')
+    )
+    slot_interval = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(240)],
+        verbose_name=_('Intervalo entre slots (minutos)'),
+        help_text=_('Vacío: 15 minutos.')
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -62,6 +77,20 @@ class AvailabilityRule(models.Model):
         default=True,
         verbose_name=_('Disponible')
     )
+    dining_duration = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        verbose_name=_('Duración de la estancia (minutos)'),
+        help_text=_('Sobrescribe la duración del restaurante para esta franja.')
+    )
+    slot_interval = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(240)],
+        verbose_name=_('Intervalo entre slots (minutos)'),
+        help_text=_('Sobrescribe el intervalo del restaurante para esta franja.')
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -74,6 +103,43 @@ class AvailabilityRule(models.Model):
     def __str__(self):
         return f"{self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
 
+    @classmethod
+    def find_overlapping(cls, restaurant, day_of_week, start_time, end_time, exclude_pk=None):
+        """Primera regla disponible del mismo día que se solapa con el rango, o None."""
+        overlapping = cls.objects.filter(
+            restaurant=restaurant,
+            day_of_week=day_of_week,
+            is_available=True,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        )
+        if exclude_pk is not None:
+            overlapping = overlapping.exclude(pk=exclude_pk)
+        return overlapping.order_by('start_time').first()
+
+    def clean(self):
+        """
+        Las reglas disponibles de un día no se pueden solapar: el motor busca la
+        regla de cada hora por bisect y marca como inválido un día solapado.
+        """
+        if self.start_time is None or self.end_time is None:
+            return
+        if self.start_time >= self.end_time:
+            raise ValidationError(
+                {'end_time': _('La hora de fin debe ser posterior a la de inicio')}
+            )
+        if not self.is_available or self.restaurant_id is None:
+            return
+        rule = self.find_overlapping(
+            self.restaurant_id, self.day_of_week, self.start_time, self.end_time,
+            exclude_pk=self.pk,
+        )
+        if rule:
+            raise ValidationError(
+                _('Se solapa con la regla %(start)s-%(end)s del mismo día'),
+                params={'start': rule.start_time, 'end': rule.end_time},
+            )
+
 
 class Season(models.Model):
     """Temporada con rango de fechas"""
@@ -92,6 +158,12 @@ class Season(models.Model):
         verbose_name=_('Multiplicador de capacidad')
     )
     is_active = models.BooleanField(default=True, verbose_name=_('Activa'))
+    priority = models.IntegerField(
+        default=0,
+        verbose_name=_('Prioridad'),
+        help_text=_('Si varias temporadas se solapan gana la de mayor prioridad; '
+                    'a igual prioridad, la de rango más corto.')
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -99,6 +171,14 @@ class Season(models.Model):
         verbose_name = _('Temporada')
         verbose_name_plural = _('Temporadas')
         ordering = ['start_date']
+        indexes = [
+            # Temporadas activas que cubren una fecha (start_date <= d <= end_date)
+            models.Index(
+                fields=['restaurant', 'start_date', 'end_date'],
+                condition=models.Q(is_active=True),
+                name='season_active_range_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.start_date} - {self.end_date})"
@@ -135,3 +215,60 @@ class ExceptionDate(models.Model):
 
     def __str__(self):
         return f"{self.date} - {self.reason}"
+
+
+class SlotLedger(models.Model):
+    """
+    Personas reservadas por (restaurante, fecha, slot), usado por el backend
+    de capacidad 'ledger'. Cada reserva es un UPDATE condicional sobre la fila
+    de su slot, así reservas de slots distintos no se bloquean entre sí.
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='slot_ledger',
+        verbose_name=_('Restaurante')
+    )
+    date = models.DateField(verbose_name=_('Fecha'))
+    slot_time = models.TimeField(verbose_name=_('Hora del slot'))
+    booked = models.PositiveIntegerField(default=0, verbose_name=_('Personas reservadas'))
+
+    class Meta:
+        verbose_name = _('Ocupación de slot')
+        verbose_name_plural = _('Ocupación de slots')
+        unique_together = [['restaurant', 'date', 'slot_time']]
+        ordering = ['date', 'slot_time']
+
+    def __str__(self):
+        return f"{self.restaurant_id} {self.date} {self.slot_time}: {self.booked}"
+
+
+class SlotOccupancy(models.Model):
+    """
+    Resumen de reservas activas (pendientes y confirmadas) por
+    (restaurante, fecha, hora de inicio). Se mantiene en la misma transacción
+    que cada cambio de Reservation (ver availability/signals.py) y es lo que
+    lee CapacityEngine en lugar de agregar las filas de Reservation.
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='slot_occupancy',
+        verbose_name=_('Restaurante')
+    )
+    date = models.DateField(verbose_name=_('Fecha'))
+    slot_time = models.TimeField(verbose_name=_('Hora del slot'))
+    covers = models.PositiveIntegerField(default=0, verbose_name=_('Personas'))
+    reservation_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Número de reservas')
+    )
+
+    class Meta:
+        verbose_name = _('Ocupación diaria por slot')
+        verbose_name_plural = _('Ocupación diaria por slot')
+        unique_together = [['restaurant', 'date', 'slot_time']]
+        ordering = ['date', 'slot_time']
+
+    def __str__(self):
+        return f"{self.restaurant_id} {self.date} {self.slot_time}: {self.covers}"
@@ -0,0 +1,58 @@
+from django.db import connections, DEFAULT_DB_ALIAS
+
+
+class QueryCounter:
+    """
+    Cuenta las consultas SQL ejecutadas dentro de un bloque `with`.
+    Se engancha con execute_wrapper, por lo que funciona también con DEBUG=False.
+
+        with QueryCounter() as counter:
+            service.get_availability_by_date(restaurant, date)
+        counter.count
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+        self.count = 0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        self._wrapper = None
+
+
+def connection_stats(using=DEFAULT_DB_ALIAS):
+    """
+    Cómo reutiliza este proceso las conexiones de un alias (ver
+    config/database.py): mode es 'pool', 'persistent' o 'per_request'.
+    Con el pool de psycopg 3 añade ConnectionPool.get_stats() (pool_size,
+    pool_available, requests_waiting, connections_num...): los contadores son
+    del proceso que responde, no de todo el despliegue.
+    """
+    connection = connections[using]
+    settings_dict = connection.settings_dict
+    stats = {
+        'alias': using,
+        'vendor': connection.vendor,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE', 0),
+        'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['mode'] = 'pool'
+        stats['pool'] = pool.get_stats()
+    elif stats['conn_max_age'] != 0:
+        stats['mode'] = 'persistent'
+    else:
+        stats['mode'] = 'per_request'
+    return stats
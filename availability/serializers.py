@@ -1,14 +1,26 @@
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
 from .models import Restaurant, AvailabilityRule, Season, ExceptionDate
 
 
+class InvalidScheduleError(APIException):
+    """
+    El día pedido tiene reglas disponibles solapadas ya guardadas
+    (OverlappingRulesError): no se puede calcular su disponibilidad hasta
+    corregirlas. Los demás días y restaurantes responden con normalidad.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'El horario de este día tiene reglas solapadas.'
+    default_code = 'invalid_schedule'
+
+
 class RestaurantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Restaurant
         fields = [
             'id', 'name', 'description', 'email', 'phone',
             'address', 'city', 'country', 'default_capacity',
-            'created_at', 'updated_at'
+            'dining_duration', 'slot_interval', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
@@ -24,17 +36,44 @@ class AvailabilityRuleSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'restaurant', 'day_of_week', 'day_of_week_display',
             'start_time', 'end_time', 'capacity', 'is_available',
-            'created_at', 'updated_at'
+            'dining_duration', 'slot_interval', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+    def validate(self, data):
+        """
+        Las reglas disponibles de un día no se pueden solapar: el motor busca la
+        regla de cada hora por bisect y marca como inválido un día solapado
+        (ver AvailabilityRule.clean, que aplica lo mismo en el admin).
+        """
+        def value(field):
+            return data.get(field, getattr(self.instance, field, None))
+
+        start_time, end_time = value('start_time'), value('end_time')
+        if start_time is not None and end_time is not None and start_time >= end_time:
+            raise serializers.ValidationError(
+                {'end_time': 'La hora de fin debe ser posterior a la de inicio'}
+            )
+
+        is_available = value('is_available')
+        if is_available is None or is_available:
+            rule = AvailabilityRule.find_overlapping(
+                value('restaurant'), value('day_of_week'), start_time, end_time,
+                exclude_pk=getattr(self.instance, 'pk', None),
+            )
+            if rule:
+                raise serializers.ValidationError(
+                    f'Se solapa con la regla {rule.start_time}-{rule.end_time} del mismo día'
+                )
+        return data
+
 
 class SeasonSerializer(serializers.ModelSerializer):
     class Meta:
         model = Season
         fields = [
             'id', 'restaurant', 'name', 'start_date', 'end_date',
-            'capacity_multiplier', 'is_active', 'created_at', 'updated_at'
+            'capacity_multiplier', 'is_active', 'priority', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
 
@@ -1,11 +1,46 @@
+import logging
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import timedelta
+from functools import partial
+
+from asgiref.sync import sync_to_async
+
 from .models import AvailabilityRule, Season, ExceptionDate
 from reservations.models import Reservation
 
 from .engine.exceptions import ExceptionEngine
+from .engine.indexes import OverlappingRulesError
 from .engine.rules import RuleEngine
 from .engine.seasons import SeasonEngine
-from .engine.capacity import CapacityEngine
-from .engine.slots import SlotGenerator
+from .engine.capacity import (
+    DiningDurations,
+    get_capacity_engine,
+    sweep_occupancy,
+    time_to_seconds,
+)
+from .engine.slots import (
+    MINUTES_PER_DAY,
+    SLOT_INTERVAL_MINUTES,
+    SLOT_TIMES,
+    SlotGenerator,
+    time_to_minute,
+)
+
+# Tamaño de grupo usado para listar los slots libres de un día
+DEFAULT_PARTY_SIZE = 2
+
+# Días por lote de ocupación en next_available_slots: empieza en 1 (lo normal
+# es encontrar sitio el primer día) y se duplica hasta este máximo
+MAX_DAY_BATCH = 16
+
+# Estado de un slot del día:
+# - capacity / occupancy: capacidad y personas sentadas en esa hora
+# - remaining: plazas libres durante toda la estancia que empieza en esa hora
+DaySlot = namedtuple("DaySlot", ["time", "capacity", "occupancy", "remaining"])
+
+
+logger = logging.getLogger(__name__)
 
 
 class AvailabilityService:
@@ -25,6 +60,7 @@ class AvailabilityService:
         rule_model=None,
         season_model=None,
         exception_model=None,
+        capacity_engine=None,
     ):
         # Inyección de dependencias (útil para testing)
         self.reservation_model = reservation_model or Reservation
@@ -36,10 +72,14 @@ class AvailabilityService:
         self.exception_engine = ExceptionEngine(self.exception_model)
         self.rule_engine = RuleEngine(self.rule_model)
         self.season_engine = SeasonEngine(self.season_model)
-        self.capacity_engine = CapacityEngine(self.reservation_model)
+        self.capacity_engine = capacity_engine or get_capacity_engine(
+            self.reservation_model
+        )
         self.slot_generator = SlotGenerator()
 
-    def get_availability_by_date(self, restaurant, date_obj):
+    def get_availability_by_date(
+        self, restaurant, date_obj, num_people=DEFAULT_PARTY_SIZE
+    ):
         """
         Devuelve una lista de slots disponibles para una fecha dada.
         Flujo:
@@ -48,28 +88,515 @@ class AvailabilityService:
         3. Generación de slots
         4. Validación de capacidad por slot
         """
+        return [
+            slot.time
+            for slot in self.get_day_slots(restaurant, date_obj)
+            if slot.remaining >= num_people
+        ]
+
+    def get_day_availability(self, restaurant, date_obj, num_people=None):
+        """
+        Disponibilidad de un día para cualquier tamaño de grupo, en una pasada.
+        Retorna {"availability": [time], "slots": [...]} (ver _summarize_slots).
+        """
+        return self._summarize_slots(
+            self.get_day_slots(restaurant, date_obj), num_people
+        )
+
+    async def aget_day_availability(self, restaurant, date_obj, num_people=None):
+        """Versión async de get_day_availability."""
+        return self._summarize_slots(
+            await self.aget_day_slots(restaurant, date_obj), num_people
+        )
+
+    @staticmethod
+    def _summarize_slots(day_slots, num_people=None):
+        """
+        - availability: horas con sitio para num_people (por defecto
+          DEFAULT_PARTY_SIZE), como get_availability_by_date
+        - slots: por hora, plazas libres en ese momento (remaining) y mayor
+          grupo que cabe durante toda la estancia (max_party_size); con
+          num_people solo los slots donde cabe ese grupo
+        """
+        party_size = num_people or DEFAULT_PARTY_SIZE
+        return {
+            "availability": [
+                slot.time for slot in day_slots if slot.remaining >= party_size
+            ],
+            "slots": [
+                {
+                    "time": slot.time,
+                    "remaining": max(slot.capacity - slot.occupancy, 0),
+                    "max_party_size": max(slot.remaining, 0),
+                }
+                for slot in day_slots
+                if num_people is None or slot.remaining >= num_people
+            ],
+        }
+
+    def get_day_slots(self, restaurant, date_obj):
+        """
+        Calcula en una sola pasada la capacidad de todos los slots del día.
+        Carga excepción, reglas, temporada y ocupación con un número constante
+        de consultas y decide cada slot en memoria, con el mismo resultado que
+        llamar a check_availability slot por slot.
+        Retorna una lista de DaySlot.
+        """
+        day = self._load_day(restaurant, date_obj)
+        if day is None:
+            return []
+
+        # 4. Reservas del día por hora de inicio (una consulta agrupada)
+        starts = self.capacity_engine.get_occupancy_by_time(restaurant, date_obj)
+        return self._evaluate_day(date_obj, *day, starts=starts)
+
+    async def aget_day_slots(self, restaurant, date_obj):
+        """
+        Versión async de get_day_slots: se ejecuta entera con un solo
+        sync_to_async. Las consultas no se solapan entre sí (sync_to_async con
+        thread_sensitive las lleva todas al mismo hilo, el de la conexión de la
+        petición), pero el event loop queda libre para otras peticiones
+        mientras esperan a la base de datos.
+        """
+        return await sync_to_async(self.get_day_slots)(restaurant, date_obj)
+
+    async def aget_availability_by_date(
+        self, restaurant, date_obj, num_people=DEFAULT_PARTY_SIZE
+    ):
+        """Versión async de get_availability_by_date."""
+        return [
+            slot.time
+            for slot in await self.aget_day_slots(restaurant, date_obj)
+            if slot.remaining >= num_people
+        ]
+
+    def _load_day(self, restaurant, date_obj):
+        """
+        Excepción, reglas, temporada y duraciones de un día, o None si el
+        restaurante no abre. Sale del horario compilado (sin consultas en caliente).
+        Lanza OverlappingRulesError si las reglas del día se solapan.
+        """
         # 1. Excepción de cierre total
         exception = self.exception_engine.get_exception(restaurant, date_obj)
         if exception and exception.is_closed:
-            return []
+            return None
 
-        # 2. Regla base del día
-        rule = self.rule_engine.get_rule(restaurant, date_obj)
-        if not rule or not rule.is_available:
+        # 2. Reglas del día (la primera define el rango de slots)
+        rules = self.rule_engine.get_rules_for_day(restaurant, date_obj)
+        if not rules:
+            return None
+        rules.check()
+
+        # 3. Temporada (solo si la excepción no fija la capacidad)
+        season = None
+        if not exception or exception.capacity is None:
+            season = self.season_engine.get_season(restaurant, date_obj)
+
+        durations = self.rule_engine.get_dining_durations(restaurant, date_obj)
+        return exception, rules, season, durations
+
+    def get_availability_by_range(
+        self, restaurant, start_date, end_date, num_people=DEFAULT_PARTY_SIZE
+    ):
+        """
+        Calendario de disponibilidad para un rango de fechas (inclusive).
+        Carga excepciones, reglas, temporadas y ocupación de todo el rango
+        con un número fijo de consultas, independiente del número de días.
+        Retorna una lista con un dict por día:
+        {"date", "is_open", "availability", "max_party_size"}
+        """
+        schedule = self._load_range(restaurant, start_date, end_date)
+        occupancy = self.capacity_engine.get_occupancy_in_range(
+            restaurant, start_date, end_date
+        )
+        return self._evaluate_range(
+            start_date, end_date, num_people, occupancy, *schedule
+        )
+
+    async def aget_availability_by_range(
+        self, restaurant, start_date, end_date, num_people=DEFAULT_PARTY_SIZE
+    ):
+        """Versión async de get_availability_by_range (ver aget_day_slots)."""
+        return await sync_to_async(self.get_availability_by_range)(
+            restaurant, start_date, end_date, num_people
+        )
+
+    def _load_range(self, restaurant, start_date, end_date):
+        """Excepciones, reglas, temporadas y duraciones (por día de la semana) del rango."""
+        exceptions = self.exception_engine.get_exceptions_in_range(
+            restaurant, start_date, end_date
+        )
+        rules_by_weekday = self.rule_engine.get_rules_by_weekday(restaurant)
+        seasons_by_date = self.season_engine.get_seasons_by_date(
+            restaurant, start_date, end_date
+        )
+        durations_by_weekday = {}
+        date_obj = start_date
+        while date_obj <= end_date and len(durations_by_weekday) < 7:
+            durations_by_weekday[date_obj.weekday()] = (
+                self.rule_engine.get_dining_durations(restaurant, date_obj)
+            )
+            date_obj += timedelta(days=1)
+        return exceptions, rules_by_weekday, seasons_by_date, durations_by_weekday
+
+    def _evaluate_range(
+        self,
+        start_date,
+        end_date,
+        num_people,
+        occupancy,
+        exceptions,
+        rules_by_weekday,
+        seasons_by_date,
+        durations_by_weekday,
+    ):
+        days = []
+        date_obj = start_date
+        while date_obj <= end_date:
+            exception = exceptions.get(date_obj)
+            rules = rules_by_weekday.get(date_obj.weekday())
+
+            day_slots = []
+            if rules and rules.error:
+                # Día inválido (reglas solapadas): sin slots, el resto del
+                # rango se calcula igual
+                logger.warning("range: %s sin slots: %s", date_obj, rules.error)
+            elif rules and not (exception and exception.is_closed):
+                day_slots = self._evaluate_day(
+                    date_obj,
+                    exception,
+                    rules,
+                    seasons_by_date.get(date_obj),
+                    durations_by_weekday[date_obj.weekday()],
+                    starts=occupancy.get(date_obj, {}),
+                )
+
+            days.append(self._summarize_day(date_obj, day_slots, num_people))
+            date_obj += timedelta(days=1)
+
+        return days
+
+    def next_available_slots(
+        self, restaurant, start_date, start_time, num_people, limit, max_days
+    ):
+        """
+        Los primeros `limit` slots con sitio para num_people a partir de
+        start_date/start_time, recorriendo como mucho max_days días.
+        Retorna una lista [(fecha, DaySlot)] en orden cronológico.
+        """
+        found = []
+        for date_obj, day_slots in self._iter_day_slots(restaurant, start_date, max_days):
+            for slot in day_slots:
+                if date_obj == start_date and slot.time < start_time:
+                    continue
+                if slot.remaining >= num_people:
+                    found.append((date_obj, slot))
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def _iter_day_slots(self, restaurant, start_date, max_days):
+        """
+        Genera (fecha, [DaySlot]) de los días abiertos a partir de start_date.
+        Cierres, días sin reglas y días con reglas solapadas se descartan con
+        el horario compilado, sin consultas; la ocupación se carga por lotes de
+        días abiertos que crecen 1, 2, 4... hasta MAX_DAY_BATCH. Al dejar de
+        consumir el generador no se lanza ninguna consulta más.
+        """
+        end_date = start_date + timedelta(days=max_days - 1)
+        date_obj = start_date
+        batch = 1
+        while date_obj <= end_date:
+            open_days = []
+            while date_obj <= end_date and len(open_days) < batch:
+                try:
+                    day = self._load_day(restaurant, date_obj)
+                except OverlappingRulesError as exc:
+                    # Día inválido: se salta como si estuviera cerrado
+                    logger.warning("next_available: %s omitido: %s", date_obj, exc)
+                    day = None
+                if day is not None:
+                    open_days.append((date_obj, day))
+                date_obj += timedelta(days=1)
+            if not open_days:
+                return
+
+            occupancy = self.capacity_engine.get_occupancy_in_range(
+                restaurant, open_days[0][0], open_days[-1][0]
+            )
+            for day_date, day in open_days:
+                yield day_date, self._evaluate_day(
+                    day_date, *day, starts=occupancy.get(day_date, {})
+                )
+            batch = min(batch * 2, MAX_DAY_BATCH)
+
+    def search_availability(
+        self,
+        restaurants,
+        date_obj,
+        time_from,
+        time_to,
+        num_people=DEFAULT_PARTY_SIZE,
+        preferred_time=None,
+    ):
+        """
+        Restaurantes con sitio para num_people en algún slot entre time_from y
+        time_to (inclusive). Reglas, temporadas, excepciones y ocupación de
+        todos los restaurantes se cargan con una consulta por tabla, así que el
+        número de consultas no crece con el catálogo.
+        Retorna una lista de dicts {"restaurant", "slots", "best_slot"}
+        ordenada por cercanía del mejor slot a preferred_time (por defecto
+        time_from), después por plazas libres y por nombre.
+        """
+        restaurants = list(restaurants)
+        restaurant_ids = [restaurant.pk for restaurant in restaurants]
+        if not restaurant_ids:
             return []
 
-        # 3. Generar slots del día
-        time_slots = self.slot_generator.generate_slots(
-            date_obj, rule.start_time, rule.end_time
+        schedules = self._load_restaurants(restaurant_ids, date_obj)
+        occupancy = self.capacity_engine.get_occupancy_for_restaurants(
+            restaurant_ids, date_obj
+        )
+        return self._rank_restaurants(
+            restaurants,
+            date_obj,
+            time_from,
+            time_to,
+            num_people,
+            preferred_time,
+            occupancy,
+            *schedules,
+        )
+
+    async def asearch_availability(
+        self,
+        restaurants,
+        date_obj,
+        time_from,
+        time_to,
+        num_people=DEFAULT_PARTY_SIZE,
+        preferred_time=None,
+    ):
+        """
+        Versión async de search_availability (ver aget_day_slots). restaurants
+        puede ser un queryset: se evalúa en el mismo hilo que el resto.
+        """
+        return await sync_to_async(self.search_availability)(
+            restaurants, date_obj, time_from, time_to, num_people, preferred_time
+        )
+
+    def _load_restaurants(self, restaurant_ids, date_obj):
+        """Excepciones, reglas y temporadas de varios restaurantes en una fecha."""
+        return (
+            self.exception_engine.get_exceptions_for_restaurants(
+                restaurant_ids, date_obj
+            ),
+            self.rule_engine.get_rules_for_restaurants(restaurant_ids, date_obj),
+            self.season_engine.get_seasons_for_restaurants(restaurant_ids, date_obj),
+        )
+
+    def _rank_restaurants(
+        self,
+        restaurants,
+        date_obj,
+        time_from,
+        time_to,
+        num_people,
+        preferred_time,
+        occupancy,
+        exceptions,
+        rules_by_restaurant,
+        seasons,
+    ):
+        target = time_to_seconds(preferred_time or time_from)
+
+        def distance(slot):
+            return (abs(time_to_seconds(slot.time) - target), -slot.remaining)
+
+        results = []
+        for restaurant in restaurants:
+            exception = exceptions.get(restaurant.pk)
+            rules = rules_by_restaurant.get(restaurant.pk)
+            if not rules or (exception and exception.is_closed):
+                continue
+            if rules.error:
+                # Reglas solapadas guardadas: se omite el restaurante sin
+                # romper la búsqueda del resto de la ciudad
+                logger.warning("search: restaurante %s omitido: %s", restaurant.pk, rules.error)
+                continue
+
+            season = None
+            if not exception or exception.capacity is None:
+                season = seasons.get(restaurant.pk)
+
+            slots = [
+                slot
+                for slot in self._evaluate_day(
+                    date_obj,
+                    exception,
+                    rules,
+                    season,
+                    DiningDurations(rules, restaurant.dining_duration),
+                    starts=occupancy.get(restaurant.pk, {}),
+                    # Reglas leídas de la base de datos: sin el intervalo
+                    # del restaurante ya aplicado como en el horario compilado
+                    interval=restaurant.slot_interval,
+                )
+                if time_from <= slot.time <= time_to and slot.remaining >= num_people
+            ]
+            if slots:
+                results.append(
+                    {
+                        "restaurant": restaurant,
+                        "slots": slots,
+                        "best_slot": min(slots, key=distance),
+                    }
+                )
+
+        results.sort(
+            key=lambda result: (
+                distance(result["best_slot"]),
+                result["restaurant"].name,
+                result["restaurant"].pk,
+            )
+        )
+        return results
+
+    @staticmethod
+    def _summarize_day(date_obj, day_slots, num_people):
+        """Resumen de un día: slots libres para el grupo y mayor grupo reservable."""
+        return {
+            "date": date_obj,
+            "is_open": bool(day_slots),
+            "availability": [
+                slot.time for slot in day_slots if slot.remaining >= num_people
+            ],
+            "max_party_size": max([slot.remaining for slot in day_slots] + [0]),
+        }
+
+    def _evaluate_day(
+        self, date_obj, exception, rules, season, durations, starts, interval=None
+    ):
+        """
+        Decide en memoria la capacidad de cada slot con los datos ya cargados.
+        La ocupación de todas las horas implicadas sale de un único barrido
+        sobre las reservas del día (sweep_occupancy).
+        Los slots son la unión de las rejillas memorizadas de todas las reglas
+        del día (p. ej. comida y cena), cada una con su intervalo, en minutos
+        del día que se convierten en time con SLOT_TIMES, sin crear objetos.
+        interval es el del restaurante si las reglas no lo traen aplicado.
+        """
+        window_interval = self._slot_interval(rules, interval)
+
+        def capacity_at(time_obj):
+            return self._slot_capacity(exception, rules, season, time_obj)
+
+        windows = []
+        points = set()
+        for minute in self._day_grid(rules, interval):
+            time_slot = SLOT_TIMES[minute]
+            max_capacity = capacity_at(time_slot)
+            if max_capacity is None:
+                continue
+            window = self._build_window(
+                time_slot, max_capacity, durations, capacity_at, window_interval
+            )
+            windows.append((time_slot, max_capacity, window))
+            points.update(point for point, _ in window)
+
+        occupancy = sweep_occupancy(starts, points, durations)
+
+        return [
+            DaySlot(
+                time_slot,
+                max_capacity,
+                occupancy[time_slot],
+                min(capacity - occupancy[point] for point, capacity in window),
+            )
+            for time_slot, max_capacity, window in windows
+        ]
+
+    def _day_grid(self, rules, default_interval=None):
+        """
+        Minutos de los slots de todas las reglas del día, en orden. Las reglas
+        no se solapan (DayRules), así que las rejillas tampoco.
+        """
+        grid = []
+        for rule in rules:
+            grid.extend(
+                self.slot_generator.grid(
+                    rule.start_time,
+                    rule.end_time,
+                    rule.slot_interval or default_interval or SLOT_INTERVAL_MINUTES,
+                )
+            )
+        return grid
+
+    def _slot_capacity(self, exception, rules, season, time_obj):
+        """Capacidad de una hora con los datos del día ya cargados (o None)."""
+        if exception and exception.capacity is not None:
+            return exception.capacity
+
+        rule = self.rule_engine.match_rule(rules, time_obj)
+        if not rule:
+            return None
+        return self.season_engine.apply_season(season, rule.capacity)
+
+    @staticmethod
+    def _slot_interval(rules, default=None):
+        """
+        Minutos entre los puntos de la ventana de una estancia: los de la
+        primera regla, los del restaurante (default) o SLOT_INTERVAL_MINUTES.
+        """
+        return (
+            (rules[0].slot_interval if rules else None)
+            or default
+            or SLOT_INTERVAL_MINUTES
         )
 
-        # 4. Validar capacidad por slot (por defecto 2 personas)
-        available_slots = []
-        for time_slot in time_slots:
-            if self.check_availability(restaurant, date_obj, time_slot, num_people=2):
-                available_slots.append(time_slot)
+    @staticmethod
+    def _build_window(
+        time_obj, max_capacity, durations, capacity_at, interval=SLOT_INTERVAL_MINUTES
+    ):
+        """
+        Horas [(time, capacidad)] que ocupará una reserva que empieza en time_obj:
+        la propia y, si hay duración de estancia, los slots siguientes de la
+        rejilla (cada `interval` minutos) hasta cubrirla. Se omiten las horas
+        sin servicio (p. ej. tras el cierre).
+        """
+        window = [(time_obj, max_capacity)]
+        duration = durations.for_time(time_obj) if durations else None
+        if not duration:
+            return window
+
+        start = time_to_minute(time_obj)
+        point = start + interval
+        while point < start + duration and point < MINUTES_PER_DAY:
+            point_time = SLOT_TIMES[point]
+            capacity = capacity_at(point_time)
+            if capacity is not None:
+                window.append((point_time, capacity))
+            point += interval
+        return window
+
+    def _get_window(self, restaurant, date, time_obj, max_capacity):
+        """Ventana de ocupación y duraciones para una reserva puntual."""
+        durations = self.rule_engine.get_dining_durations(restaurant, date)
+        if not durations.configured:
+            return None, durations
 
-        return available_slots
+        # Todo sale del horario compilado: sin consultas adicionales
+        exception = self.exception_engine.get_exception(restaurant, date)
+        rules = self.rule_engine.get_rules_for_day(restaurant, date)
+        season = self.season_engine.get_season(restaurant, date)
+        window = self._build_window(
+            time_obj,
+            max_capacity,
+            durations,
+            partial(self._slot_capacity, exception, rules, season),
+            self._slot_interval(rules),
+        )
+        return window, durations
 
     def check_availability(self, restaurant, date, time, num_people, use_lock=False):
         """
@@ -78,7 +605,255 @@ class AvailabilityService:
         1. Excepciones
         2. Reglas
         3. Temporadas
-        4. Capacidad real
+        4. Capacidad real (todas las horas que cubre la estancia)
+        """
+        max_capacity = self.get_max_capacity(restaurant, date, time, use_lock=use_lock)
+        if max_capacity is None:
+            return False
+
+        # 4. Validación de ocupación
+        window, durations = self._get_window(restaurant, date, time, max_capacity)
+        return self.capacity_engine.check_availability(
+            restaurant, date, time, num_people, max_capacity, window, durations
+        )
+
+    async def acheck_availability(self, restaurant, date, time, num_people):
+        """
+        Versión async de check_availability. La ocupación que se consulta
+        depende de la ventana calculada con el horario, así que los pasos no
+        son independientes: se ejecuta entera fuera del event loop.
+        """
+        return await sync_to_async(self.check_availability)(
+            restaurant, date, time, num_people
+        )
+
+    def check_slots(self, probes):
+        """
+        check_availability para muchas consultas a la vez.
+        probes: lista [(restaurant, date, time, num_people)], restaurant como
+        instancia o id. Cada (restaurante, fecha) distinto se carga una vez del
+        horario compilado y la ocupación de todos sale de una sola lectura
+        (get_occupancy_for_days). Retorna una lista de bool en el orden de probes.
+        """
+        days = {}
+        for restaurant, date_obj, _, _ in probes:
+            key = (getattr(restaurant, "pk", restaurant), date_obj)
+            if key not in days:
+                days[key] = self._load_probe_day(*key)
+
+        occupancy = self.capacity_engine.get_occupancy_for_days(
+            [key for key, day in days.items() if day is not None]
+        )
+
+        results = []
+        for restaurant, date_obj, time_obj, num_people in probes:
+            key = (getattr(restaurant, "pk", restaurant), date_obj)
+            day = days[key]
+            if day is None:
+                results.append(False)
+                continue
+
+            capacity_at, durations, interval = day
+            max_capacity = capacity_at(time_obj)
+            if max_capacity is None:
+                results.append(False)
+                continue
+
+            window = self._build_window(
+                time_obj, max_capacity, durations, capacity_at, interval
+            )
+            slot_occupancy = sweep_occupancy(
+                occupancy[key], [point for point, _ in window], durations
+            )
+            results.append(
+                all(
+                    slot_occupancy[point] + num_people <= capacity
+                    for point, capacity in window
+                )
+            )
+        return results
+
+    def _load_probe_day(self, restaurant_id, date_obj):
+        """
+        (capacity_at, duraciones, intervalo) de un día para check_slots, o None
+        si hay cierre total o reglas solapadas. A diferencia de _load_day, un día sin reglas pero
+        con capacidad fijada por excepción sigue abierto, como en
+        get_max_capacity.
+        """
+        exception = self.exception_engine.get_exception(restaurant_id, date_obj)
+        if exception and exception.is_closed:
+            return None
+
+        rules = self.rule_engine.get_rules_for_day(restaurant_id, date_obj)
+        if rules.error:
+            # Día inválido: sus consultas responden sin sitio
+            logger.warning("check_slots: restaurante %s omitido: %s", restaurant_id, rules.error)
+            return None
+        season = None
+        if not exception or exception.capacity is None:
+            season = self.season_engine.get_season(restaurant_id, date_obj)
+        return (
+            partial(self._slot_capacity, exception, rules, season),
+            self.rule_engine.get_dining_durations(restaurant_id, date_obj),
+            self._slot_interval(rules),
+        )
+
+    def reserve(self, restaurant, date, time, num_people, use_lock=False):
+        """
+        Igual que check_availability, pero además reserva la capacidad en el
+        CapacityEngine de forma atómica. Usar solo al crear una reserva y
+        liberar con release() si la creación no llega a completarse.
+        Si el motor reserva de forma atómica (ledger, redis) no se bloquean
+        las filas de reglas y excepciones: solo compiten reservas del mismo slot.
+        """
+        if self.capacity_engine.atomic_reserve:
+            use_lock = False
+
+        max_capacity = self.get_max_capacity(restaurant, date, time, use_lock=use_lock)
+        if max_capacity is None:
+            return False
+
+        window, durations = self._get_window(restaurant, date, time, max_capacity)
+        return self.capacity_engine.reserve(
+            restaurant, date, time, num_people, max_capacity, window, durations
+        )
+
+    def lock_days(self, days):
+        """
+        Bloquea de una vez las excepciones y reglas de varios pares
+        (restaurant_id, fecha), como hace reserve_batch(use_lock=True) con
+        uno: dos consultas para todo un lote de bulk/. Los motores con reserva
+        atómica (ledger, redis) no lo necesitan.
+        """
+        if self.capacity_engine.atomic_reserve:
+            return
+        self.exception_engine.lock_exceptions(days)
+        self.rule_engine.lock_rules_for_days(days)
+
+    def reserve_batch(self, restaurant, date, items, use_lock=False, starts=None):
+        """
+        Reserva un grupo de reservas del mismo restaurante y fecha.
+        items: lista [(time, num_people)] en el orden en que se deben aceptar.
+        Carga el día una sola vez y valida cada reserva contra la ocupación
+        acumulada en memoria (la de la base de datos más las ya aceptadas del
+        grupo): un solo barrido por grupo para todas las horas de sus
+        ventanas, y cada item aceptado suma sus personas a las horas que
+        cubre su estancia (bisect). Retorna una lista de bool, una por item.
+        Con use_lock=True bloquea una vez las reglas y la excepción del día
+        (para varios días, mejor lock_days); los motores con reserva atómica
+        reservan además cada item aceptado. starts: ocupación del día ya
+        cargada (get_occupancy_for_days) para no repetir la consulta.
+        Lanza OverlappingRulesError antes de reservar nada si las reglas del
+        día se solapan.
+        """
+        atomic_reserve = self.capacity_engine.atomic_reserve
+        if use_lock and not atomic_reserve:
+            self.exception_engine.get_exception(restaurant, date, use_lock=True)
+            self.rule_engine.lock_rules_for_day(restaurant, date)
+
+        exception = self.exception_engine.get_exception(restaurant, date)
+        if exception and exception.is_closed:
+            return [False] * len(items)
+
+        rules = self.rule_engine.get_rules_for_day(restaurant, date)
+        rules.check()
+        season = None
+        if not exception or exception.capacity is None:
+            season = self.season_engine.get_season(restaurant, date)
+        durations = self.rule_engine.get_dining_durations(restaurant, date)
+        capacity_at = partial(self._slot_capacity, exception, rules, season)
+        interval = self._slot_interval(rules)
+
+        windows = {}
+        for time_obj, _ in items:
+            if time_obj not in windows:
+                max_capacity = capacity_at(time_obj)
+                windows[time_obj] = None
+                if max_capacity is not None:
+                    windows[time_obj] = (
+                        max_capacity,
+                        self._build_window(
+                            time_obj, max_capacity, durations, capacity_at, interval
+                        ),
+                    )
+        points = sorted(
+            {
+                point
+                for entry in windows.values()
+                if entry
+                for point, _ in entry[1]
+            }
+        )
+        point_seconds = [time_to_seconds(point) for point in points]
+        if starts is None:
+            starts = self.capacity_engine.get_occupancy_by_time(restaurant, date)
+        occupancy = sweep_occupancy(starts, points, durations)
+
+        results = []
+        for time_obj, num_people in items:
+            if windows[time_obj] is None:
+                results.append(False)
+                continue
+
+            max_capacity, window = windows[time_obj]
+            accepted = all(
+                occupancy[point] + num_people <= capacity for point, capacity in window
+            )
+            if accepted and atomic_reserve:
+                accepted = self.capacity_engine.reserve(
+                    restaurant,
+                    date,
+                    time_obj,
+                    num_people,
+                    max_capacity,
+                    window if durations.configured else None,
+                    durations,
+                )
+            if accepted:
+                # Mismo intervalo que en sweep_occupancy: [inicio, inicio + duración)
+                start = time_to_seconds(time_obj)
+                duration = durations.for_time(time_obj) if durations else None
+                end = start + (duration * 60 if duration else 1)
+                for position in range(
+                    bisect_left(point_seconds, start), bisect_left(point_seconds, end)
+                ):
+                    occupancy[points[position]] += num_people
+            results.append(accepted)
+        return results
+
+    def release(self, reservation):
+        """
+        Devuelve al CapacityEngine la capacidad ocupada por una reserva.
+        Se llama tras el commit (cancelar, completar, borrar): si las reglas
+        del día se solapan no hay ventana que calcular y se libera solo el
+        slot de inicio en vez de fallar con el cambio ya guardado.
+        """
+        restaurant_id = reservation.restaurant_id
+        date = reservation.reservation_date
+        time = reservation.reservation_time
+
+        window = None
+        try:
+            max_capacity = self.get_max_capacity(restaurant_id, date, time)
+            if max_capacity is not None:
+                window, _ = self._get_window(restaurant_id, date, time, max_capacity)
+        except OverlappingRulesError as exc:
+            logger.warning(
+                "release: restaurante %s %s, solo el slot de inicio: %s",
+                restaurant_id,
+                date,
+                exc,
+            )
+            window = None
+
+        self.capacity_engine.release(
+            restaurant_id, date, time, reservation.num_people, window
+        )
+
+    def get_max_capacity(self, restaurant, date, time, use_lock=False):
+        """
+        Capacidad máxima del slot según excepciones, reglas y temporadas.
+        Retorna None si el restaurante no acepta reservas a esa hora.
         """
         # 1. Excepciones
         exception = self.exception_engine.get_exception(
@@ -86,24 +861,15 @@ class AvailabilityService:
         )
         if exception:
             if exception.is_closed:
-                return False
+                return None
 
             if exception.capacity is not None:
-                return self.capacity_engine.check_availability(
-                    restaurant, date, time, num_people, exception.capacity
-                )
+                return exception.capacity
 
         # 2. Regla aplicable
         rule = self.rule_engine.get_rule(restaurant, date, time, use_lock=use_lock)
         if not rule or not rule.is_available:
-            return False
+            return None
 
         # 3. Capacidad ajustada por temporada
-        max_capacity = self.season_engine.apply_multiplier(
-            restaurant, date, rule.capacity
-        )
-
-        # 4. Validación de ocupación
-        return self.capacity_engine.check_availability(
-            restaurant, date, time, num_people, max_capacity
-        )
+        return self.season_engine.apply_multiplier(restaurant, date, rule.capacity)
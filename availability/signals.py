@@ -0,0 +1,83 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from reservations.models import Reservation
+from .models import Restaurant, AvailabilityRule, Season, ExceptionDate
+from .engine.occupancy import UNKNOWN, occupancy_table
+from .engine.schedule import schedule_cache
+from .engine.versions import availability_versions
+
+
+@receiver([post_save, post_delete], sender=AvailabilityRule)
+@receiver([post_save, post_delete], sender=Season)
+@receiver([post_save, post_delete], sender=ExceptionDate)
+def invalidate_schedule(sender, instance, **kwargs):
+    """Cualquier cambio de horario invalida el horario compilado del restaurante."""
+    schedule_cache.invalidate(instance.restaurant_id)
+
+
+@receiver([post_save, post_delete], sender=Restaurant)
+def invalidate_restaurant_schedule(sender, instance, **kwargs):
+    # Un id puede reutilizarse (p. ej. tras un rollback): nunca heredar un horario
+    schedule_cache.invalidate(instance.pk)
+
+
+@receiver(post_init, sender=Reservation)
+def remember_reservation_day(sender, instance, **kwargs):
+    # Fecha original, para invalidar también el día anterior si la reserva se mueve
+    # (de __dict__: leer un campo diferido en post_init lanzaría otra consulta)
+    instance._availability_day = (
+        instance.__dict__.get('restaurant_id'),
+        instance.__dict__.get('reservation_date'),
+    )
+
+
+@receiver([post_save, post_delete], sender=Reservation)
+def invalidate_reservation_day(sender, instance, **kwargs):
+    """Una reserva creada, modificada o borrada cambia la versión de su día."""
+    days = {(instance.restaurant_id, instance.reservation_date)}
+    days.add(getattr(instance, '_availability_day', (None, None)))
+    for restaurant_id, date_obj in days:
+        if restaurant_id and date_obj:
+            availability_versions.invalidate(restaurant_id, date_obj)
+    instance._availability_day = (instance.restaurant_id, instance.reservation_date)
+
+
+@receiver(post_init, sender=Reservation)
+def remember_reservation_occupancy(sender, instance, **kwargs):
+    # Aportación a SlotOccupancy tal como está guardada, para aplicar solo el delta
+    instance._occupancy_state = occupancy_table.state(instance)
+
+
+@receiver(pre_save, sender=Reservation)
+def load_reservation_occupancy(sender, instance, **kwargs):
+    # Cargada con only()/defer(): se lee de la base de datos antes de sobrescribirla
+    if not instance._state.adding and instance._occupancy_state is UNKNOWN:
+        instance._occupancy_state = occupancy_table.load_state(instance.pk)
+
+
+@receiver(post_save, sender=Reservation)
+def update_reservation_occupancy(sender, instance, created, **kwargs):
+    """
+    Aplica a SlotOccupancy el cambio de la reserva (alta, cancelación,
+    finalización, tamaño o slot). Reservation.save() abre una transacción,
+    así que el resumen y la fila se confirman o se revierten juntos.
+    """
+    old = instance._occupancy_state
+    if created or old is UNKNOWN:
+        old = None
+    new = occupancy_table.state(instance)
+    if new is UNKNOWN:
+        new = occupancy_table.load_state(instance.pk)
+    occupancy_table.apply(old, new)
+    instance._occupancy_state = new
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reservation_occupancy(sender, instance, **kwargs):
+    old = instance._occupancy_state
+    if old is UNKNOWN:
+        # La fila ya no existe: se usa lo que tenga la instancia
+        old = occupancy_table.state(instance)
+    if old is not UNKNOWN:
+        occupancy_table.apply(old, None)
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.test import TestCase
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule, Season, ExceptionDate
+from availability.services import AvailabilityService
+from reservations.models import Reservation
+
+SYNC_URL = "/api/availability/availability/"
+ASYNC_URL = "/api/availability/async/"
+
+
+class AsyncAvailabilityViewsTest(TestCase):
+    """Las vistas async devuelven el mismo JSON que AvailabilityViewSet."""
+
+    def setUp(self):
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        self.restaurant = Restaurant.objects.create(
+            name="Async", city="Madrid", dining_duration=60
+        )
+        for day in range(6):
+            AvailabilityRule.objects.create(
+                restaurant=self.restaurant,
+                day_of_week=day,
+                start_time=time(20, 0),
+                end_time=time(22, 0),
+                capacity=10,
+            )
+        Season.objects.create(
+            restaurant=self.restaurant,
+            name="Alta",
+            start_date=self.monday + timedelta(days=1),
+            end_date=self.monday + timedelta(days=3),
+            capacity_multiplier=1.5,
+        )
+        ExceptionDate.objects.create(
+            restaurant=self.restaurant,
+            date=self.monday + timedelta(days=4),
+            reason="Cierre",
+            is_closed=True,
+        )
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(20, 30),
+            num_people=9,
+            status="confirmed",
+        )
+        self.client = APIClient()
+
+    def _assert_same_get(self, action, params):
+        sync = self.client.get(f"{SYNC_URL}{action}/", params)
+        response = self.client.get(f"{ASYNC_URL}{action}/", params)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(response.json(), sync.json())
+        return response
+
+    def test_check_date(self):
+        response = self._assert_same_get(
+            "check_date",
+            {"restaurant_id": self.restaurant.id, "date": self.monday.isoformat()},
+        )
+        self.assertNotIn("20:30:00", response.json()["availability"])
+
+    def test_check_range(self):
+        self._assert_same_get(
+            "check_range",
+            {
+                "restaurant_id": self.restaurant.id,
+                "start": self.monday.isoformat(),
+                "end": (self.monday + timedelta(days=13)).isoformat(),
+                "num_people": 3,
+            },
+        )
+
+    def test_search(self):
+        self._assert_same_get(
+            "search",
+            {
+                "city": "madrid",
+                "date": self.monday.isoformat(),
+                "time_from": "20:00",
+                "time_to": "21:30",
+                "time": "21:00",
+            },
+        )
+
+    def test_check_slot(self):
+        for slot in ("20:00", "21:00"):
+            payload = {
+                "restaurant_id": self.restaurant.id,
+                "date": self.monday.isoformat(),
+                "time": slot,
+                "num_people": 2,
+            }
+            sync = self.client.post(f"{SYNC_URL}check_slot/", payload, format="json")
+            response = self.client.post(
+                f"{ASYNC_URL}check_slot/", payload, format="json"
+            )
+            self.assertEqual(response.json(), sync.json())
+
+    def test_check_slot_rejects_invalid_bodies(self):
+        url = f"{ASYNC_URL}check_slot/"
+        for body in ("[]", '"x"', "3"):
+            response = self.client.post(url, body, content_type="application/json")
+            self.assertEqual(response.status_code, 400, body)
+
+        payload = {
+            "restaurant_id": self.restaurant.id,
+            "date": self.monday.isoformat(),
+            "time": "20:00",
+        }
+        for num_people in ("abc", -1, [2]):
+            response = self.client.post(
+                url, {**payload, "num_people": num_people}, format="json"
+            )
+            self.assertEqual(response.status_code, 400, num_people)
+            self.assertEqual(
+                response.json()["error"], "num_people debe ser un entero mayor que 0"
+            )
+
+    def test_errors(self):
+        self._assert_same_get("check_date", {"restaurant_id": self.restaurant.id})
+        self._assert_same_get(
+            "check_date", {"restaurant_id": 999999, "date": self.monday.isoformat()}
+        )
+
+    def test_not_modified(self):
+        params = {"restaurant_id": self.restaurant.id, "date": self.monday.isoformat()}
+        etag = self.client.get(f"{SYNC_URL}check_date/", params)["ETag"]
+
+        response = self.client.get(
+            f"{ASYNC_URL}check_date/", params, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_runs_on_async_client(self):
+        response = await self.async_client.get(
+            f"{ASYNC_URL}check_date/",
+            {"restaurant_id": self.restaurant.id, "date": self.monday.isoformat()},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["restaurant"], "Async")
+
+    async def test_event_loop_runs_while_the_queries_wait(self):
+        """
+        Mientras las consultas esperan en su hilo, el event loop atiende otra
+        corrutina: si la llamada bloqueara el loop, other_request nunca
+        liberaría la carga y esta fallaría por timeout.
+        """
+        loading, release = threading.Event(), threading.Event()
+        load_day = AvailabilityService._load_day
+
+        def slow_load_day(service, *args):
+            loading.set()
+            if not release.wait(timeout=5):
+                raise AssertionError("El event loop quedó bloqueado")
+            return load_day(service, *args)
+
+        async def other_request():
+            while not loading.is_set():
+                await asyncio.sleep(0.001)
+            release.set()
+
+        with mock.patch.object(
+            AvailabilityService, "_load_day", autospec=True, side_effect=slow_load_day
+        ):
+            slots, _ = await asyncio.gather(
+                AvailabilityService().aget_day_slots(self.restaurant, self.monday),
+                other_request(),
+            )
+        self.assertTrue(slots)
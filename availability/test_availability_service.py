@@ -3,6 +3,7 @@ from datetime import date, time, timedelta
 from availability.models import Restaurant, AvailabilityRule, Season, ExceptionDate
 from reservations.models import Reservation
 from availability.services import AvailabilityService
+from availability.engine.schedule import schedule_cache
 
 
 class AvailabilityServiceTest(TestCase):
@@ -95,3 +96,353 @@ class AvailabilityServiceTest(TestCase):
 
         self.assertNotIn(time(10, 0), slots)  # Lleno
         self.assertIn(time(10, 15), slots)  # Libre
+
+    def _per_slot_availability(self, date_obj):
+        """Referencia: decide cada slot de cada regla con check_availability."""
+        return [
+            time_slot
+            for rule in self.service.rule_engine.get_rules_for_day(
+                self.restaurant, date_obj
+            )
+            for time_slot in self.service.slot_generator.generate_slots(
+                date_obj, rule.start_time, rule.end_time
+            )
+            if self.service.check_availability(
+                self.restaurant, date_obj, time_slot, num_people=2
+            )
+        ]
+
+    def test_get_availability_by_date_matches_per_slot_path(self):
+        """Single-pass: mismo resultado que check_availability slot por slot."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(12, 0),
+            end_time=time(16, 0),
+            capacity=10,
+        )
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(16, 0),
+            end_time=time(18, 0),
+            capacity=4,
+        )
+        Season.objects.create(
+            restaurant=self.restaurant,
+            name="Low",
+            start_date=self.monday,
+            end_date=self.monday,
+            capacity_multiplier=0.5,
+        )
+        for slot_time, people in [
+            (time(12, 0), 4),
+            (time(13, 15), 3),
+            (time(15, 0), 1),
+        ]:
+            Reservation.objects.create(
+                restaurant=self.restaurant,
+                reservation_date=self.monday,
+                reservation_time=slot_time,
+                num_people=people,
+                status="confirmed",
+            )
+
+        self.assertEqual(
+            self.service.get_availability_by_date(self.restaurant, self.monday),
+            self._per_slot_availability(self.monday),
+        )
+
+        # Excepción con capacidad especial
+        ExceptionDate.objects.create(
+            restaurant=self.restaurant, date=self.monday, is_closed=False, capacity=5
+        )
+        self.assertEqual(
+            self.service.get_availability_by_date(self.restaurant, self.monday),
+            self._per_slot_availability(self.monday),
+        )
+
+    def test_get_availability_by_date_uses_constant_queries(self):
+        """Horario compilado (4 consultas en frío) + ocupación agrupada del día."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(12, 0),
+            end_time=time(23, 45),
+            capacity=10,
+        )
+        with self.assertNumQueries(5):
+            slots = self.service.get_availability_by_date(self.restaurant, self.monday)
+        self.assertEqual(len(slots), 47)
+
+        # En caliente solo queda la consulta de ocupación
+        with self.assertNumQueries(1):
+            self.service.get_availability_by_date(self.restaurant, self.monday)
+
+    def test_get_availability_by_range_matches_day_path(self):
+        """Rango: cada día coincide con get_availability_by_date."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+            capacity=10,
+        )
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=1,
+            start_time=time(20, 0),
+            end_time=time(21, 0),
+            capacity=6,
+        )
+        next_monday = self.monday + timedelta(days=7)
+        ExceptionDate.objects.create(
+            restaurant=self.restaurant, date=next_monday, is_closed=True
+        )
+        Season.objects.create(
+            restaurant=self.restaurant,
+            name="High",
+            start_date=self.monday + timedelta(days=1),
+            end_date=self.monday + timedelta(days=1),
+            capacity_multiplier=1.5,
+        )
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(10, 0),
+            num_people=9,
+            status="pending",
+        )
+
+        days = self.service.get_availability_by_range(
+            self.restaurant, self.monday, next_monday
+        )
+
+        self.assertEqual(len(days), 8)
+        for day in days:
+            self.assertEqual(
+                day["availability"],
+                self.service.get_availability_by_date(self.restaurant, day["date"]),
+            )
+        self.assertEqual(days[0]["max_party_size"], 10)
+        self.assertEqual(days[1]["max_party_size"], 9)  # 6 * 1.5
+        self.assertFalse(days[2]["is_open"])  # Miércoles sin reglas
+        self.assertFalse(days[7]["is_open"])  # Cerrado por excepción
+
+    def test_check_range_includes_every_rule_of_the_day(self):
+        """Comida y cena: check_range también devuelve los slots de la cena."""
+        for start, end in [(time(13, 0), time(16, 0)), (time(20, 0), time(23, 0))]:
+            AvailabilityRule.objects.create(
+                restaurant=self.restaurant,
+                day_of_week=0,
+                start_time=start,
+                end_time=end,
+                capacity=10,
+            )
+
+        response = self.client.get(
+            "/api/availability/availability/check_range/",
+            {
+                "restaurant_id": self.restaurant.id,
+                "start": self.monday.isoformat(),
+                "end": self.monday.isoformat(),
+                "num_people": 4,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        availability = response.data["days"][0]["availability"]
+        self.assertEqual(len(availability), 24)
+        self.assertIn(time(21, 0), availability)
+        self.assertEqual(
+            availability,
+            self.service.get_availability_by_date(self.restaurant, self.monday, 4),
+        )
+
+    def test_get_availability_by_range_uses_constant_queries(self):
+        """Rango: el número de consultas no depende del número de días."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(12, 0),
+            end_time=time(23, 0),
+            capacity=10,
+        )
+        with self.assertNumQueries(5):
+            days = self.service.get_availability_by_range(
+                self.restaurant, self.monday, self.monday + timedelta(days=59)
+            )
+        self.assertEqual(len(days), 60)
+
+        with self.assertNumQueries(1):
+            self.service.get_availability_by_range(
+                self.restaurant, self.monday, self.monday + timedelta(days=59)
+            )
+
+    def _dining_setup(self):
+        self.restaurant.dining_duration = 90
+        self.restaurant.save()
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=10,
+        )
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(19, 0),
+            num_people=6,
+            status="confirmed",
+        )
+
+    def test_dining_duration_occupies_following_slots(self):
+        """Una mesa sentada a las 19:00 con 90 min sigue ocupando las 20:15."""
+        self._dining_setup()
+        # 6 + 6 > 10 mientras dura la estancia; a las 20:30 ya se ha ido
+        for slot_time, expected in [
+            (time(19, 15), False),
+            (time(20, 15), False),
+            (time(20, 30), True),
+        ]:
+            self.assertEqual(
+                self.service.check_availability(
+                    self.restaurant, self.monday, slot_time, 6
+                ),
+                expected,
+            )
+
+    def test_dining_duration_checks_every_slot_of_the_stay(self):
+        """Reservar a las 18:45 no puede desbordar la franja de las 19:00 en adelante."""
+        self._dining_setup()
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(18, 0),
+            end_time=time(19, 0),
+            capacity=10,
+        )
+        self.assertFalse(
+            self.service.check_availability(
+                self.restaurant, self.monday, time(18, 45), 5
+            )
+        )
+        self.assertTrue(
+            self.service.check_availability(
+                self.restaurant, self.monday, time(18, 45), 4
+            )
+        )
+
+    def test_dining_duration_day_path_matches_per_slot_path(self):
+        """Con duración de estancia el cálculo de día sigue coincidiendo slot a slot."""
+        self._dining_setup()
+        # Las reglas no se pueden solapar: la de la cena termina a las 21:00
+        rule = AvailabilityRule.objects.get(restaurant=self.restaurant)
+        rule.end_time = time(21, 0)
+        rule.save()
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(21, 0),
+            end_time=time(23, 0),
+            capacity=8,
+            dining_duration=120,
+        )
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(21, 30),
+            num_people=5,
+            status="pending",
+        )
+        slots = self.service.get_availability_by_date(self.restaurant, self.monday)
+        self.assertEqual(slots, self._per_slot_availability(self.monday))
+        # 20:15 sigue ocupado por la mesa de las 19:00 (10 - 6) y su estancia
+        # llega a la franja de las 21:00, donde la mesa de las 21:30 deja 8 - 5
+        remaining = {
+            slot.time: slot.remaining
+            for slot in self.service.get_day_slots(self.restaurant, self.monday)
+        }
+        self.assertEqual(remaining[time(19, 15)], 4)
+        self.assertEqual(remaining[time(20, 15)], 3)
+        self.assertEqual(remaining[time(20, 30)], 3)
+
+    def test_day_availability_reports_max_party_size_per_slot(self):
+        """Cada slot lleva plazas libres y el mayor grupo que cabe en toda la estancia."""
+        self._dining_setup()
+        day = self.service.get_day_availability(self.restaurant, self.monday)
+        slots = {slot["time"]: slot for slot in day["slots"]}
+        # La mesa de las 19:00 ocupa hasta las 20:30: a las 20:15 sigue sentada
+        self.assertEqual(slots[time(19, 0)]["remaining"], 4)
+        self.assertEqual(slots[time(20, 15)]["max_party_size"], 4)
+        self.assertEqual(slots[time(20, 30)]["max_party_size"], 10)
+        for slot_time, slot in slots.items():
+            for num_people in (1, 4, 6):
+                self.assertEqual(
+                    slot["max_party_size"] >= num_people,
+                    self.service.check_availability(
+                        self.restaurant, self.monday, slot_time, num_people
+                    ),
+                )
+
+        six = self.service.get_day_availability(self.restaurant, self.monday, 6)
+        self.assertEqual(
+            [slot["time"] for slot in six["slots"]],
+            [
+                slot_time
+                for slot_time, slot in slots.items()
+                if slot["max_party_size"] >= 6
+            ],
+        )
+        self.assertEqual(six["availability"], [slot["time"] for slot in six["slots"]])
+
+    def test_slot_interval_from_rule_or_restaurant(self):
+        """El intervalo de la regla manda sobre el del restaurante y este sobre 15 min."""
+        self.restaurant.slot_interval = 30
+        self.restaurant.dining_duration = 60
+        self.restaurant.save()
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(20, 0),
+            end_time=time(21, 30),
+            capacity=10,
+        )
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(20, 0),
+            num_people=6,
+            status="confirmed",
+        )
+        remaining = {
+            slot.time: slot.remaining
+            for slot in self.service.get_day_slots(self.restaurant, self.monday)
+        }
+        # La estancia de 60 min cubre el slot de las 20:30 de la rejilla de 30
+        self.assertEqual(remaining, {time(20, 0): 4, time(20, 30): 4, time(21, 0): 10})
+        self.assertFalse(
+            self.service.check_availability(
+                self.restaurant, self.monday, time(20, 0), 5
+            )
+        )
+
+        AvailabilityRule.objects.filter(restaurant=self.restaurant).update(
+            slot_interval=45
+        )
+        schedule_cache.invalidate(self.restaurant.pk)
+        self.assertEqual(
+            self.service.get_availability_by_date(self.restaurant, self.monday),
+            [time(20, 0), time(20, 45)],
+        )
+
+        # La búsqueda lee las reglas de la base de datos con el mismo resultado
+        [result] = self.service.search_availability(
+            Restaurant.objects.filter(pk=self.restaurant.pk),
+            self.monday,
+            time(0, 0),
+            time(23, 59),
+        )
+        self.assertEqual(
+            [slot.time for slot in result["slots"]], [time(20, 0), time(20, 45)]
+        )
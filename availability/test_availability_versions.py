@@ -0,0 +1,180 @@
+import tempfile
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule
+from reservations.models import Reservation
+from availability.engine.versions import availability_versions
+
+CHECK_DATE_URL = "/api/availability/availability/check_date/"
+CHECK_RANGE_URL = "/api/availability/availability/check_range/"
+
+
+class AvailabilityETagTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        self.restaurant = Restaurant.objects.create(name="ETag")
+        self.rule = AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(20, 0),
+            end_time=time(22, 0),
+            capacity=10,
+        )
+        self.client = APIClient()
+
+    def _check_date(self, day=None, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(
+            CHECK_DATE_URL,
+            {
+                "restaurant_id": self.restaurant.id,
+                "date": (day or self.monday).isoformat(),
+            },
+            **headers,
+        )
+
+    def _reserve(self, day):
+        return Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=day,
+            reservation_time=time(20, 0),
+            num_people=2,
+            status="confirmed",
+        )
+
+    def test_not_modified_without_queries(self):
+        etag = self._check_date()["ETag"]
+        self.assertTrue(etag)
+
+        with self.assertNumQueries(0):
+            response = self._check_date(etag=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_other_etag_gets_full_response(self):
+        response = self._check_date(etag='"otra"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_reservation_changes_only_its_day(self):
+        next_week = self.monday + timedelta(days=7)
+        # Un día sin cambios recientes comparte la versión base del restaurante
+        self._reserve(next_week)
+        etag = self._check_date()["ETag"]
+        other_etag = self._check_date(next_week)["ETag"]
+
+        self._reserve(self.monday)
+
+        self.assertEqual(self._check_date(etag=etag).status_code, 200)
+        self.assertEqual(self._check_date(next_week, etag=other_etag).status_code, 304)
+
+    def test_moving_reservation_changes_old_day(self):
+        reservation = self._reserve(self.monday)
+        etag = self._check_date()["ETag"]
+
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.reservation_date = self.monday + timedelta(days=7)
+        reservation.save()
+
+        self.assertEqual(self._check_date(etag=etag).status_code, 200)
+
+    def test_rule_change_changes_etag(self):
+        etag = self._check_date()["ETag"]
+
+        self.rule.capacity = 20
+        self.rule.save()
+
+        response = self._check_date(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_check_range_etag(self):
+        params = {
+            "restaurant_id": self.restaurant.id,
+            "start": self.monday.isoformat(),
+            "end": (self.monday + timedelta(days=13)).isoformat(),
+        }
+        etag = self.client.get(CHECK_RANGE_URL, params)["ETag"]
+
+        response = self.client.get(CHECK_RANGE_URL, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Otro número de personas es otra respuesta
+        response = self.client.get(
+            CHECK_RANGE_URL, {**params, "num_people": 4}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self._reserve(self.monday + timedelta(days=13))
+        response = self.client.get(CHECK_RANGE_URL, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_create_changes_etag(self):
+        etag = self._check_date()["ETag"]
+
+        self.client.post(
+            "/api/reservations/reservations/bulk/",
+            {
+                "mode": "all_or_nothing",
+                "reservations": [
+                    {
+                        "restaurant": self.restaurant.id,
+                        "customer_name": "Bloque",
+                        "customer_email": "bloque@example.com",
+                        "customer_phone": "600000000",
+                        "reservation_date": self.monday.isoformat(),
+                        "reservation_time": "20:00",
+                        "num_people": 2,
+                    }
+                ],
+            },
+            format="json",
+        )
+
+        self.assertEqual(self._check_date(etag=etag).status_code, 200)
+
+    def test_num_people_is_part_of_the_etag(self):
+        """check_date filtra slots por num_people: cada tamaño tiene su ETag."""
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(20, 0),
+            num_people=6,
+            status="confirmed",
+        )
+        params = {"restaurant_id": self.restaurant.id, "date": self.monday.isoformat()}
+        everyone = self.client.get(CHECK_DATE_URL, params)
+        six = self.client.get(CHECK_DATE_URL, {**params, "num_people": 6})
+
+        self.assertNotEqual(everyone["ETag"], six["ETag"])
+        self.assertEqual(len(everyone.data["slots"]), 8)
+        self.assertEqual(everyone.data["slots"][0]["max_party_size"], 4)
+        self.assertEqual(
+            [slot["time"] for slot in six.data["slots"]], six.data["availability"]
+        )
+        self.assertNotIn(time(20, 0), six.data["availability"])
+        self.assertEqual(
+            self.client.get(CHECK_DATE_URL, {**params, "num_people": 0}).status_code, 400
+        )
+
+    @override_settings(AVAILABILITY_ETAG_ENABLED=None)
+    def test_etags_require_a_shared_cache(self):
+        """Con una caché por proceso otro worker respondería 304 obsoletos."""
+        self.assertFalse(availability_versions.enabled)
+        response = self._check_date()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertEqual(self._check_date(etag="*").status_code, 200)
+
+        with tempfile.TemporaryDirectory() as directory:
+            shared = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": directory,
+                }
+            }
+            with self.settings(CACHES=shared):
+                self.assertTrue(availability_versions.enabled)
+                etag = self._check_date()["ETag"]
+                self.assertEqual(self._check_date(etag=etag).status_code, 304)
@@ -0,0 +1,179 @@
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule
+from availability.services import AvailabilityService
+from availability.engine.ledger import LedgerCapacityEngine
+from reservations.models import Reservation
+
+BULK_URL = "/api/reservations/reservations/bulk/"
+
+
+class BulkReservationTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Bulk Restaurant")
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=10,
+        )
+        self.client = APIClient()
+
+    def _item(self, slot="20:00", num_people=4, day=None, **extra):
+        return {
+            "restaurant": self.restaurant.id,
+            "customer_name": "Ana",
+            "customer_email": "ana@example.com",
+            "customer_phone": "600000000",
+            "reservation_date": (day or self.monday).isoformat(),
+            "reservation_time": slot,
+            "num_people": num_people,
+            **extra,
+        }
+
+    def _post(self, items, mode):
+        return self.client.post(
+            BULK_URL, {"mode": mode, "reservations": items}, format="json"
+        )
+
+    def test_best_effort_uses_running_total(self):
+        """Cada item se valida contra la ocupación más los ya aceptados del lote."""
+        response = self._post(
+            [
+                self._item(num_people=4),
+                self._item(num_people=4),
+                self._item(num_people=4),
+            ],
+            "best_effort",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["created", "created", "error"],
+        )
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_running_total_covers_the_whole_stay(self):
+        """Una reserva aceptada ocupa las horas de su estancia para el resto del lote."""
+        self.restaurant.dining_duration = 90
+        self.restaurant.save()
+        response = self._post(
+            [
+                self._item("20:00", num_people=6),
+                self._item("21:00", num_people=6),
+                self._item("21:30", num_people=6),
+                self._item("19:00", num_people=4),
+            ],
+            "best_effort",
+        )
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["created", "error", "created", "created"],
+        )
+
+    def test_all_or_nothing_rolls_back(self):
+        response = self._post(
+            [self._item(num_people=6), self._item(num_people=6)], "all_or_nothing"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["skipped", "error"],
+        )
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_invalid_item_is_reported_by_index(self):
+        response = self._post([self._item(), self._item(num_people=0)], "best_effort")
+        self.assertEqual(response.data["results"][0]["status"], "created")
+        self.assertIn("num_people", response.data["results"][1]["errors"])
+
+    def test_item_errors_match_the_serializer(self):
+        """Los items se validan con un serializer compartido: mismos errores."""
+        from reservations.serializers import ReservationSerializer
+
+        items = [self._item(num_people=0, reservation_time="25:00"), None, "x"]
+        response = self._post(items, "best_effort")
+
+        expected = []
+        for item in items:
+            serializer = ReservationSerializer(
+                data=item, context={"skip_availability": True}
+            )
+            self.assertFalse(serializer.is_valid())
+            expected.append(serializer.errors)
+        self.assertEqual(
+            [result["errors"] for result in response.data["results"]], expected
+        )
+
+    def test_overlapping_rules_fail_only_that_day(self):
+        """Reglas solapadas guardadas: error por item, no un 500."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(22, 0),
+            end_time=time(23, 30),
+            capacity=10,
+        )
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=1,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=10,
+        )
+        tuesday = self.monday + timedelta(days=1)
+        response = self._post([self._item(), self._item(day=tuesday)], "best_effort")
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["error", "created"])
+        self.assertEqual(
+            results[0]["errors"]["non_field_errors"][0].code, "invalid_schedule"
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_all_created_returns_201(self):
+        next_monday = self.monday + timedelta(days=7)
+        response = self._post(
+            [self._item(), self._item(day=next_monday)], "all_or_nothing"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Reservation.objects.count(), 2)
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        """
+        Restaurantes, bloqueo y carga del día, un INSERT para todo el grupo y
+        tres consultas fijas para sumarlo a SlotOccupancy.
+        """
+        AvailabilityService().get_day_slots(self.restaurant, self.monday)
+        items = [
+            self._item(slot=f"{19 + offset // 4}:{offset % 4 * 15:02d}", num_people=1)
+            for offset in range(16)
+        ]
+        with self.assertNumQueries(10):
+            response = self._post(items, "best_effort")
+        self.assertEqual(response.data["created"], 16)
+
+    def test_rejects_unknown_mode_and_empty_list(self):
+        self.assertEqual(self._post([self._item()], "sometimes").status_code, 400)
+        self.assertEqual(self._post([], "best_effort").status_code, 400)
+
+
+@override_settings(AVAILABILITY_CAPACITY_BACKEND="ledger")
+class BulkReservationLedgerTest(BulkReservationTest):
+    def test_ledger_matches_created_reservations(self):
+        self._post([self._item(num_people=6), self._item(num_people=6)], "best_effort")
+        self.assertEqual(
+            LedgerCapacityEngine().get_booked(self.restaurant, self.monday),
+            {time(20, 0): 6},
+        )
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        """El ledger añade un UPDATE por reserva aceptada."""
+        items = [self._item(num_people=1) for _ in range(5)]
+        response = self._post(items, "best_effort")
+        self.assertEqual(response.data["created"], 5)
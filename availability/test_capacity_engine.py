@@ -1,8 +1,16 @@
-from django.test import TestCase
-from datetime import date, time
-from availability.models import Restaurant
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule
 from reservations.models import Reservation
-from availability.engine.capacity import CapacityEngine
+from availability.services import AvailabilityService
+from availability.engine.capacity import (
+    CapacityEngine,
+    DiningDurations,
+    sweep_occupancy,
+)
 
 
 class CapacityEngineTest(TestCase):
@@ -61,3 +69,103 @@ class CapacityEngineTest(TestCase):
                 self.restaurant, self.date, self.time, 11, 10
             )
         )
+
+    def test_sweep_occupancy_sums_overlapping_reservations(self):
+        """Una reserva ocupa [inicio, inicio + duración) en el barrido."""
+        durations = DiningDurations(default=60)
+        starts = {time(19, 0): 4, time(19, 30): 2, time(21, 0): 6}
+        occupancy = sweep_occupancy(
+            starts,
+            [time(18, 45), time(19, 0), time(19, 45), time(20, 0), time(20, 30)],
+            durations,
+        )
+        self.assertEqual(
+            occupancy,
+            {
+                time(18, 45): 0,
+                time(19, 0): 4,
+                time(19, 45): 6,
+                time(20, 0): 2,
+                time(20, 30): 0,
+            },
+        )
+
+    def test_sweep_occupancy_without_duration_counts_exact_slot(self):
+        """Sin duración configurada solo cuenta la hora exacta."""
+        occupancy = sweep_occupancy(
+            {time(19, 0): 4}, [time(19, 0), time(19, 15)], DiningDurations()
+        )
+        self.assertEqual(occupancy, {time(19, 0): 4, time(19, 15): 0})
+
+
+@override_settings(AVAILABILITY_CAPACITY_BACKEND="database")
+class ReservationUpdateCapacityTest(TestCase):
+    """Editar una reserva comprueba el slot nuevo sin contarla dos veces."""
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Update")
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=6,
+        )
+        self.client = APIClient()
+        self.reservation = Reservation.objects.create(
+            restaurant=self.restaurant,
+            customer_name="Ana",
+            customer_email="ana@example.com",
+            customer_phone="600000000",
+            reservation_date=self.monday,
+            reservation_time=time(20, 0),
+            num_people=4,
+            status="confirmed",
+        )
+        self.url = f"/api/reservations/reservations/{self.reservation.id}/"
+
+    def test_cancel_does_not_schedule_a_release(self):
+        """Sin contadores propios no hay nada que liberar tras el commit."""
+        with mock.patch.object(AvailabilityService, "release") as release:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f"{self.url}cancel/")
+        self.assertEqual(response.status_code, 200)
+        release.assert_not_called()
+
+    def test_update_moves_capacity_or_rejects(self):
+        engine = CapacityEngine()
+        # Crecer en su propio slot: sus 4 plazas no cuentan dos veces
+        response = self.client.patch(self.url, {"num_people": 6}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["num_people"], 6)
+
+        response = self.client.patch(
+            self.url, {"reservation_time": "21:00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            engine.get_current_occupancy(self.restaurant, self.monday, time(20, 0)), 0
+        )
+        self.assertEqual(
+            engine.get_current_occupancy(self.restaurant, self.monday, time(21, 0)), 6
+        )
+
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(20, 0),
+            num_people=2,
+            status="confirmed",
+        )
+        response = self.client.patch(
+            self.url, {"reservation_time": "20:00"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.reservation_time, time(21, 0))
+
+        # Otros campos no tocan la capacidad
+        response = self.client.patch(self.url, {"customer_name": "Eva"}, format="json")
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,140 @@
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule, ExceptionDate
+from availability.services import AvailabilityService
+from reservations.models import Reservation
+
+CHECK_SLOTS_URL = "/api/availability/availability/check_slots/"
+
+
+class CheckSlotsTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        self.tuesday = self.monday + timedelta(days=1)
+        self.first = Restaurant.objects.create(name="First", dining_duration=60)
+        self.second = Restaurant.objects.create(name="Second")
+        for restaurant in (self.first, self.second):
+            for day_of_week in (0, 1):
+                AvailabilityRule.objects.create(
+                    restaurant=restaurant,
+                    day_of_week=day_of_week,
+                    start_time=time(19, 0),
+                    end_time=time(23, 0),
+                    capacity=6,
+                )
+        # Martes: el segundo restaurante cierra y el primero fija capacidad 2
+        ExceptionDate.objects.create(
+            restaurant=self.second, date=self.tuesday, is_closed=True
+        )
+        ExceptionDate.objects.create(
+            restaurant=self.first, date=self.tuesday, is_closed=False, capacity=2
+        )
+        for restaurant, slot_time, num_people in (
+            (self.first, time(20, 30), 4),
+            (self.second, time(20, 0), 5),
+        ):
+            Reservation.objects.create(
+                restaurant=restaurant,
+                reservation_date=self.monday,
+                reservation_time=slot_time,
+                num_people=num_people,
+                status="confirmed",
+            )
+        self.client = APIClient()
+        self.service = AvailabilityService()
+
+    def _probes(self):
+        return [
+            (restaurant, date_obj, time_obj, num_people)
+            for restaurant in (self.first, self.second)
+            for date_obj in (self.monday, self.tuesday)
+            for time_obj in (time(18, 0), time(20, 0), time(20, 30), time(22, 45))
+            for num_people in (1, 2, 3)
+        ]
+
+    def test_matches_check_availability(self):
+        """Mismo resultado que una llamada a check_availability por consulta."""
+        probes = self._probes()
+        expected = [self.service.check_availability(*probe) for probe in probes]
+        self.assertEqual(self.service.check_slots(probes), expected)
+        # La estancia de 60 min de las 20:00 pisa la mesa de las 20:30
+        self.assertIn(True, expected)
+        self.assertIn(False, expected)
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        """En caliente: restaurantes y ocupación, dos consultas en total."""
+        probes = [
+            {
+                "restaurant_id": restaurant.pk,
+                "date": date_obj.isoformat(),
+                "time": time_obj.strftime("%H:%M"),
+                "num_people": num_people,
+            }
+            for restaurant, date_obj, time_obj, num_people in self._probes()
+        ]
+        self.client.post(CHECK_SLOTS_URL, {"slots": probes[:1]}, format="json")
+        self.client.post(CHECK_SLOTS_URL, {"slots": probes[-1:]}, format="json")
+
+        response = self.client.post(CHECK_SLOTS_URL, {"slots": probes}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Query-Count"], "2")
+        self.assertEqual(len(response.data["results"]), len(probes))
+
+    def test_results_keep_input_order_with_item_errors(self):
+        response = self.client.post(
+            CHECK_SLOTS_URL,
+            {
+                "slots": [
+                    {
+                        "restaurant_id": self.second.pk,
+                        "date": self.monday.isoformat(),
+                        "time": "20:00",
+                        "num_people": 2,
+                    },
+                    {
+                        "restaurant_id": 999999,
+                        "date": self.monday.isoformat(),
+                        "time": "20:00",
+                        "num_people": 2,
+                    },
+                    {
+                        "restaurant_id": self.first.pk,
+                        "date": "10-02-2026",
+                        "time": "20:00",
+                        "num_people": 2,
+                    },
+                    {
+                        "restaurant_id": self.first.pk,
+                        "date": self.monday.isoformat(),
+                        "time": "19:00",
+                        "num_people": 2,
+                    },
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual([result["index"] for result in results], [0, 1, 2, 3])
+        self.assertFalse(results[0]["is_available"])
+        self.assertEqual(results[1]["error"], "Restaurante no encontrado")
+        self.assertIn("error", results[2])
+        self.assertTrue(results[3]["is_available"])
+        self.assertEqual(results[3]["restaurant"], "First")
+
+    @override_settings(AVAILABILITY_CHECK_SLOTS_MAX_ITEMS=2)
+    def test_batch_size_is_capped(self):
+        probe = {
+            "restaurant_id": self.first.pk,
+            "date": self.monday.isoformat(),
+            "time": "20:00",
+            "num_people": 2,
+        }
+        response = self.client.post(
+            CHECK_SLOTS_URL, {"slots": [probe] * 3}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(CHECK_SLOTS_URL, {"slots": []}, format="json")
+        self.assertEqual(response.status_code, 400)
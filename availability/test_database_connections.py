@@ -0,0 +1,49 @@
+import os
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from availability.profiling import connection_stats
+from config.database import connection_settings
+
+STATS_URL = "/api/availability/database-connections/"
+
+
+class ConnectionSettingsTest(SimpleTestCase):
+    def test_persistent_connections_by_default(self):
+        with mock.patch.dict(os.environ, {"DB_CONN_MAX_AGE": "120"}):
+            database = connection_settings(conn_max_age=60)
+        self.assertEqual(database["CONN_MAX_AGE"], 120)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("pool", database["OPTIONS"])
+
+        with mock.patch.dict(os.environ, {"DB_CONN_MAX_AGE": "None"}):
+            self.assertIsNone(connection_settings()["CONN_MAX_AGE"])
+
+    def test_pool_disables_persistent_connections(self):
+        """Django no admite pool con CONN_MAX_AGE distinto de 0."""
+        with mock.patch.dict(os.environ, {"DB_POOL": "True", "DB_POOL_MAX_SIZE": "20"}):
+            database = connection_settings(conn_max_age=600)
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertEqual(database["OPTIONS"]["pool"]["max_size"], 20)
+        self.assertEqual(database["OPTIONS"]["connect_timeout"], 10)
+
+
+class ConnectionStatsTest(TestCase):
+    def test_mode_follows_conn_max_age(self):
+        self.assertEqual(connection_stats()["mode"], "per_request")
+        with mock.patch.dict(connection.settings_dict, {"CONN_MAX_AGE": 60}):
+            self.assertEqual(connection_stats()["mode"], "persistent")
+
+    def test_endpoint_is_staff_only(self):
+        client = APIClient()
+        self.assertEqual(client.get(STATS_URL).status_code, 403)
+
+        client.force_authenticate(
+            User.objects.create_user("ops", password="x", is_staff=True)
+        )
+        response = client.get(STATS_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["alias"], "default")
+        self.assertIn(response.data["mode"], ("per_request", "persistent", "pool"))
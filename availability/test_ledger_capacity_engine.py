@@ -0,0 +1,270 @@
+import threading
+from unittest import mock
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from reservations.views import ReservationViewSet
+from availability.models import Restaurant, AvailabilityRule, SlotLedger
+from reservations.models import Reservation
+from availability.engine.capacity import DiningDurations
+from availability.engine.ledger import LedgerCapacityEngine
+
+
+class LedgerCapacityEngineTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Ledger Restaurant")
+        self.engine = LedgerCapacityEngine()
+        self.date = date.today() + timedelta(days=1)
+        self.time = time(20, 0)
+
+    def test_row_is_seeded_from_reservations(self):
+        """La primera reserva de un slot parte de las reservas existentes."""
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.date,
+            reservation_time=self.time,
+            num_people=4,
+            status="confirmed",
+        )
+        self.assertTrue(
+            self.engine.reserve(self.restaurant, self.date, self.time, 6, 10)
+        )
+        self.assertEqual(
+            self.engine.get_booked(self.restaurant, self.date), {self.time: 10}
+        )
+
+    def test_warm_reserve_is_a_single_update(self):
+        """Con la fila creada, reservar es un único UPDATE condicional."""
+        self.engine.reserve(self.restaurant, self.date, self.time, 2, 10)
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                self.engine.reserve(self.restaurant, self.date, self.time, 8, 10)
+            )
+        # Lleno: el UPDATE no toca filas y la fila ya existe
+        self.assertFalse(
+            self.engine.reserve(self.restaurant, self.date, self.time, 1, 10)
+        )
+
+    def test_release_returns_capacity(self):
+        self.engine.reserve(self.restaurant, self.date, self.time, 10, 10)
+        self.engine.release(self.restaurant, self.date, self.time, 4)
+        self.assertTrue(
+            self.engine.reserve(self.restaurant, self.date, self.time, 4, 10)
+        )
+        self.assertFalse(
+            self.engine.reserve(self.restaurant, self.date, self.time, 1, 10)
+        )
+
+    def test_stay_is_all_or_nothing(self):
+        """Si un slot de la estancia está lleno no se suma en ninguno."""
+        durations = DiningDurations(default=30)
+        later = time(20, 15)
+        self.engine.reserve(self.restaurant, self.date, later, 8, 10)
+
+        window = [(self.time, 10), (later, 10)]
+        self.assertFalse(
+            self.engine.reserve(
+                self.restaurant, self.date, self.time, 4, 10, window, durations
+            )
+        )
+        self.assertEqual(
+            self.engine.get_booked(self.restaurant, self.date),
+            {later: 8},
+        )
+
+    def test_rebuild_discards_rows(self):
+        self.engine.reserve(self.restaurant, self.date, self.time, 8, 10)
+        self.engine.rebuild(self.restaurant, self.date, self.date)
+        self.assertFalse(SlotLedger.objects.filter(restaurant=self.restaurant).exists())
+
+
+class LedgerConcurrencyTest(TransactionTestCase):
+    """Reservas en paralelo, cada una en su propia conexión y transacción."""
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Concurrent Restaurant")
+        self.engine = LedgerCapacityEngine()
+        self.date = date.today() + timedelta(days=1)
+        self.time = time(20, 0)
+        # Fila creada de antemano: los hilos compiten solo por el UPDATE
+        self.engine.reserve(self.restaurant, self.date, self.time, 0, 10)
+
+    def test_parallel_bookings_never_overbook(self):
+        results = []
+        barrier = threading.Barrier(20)
+
+        def book():
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        results.append(
+                            self.engine.reserve(
+                                self.restaurant, self.date, self.time, 2, 10
+                            )
+                        )
+                        return
+                    except OperationalError:
+                        # SQLite en memoria bloquea la tabla entera en vez de
+                        # esperar: se reintenta como haría un busy timeout
+                        if connection.vendor != "sqlite":
+                            raise
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(
+            self.engine.get_booked(self.restaurant, self.date), {self.time: 10}
+        )
+
+
+@override_settings(AVAILABILITY_CAPACITY_BACKEND="ledger")
+class LedgerReleaseWithOverlappingRulesTest(TransactionTestCase):
+    """La liberación tras el commit no falla si las reglas del día se solapan."""
+
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Ledger Solapado")
+        self.engine = LedgerCapacityEngine()
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=6,
+        )
+        self.client = APIClient()
+
+    def test_cancel_on_a_day_with_overlapping_rules(self):
+        response = self.client.post(
+            "/api/reservations/reservations/",
+            {
+                "restaurant": self.restaurant.id,
+                "customer_name": "Ana",
+                "customer_email": "ana@example.com",
+                "customer_phone": "600000000",
+                "reservation_date": self.monday.isoformat(),
+                "reservation_time": "20:00",
+                "num_people": 4,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        # Fila solapada guardada sin pasar por clean()
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(20, 30),
+            end_time=time(22, 0),
+            capacity=6,
+        )
+
+        with self.assertLogs("availability.services", "WARNING"):
+            cancelled = self.client.post(
+                f"/api/reservations/reservations/{response.data['id']}/cancel/"
+            )
+        self.assertEqual(cancelled.status_code, 200)
+        self.assertEqual(
+            Reservation.objects.get(pk=response.data["id"]).status, "cancelled"
+        )
+        self.assertEqual(
+            self.engine.get_booked(self.restaurant, self.monday), {time(20, 0): 0}
+        )
+
+
+@override_settings(AVAILABILITY_CAPACITY_BACKEND="ledger")
+class LedgerReservationFlowTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Ledger Flow")
+        self.engine = LedgerCapacityEngine()
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=6,
+        )
+        self.client = APIClient()
+
+    def _create(self, num_people):
+        return self.client.post(
+            "/api/reservations/reservations/",
+            {
+                "restaurant": self.restaurant.id,
+                "customer_name": "Ana",
+                "customer_email": "ana@example.com",
+                "customer_phone": "600000000",
+                "reservation_date": self.monday.isoformat(),
+                "reservation_time": "20:00",
+                "num_people": num_people,
+            },
+            format="json",
+        )
+
+    def test_create_and_cancel_keep_ledger_in_sync(self):
+        response = self._create(4)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._create(3).status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/reservations/reservations/{response.data['id']}/cancel/"
+            )
+        self.assertEqual(
+            self.engine.get_booked(self.restaurant, self.monday), {time(20, 0): 0}
+        )
+        self.assertEqual(self._create(6).status_code, 201)
+
+    def _booked(self, slot_time):
+        return self.engine.get_booked(self.restaurant, self.monday).get(slot_time, 0)
+
+    def test_update_moves_counters(self):
+        """Editar la reserva reserva el slot nuevo y libera el anterior."""
+        url = f"/api/reservations/reservations/{self._create(4).data['id']}/"
+
+        def patch(**changes):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.patch(url, changes, format="json")
+
+        # Mismo slot: solo la diferencia
+        self.assertEqual(patch(num_people=6).status_code, 200)
+        self.assertEqual(self._booked(time(20, 0)), 6)
+        self.assertEqual(patch(num_people=3).status_code, 200)
+        self.assertEqual(self._booked(time(20, 0)), 3)
+
+        self.assertEqual(patch(reservation_time="22:00").status_code, 200)
+        self.assertEqual((self._booked(time(20, 0)), self._booked(time(22, 0))), (0, 3))
+
+        # Slot nuevo sin sitio: se rechaza y los contadores no cambian
+        self.assertEqual(self._create(5).status_code, 201)
+        self.assertEqual(patch(reservation_time="20:00").status_code, 400)
+        self.assertEqual((self._booked(time(20, 0)), self._booked(time(22, 0))), (5, 3))
+
+    def test_failed_insert_releases_the_whole_stay(self):
+        """Si perform_create falla se libera cada slot de la estancia."""
+        self.restaurant.dining_duration = 90
+        self.restaurant.save()
+        with mock.patch.object(
+            ReservationViewSet, "perform_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self._create(4)
+
+        stay = [time(20, 0), time(20, 30), time(21, 0)]
+        booked = self.engine.get_booked(self.restaurant, self.monday)
+        self.assertEqual(
+            {slot_time: booked.get(slot_time, 0) for slot_time in stay},
+            dict.fromkeys(stay, 0),
+        )
+        self.assertEqual(self._create(6).status_code, 201)
@@ -0,0 +1,130 @@
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule, ExceptionDate
+from availability.services import AvailabilityService
+from reservations.models import Reservation
+
+NEXT_URL = "/api/availability/availability/next_available/"
+
+
+class NextAvailableTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        self.restaurant = Restaurant.objects.create(name="Next Restaurant")
+        # Abre lunes y miércoles de 20:00 a 21:00 (4 slots)
+        for day_of_week in (0, 2):
+            AvailabilityRule.objects.create(
+                restaurant=self.restaurant,
+                day_of_week=day_of_week,
+                start_time=time(20, 0),
+                end_time=time(21, 0),
+                capacity=4,
+            )
+        self.client = APIClient()
+        self.service = AvailabilityService()
+        # Horario compilado en caché: solo quedan las consultas de ocupación
+        self.service.get_day_slots(self.restaurant, self.monday)
+
+    def _fill(self, date_obj, slot_time, num_people=4):
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=date_obj,
+            reservation_time=slot_time,
+            num_people=num_people,
+            status="confirmed",
+        )
+
+    def _next(self, start_time, limit, max_days=30, num_people=2):
+        return [
+            (date_obj, slot.time)
+            for date_obj, slot in self.service.next_available_slots(
+                self.restaurant, self.monday, start_time, num_people, limit, max_days
+            )
+        ]
+
+    def test_skips_full_and_earlier_slots(self):
+        self._fill(self.monday, time(20, 30))
+        self.assertEqual(
+            self._next(time(20, 15), limit=3),
+            [
+                (self.monday, time(20, 15)),
+                (self.monday, time(20, 45)),
+                (self.monday + timedelta(days=2), time(20, 0)),
+            ],
+        )
+
+    def test_returns_slots_of_the_second_rule(self):
+        """Con comida y cena, desde las 20:00 sale la cena del mismo día."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(13, 0),
+            end_time=time(16, 0),
+            capacity=4,
+        )
+        self._fill(self.monday, time(20, 0))
+        self.assertEqual(
+            self._next(time(16, 0), limit=2),
+            [(self.monday, time(20, 15)), (self.monday, time(20, 30))],
+        )
+        self.assertEqual(
+            self._next(time(15, 45), limit=1), [(self.monday, time(15, 45))]
+        )
+
+    def test_stops_after_the_first_day_with_enough_slots(self):
+        """Un solo lote (el primer día) y ninguna consulta más."""
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self._next(time(20, 0), limit=3)), 3)
+
+    def test_closed_days_do_not_query_occupancy(self):
+        """Cierres y días sin reglas no lanzan consultas de ocupación."""
+        ExceptionDate.objects.create(
+            restaurant=self.restaurant,
+            date=self.monday,
+            reason="Cierre",
+            is_closed=True,
+        )
+        self.service.get_day_slots(self.restaurant, self.monday)
+        wednesday = self.monday + timedelta(days=2)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self._next(time(0, 0), limit=1), [(wednesday, time(20, 0))]
+            )
+
+    def test_horizon_caps_the_scan(self):
+        for offset in (0, 2):
+            for minute in (0, 15, 30, 45):
+                self._fill(self.monday + timedelta(days=offset), time(20, minute))
+        self.assertEqual(self._next(time(0, 0), limit=1, max_days=7), [])
+        self.assertEqual(
+            self._next(time(0, 0), limit=1, max_days=8),
+            [(self.monday + timedelta(days=7), time(20, 0))],
+        )
+
+    @override_settings(AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS=10)
+    def test_endpoint(self):
+        params = {
+            "restaurant_id": self.restaurant.id,
+            "date": self.monday.isoformat(),
+            "time": "20:30",
+            "num_people": 3,
+            "limit": 2,
+        }
+        response = self.client.get(NEXT_URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(slot["date"], slot["time"]) for slot in response.data["slots"]],
+            [(self.monday, time(20, 30)), (self.monday, time(20, 45))],
+        )
+        self.assertEqual(
+            response.data["searched_until"], self.monday + timedelta(days=9)
+        )
+
+        self.assertEqual(
+            self.client.get(NEXT_URL, {**params, "days": 11}).status_code, 400
+        )
+        self.assertEqual(
+            self.client.get(NEXT_URL, {**params, "limit": 0}).status_code, 400
+        )
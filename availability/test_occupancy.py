@@ -0,0 +1,110 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from datetime import date, time, timedelta
+from availability.models import Restaurant, SlotOccupancy
+from reservations.models import Reservation
+from availability.engine.capacity import CapacityEngine
+from availability.engine.occupancy import occupancy_table
+
+
+class SlotOccupancyTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Occupancy Restaurant")
+        self.engine = CapacityEngine()
+        self.date = date.today() + timedelta(days=1)
+        self.time = time(20, 0)
+
+    def _reserve(self, num_people=4, status="confirmed", **kwargs):
+        return Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=kwargs.get("reservation_date", self.date),
+            reservation_time=kwargs.get("reservation_time", self.time),
+            num_people=num_people,
+            status=status,
+        )
+
+    def _stored(self):
+        return occupancy_table.stored(self.restaurant.pk, self.date, self.date)
+
+    def test_create_and_resize_update_the_slot(self):
+        reservation = self._reserve(4)
+        self._reserve(2, status="pending")
+        self._reserve(10, status="cancelled")
+        self.assertEqual(self._stored(), {(self.date, self.time): (6, 2)})
+
+        reservation.num_people = 5
+        reservation.save()
+        self.assertEqual(self._stored(), {(self.date, self.time): (7, 2)})
+        self.assertEqual(
+            self.engine.get_current_occupancy(self.restaurant, self.date, self.time), 7
+        )
+
+    def test_cancel_complete_and_delete_release_the_slot(self):
+        cancelled = self._reserve(4)
+        completed = self._reserve(3)
+        deleted = self._reserve(2, status="pending")
+
+        cancelled.status = "cancelled"
+        cancelled.save()
+        completed.status = "completed"
+        completed.save()
+        self.assertEqual(self._stored(), {(self.date, self.time): (2, 1)})
+
+        deleted.delete()
+        self.assertEqual(self._stored(), {})
+        self.assertEqual(
+            self.engine.get_occupancy_by_time(self.restaurant, self.date), {}
+        )
+
+    def test_moving_a_reservation_moves_its_covers(self):
+        reservation = self._reserve(4)
+        reservation.reservation_time = time(21, 0)
+        reservation.save()
+        self.assertEqual(
+            self.engine.get_occupancy_by_time(self.restaurant, self.date),
+            {time(21, 0): 4},
+        )
+
+    def test_deferred_instance_uses_stored_state(self):
+        """Una reserva cargada con only() descuenta lo que había guardado."""
+        self._reserve(4)
+        reservation = Reservation.objects.only("id", "status").get()
+        reservation.status = "cancelled"
+        reservation.save(update_fields=["status"])
+        self.assertEqual(self._stored(), {})
+
+    def test_capacity_reads_do_not_touch_reservations(self):
+        self._reserve(4)
+        # queryset.update() no emite señales: el resumen no lo ve
+        Reservation.objects.update(num_people=9)
+        self.assertEqual(
+            self.engine.get_current_occupancy(self.restaurant, self.date, self.time), 4
+        )
+        self.assertEqual(
+            occupancy_table.drift(self.restaurant.pk, self.date, self.date),
+            [(self.date, self.time, (9, 1), (4, 1))],
+        )
+
+    def test_command_verifies_and_rebuilds_in_chunks(self):
+        self._reserve(4)
+        later = self.date + timedelta(days=3)
+        self._reserve(2, reservation_date=later)
+        SlotOccupancy.objects.all().delete()
+
+        args = [
+            "rebuild_occupancy",
+            "--start", self.date.isoformat(),
+            "--days", "5",
+            "--chunk-days", "2",
+        ]
+        with self.assertRaises(CommandError):
+            call_command(*args, "--verify", stdout=StringIO())
+
+        call_command(*args, stdout=StringIO())
+        self.assertEqual(
+            self.engine.get_occupancy_in_range(self.restaurant, self.date, later),
+            {self.date: {self.time: 4}, later: {self.time: 2}},
+        )
+        call_command(*args, "--verify", stdout=StringIO())
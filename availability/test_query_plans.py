@@ -0,0 +1,121 @@
+import re
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from availability.models import Season
+from availability.engine.capacity import CapacityEngine
+from availability.engine.occupancy import occupancy_table
+from availability.engine.rules import RuleEngine
+from availability.engine.seasons import SeasonEngine
+from benchmarks.datagen import generate
+
+
+class QueryPlanTest(TestCase):
+    """
+    Captura el SQL real de cada consulta caliente, lo pasa por EXPLAIN y falla
+    si el plan recorre la tabla entera. Sirve tanto en SQLite como en PostgreSQL.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = generate(restaurants=30, reservations=20000, days=90)
+        # Temporadas antiguas para que la tabla no quepa en una sola página
+        Season.objects.bulk_create(
+            [
+                Season(
+                    restaurant_id=restaurant_id,
+                    name=f"Histórico {number}",
+                    start_date=cls.dataset.start_date - timedelta(days=7 * (number + 1)),
+                    end_date=cls.dataset.start_date - timedelta(days=7 * number + 1),
+                    is_active=number % 5 != 0,
+                )
+                for restaurant_id in cls.dataset.restaurant_ids
+                for number in range(150)
+            ]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.restaurant_id = cls.dataset.restaurant_ids[0]
+        cls.date = cls.dataset.start_date + timedelta(days=10)
+
+    def _plans(self, run):
+        """Plan de cada SELECT que ejecuta run(), como texto."""
+        with CaptureQueriesContext(connection) as queries:
+            run()
+
+        plans = []
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if query["sql"].startswith("SELECT"):
+                    cursor.execute(f"{prefix} {query['sql']}")
+                    plans.append("\n".join(str(row[-1]) for row in cursor.fetchall()))
+        self.assertTrue(plans)
+        return plans
+
+    def assertNoSeqScan(self, run, table, index=None):
+        if connection.vendor == "postgresql":
+            seq_scan = re.compile(rf"Seq Scan on {table}\b")
+        else:
+            seq_scan = re.compile(rf"^SCAN {table}$", re.MULTILINE)
+
+        for plan in self._plans(run):
+            self.assertNotRegex(plan, seq_scan)
+            if index:
+                self.assertIn(index, plan)
+
+    def test_occupancy_of_a_day(self):
+        self.assertNoSeqScan(
+            lambda: CapacityEngine().get_occupancy_by_time(self.restaurant_id, self.date),
+            "availability_slotoccupancy",
+        )
+
+    def test_occupancy_of_a_range(self):
+        self.assertNoSeqScan(
+            lambda: CapacityEngine().get_occupancy_in_range(
+                self.restaurant_id, self.date, self.date + timedelta(days=30)
+            ),
+            "availability_slotoccupancy",
+        )
+
+    def test_occupancy_from_reservations(self):
+        """El recálculo de SlotOccupancy usa el índice parcial de reservas activas."""
+        self.assertNoSeqScan(
+            lambda: occupancy_table.compute(
+                self.restaurant_id, self.date, self.date + timedelta(days=6)
+            ),
+            "reservations_reservation",
+            index="reservation_active_slot_idx",
+        )
+
+    def test_seasons_covering_a_date(self):
+        self.assertNoSeqScan(
+            lambda: SeasonEngine().get_seasons_for_restaurants(
+                self.dataset.restaurant_ids[:3], self.date
+            ),
+            "availability_season",
+            index="season_active_range_idx",
+        )
+
+    def test_rules_of_a_weekday(self):
+        self.assertNoSeqScan(
+            lambda: RuleEngine().get_rules_for_restaurants(
+                self.dataset.restaurant_ids[:3], self.date
+            ),
+            "availability_availabilityrule",
+        )
+
+    def test_reservation_list_page(self):
+        """Una página intermedia del listado por restaurante es un rango del índice."""
+        client = APIClient()
+        url = "/api/reservations/reservations/"
+        params = {"restaurant_id": self.restaurant_id, "page_size": 20}
+        next_url = client.get(url, params).data["next"]
+        self.assertNoSeqScan(
+            lambda: client.get(next_url),
+            "reservations_reservation",
+            index="reservation_restaurant_cur_idx",
+        )
@@ -0,0 +1,243 @@
+import threading
+from unittest import mock
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from reservations.views import ReservationViewSet
+from availability.models import Restaurant, AvailabilityRule
+from reservations.models import Reservation
+from availability.engine.redis_capacity import RedisCapacityEngine, memory_store
+
+
+class RedisCapacityEngineTest(TestCase):
+    def setUp(self):
+        memory_store.clear()
+        self.restaurant = Restaurant.objects.create(name="Counter Restaurant")
+        self.engine = RedisCapacityEngine(store=memory_store)
+        self.date = date.today() + timedelta(days=1)
+        self.time = time(20, 0)
+
+    def test_counters_are_seeded_from_database(self):
+        """Un día sin contador se inicializa con las reservas activas."""
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.date,
+            reservation_time=self.time,
+            num_people=4,
+            status="confirmed",
+        )
+        self.assertEqual(
+            self.engine.get_current_occupancy(self.restaurant, self.date, self.time), 4
+        )
+        # Ya inicializado: no vuelve a consultar la base de datos
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.engine.get_occupancy_by_time(self.restaurant, self.date),
+                {self.time: 4},
+            )
+
+    def test_reserve_and_release(self):
+        """reserve() comprueba y suma; release() devuelve la capacidad."""
+        self.assertTrue(
+            self.engine.reserve(self.restaurant, self.date, self.time, 6, 10)
+        )
+        self.assertFalse(
+            self.engine.reserve(self.restaurant, self.date, self.time, 5, 10)
+        )
+        self.engine.release(self.restaurant, self.date, self.time, 6)
+        self.assertTrue(
+            self.engine.reserve(self.restaurant, self.date, self.time, 10, 10)
+        )
+
+    def test_occupancy_for_days_seeds_missing_counters(self):
+        """Los pares sin contador salen de una consulta; luego, sin consultas."""
+        other = Restaurant.objects.create(name="Other Counter Restaurant")
+        Reservation.objects.create(
+            restaurant=other,
+            reservation_date=self.date,
+            reservation_time=self.time,
+            num_people=3,
+            status="confirmed",
+        )
+        days = [(self.restaurant.pk, self.date), (other.pk, self.date)]
+        with self.assertNumQueries(1):
+            occupancy = self.engine.get_occupancy_for_days(days)
+        self.assertEqual(occupancy, {days[0]: {}, days[1]: {self.time: 3}})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.engine.get_occupancy_for_days(days), occupancy)
+
+    def test_reserve_is_atomic_under_threads(self):
+        """Reservas concurrentes nunca superan la capacidad."""
+        self.engine.get_occupancy_by_time(self.restaurant, self.date)
+        results = []
+
+        def book():
+            results.append(
+                self.engine.reserve(self.restaurant, self.date, self.time, 2, 10)
+            )
+
+        threads = [threading.Thread(target=book) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(
+            self.engine.get_current_occupancy(self.restaurant, self.date, self.time), 10
+        )
+
+    def test_rebuild_command_resets_counters(self):
+        """rebuild_capacity_counters reescribe los contadores desde Reservation."""
+        self.engine.reserve(self.restaurant, self.date, self.time, 8, 10)
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.date,
+            reservation_time=self.time,
+            num_people=3,
+            status="pending",
+        )
+
+        with override_settings(AVAILABILITY_CAPACITY_BACKEND="memory"):
+            call_command(
+                "rebuild_capacity_counters",
+                start=self.date.isoformat(),
+                days=1,
+                stdout=open("/dev/null", "w"),
+            )
+
+        self.assertEqual(
+            self.engine.get_current_occupancy(self.restaurant, self.date, self.time), 3
+        )
+
+
+@override_settings(AVAILABILITY_CAPACITY_BACKEND="memory")
+class RedisCapacityReservationFlowTest(TestCase):
+    def setUp(self):
+        memory_store.clear()
+        self.restaurant = Restaurant.objects.create(name="Flow Restaurant")
+        self.engine = RedisCapacityEngine(store=memory_store)
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=6,
+        )
+        self.client = APIClient()
+
+    def _create(self, num_people):
+        return self.client.post(
+            "/api/reservations/reservations/",
+            {
+                "restaurant": self.restaurant.id,
+                "customer_name": "Ana",
+                "customer_email": "ana@example.com",
+                "customer_phone": "600000000",
+                "reservation_date": self.monday.isoformat(),
+                "reservation_time": "20:00",
+                "num_people": num_people,
+            },
+            format="json",
+        )
+
+    def test_create_cancel_and_complete_keep_counters_in_sync(self):
+        response = self._create(4)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            self.engine.get_current_occupancy(
+                self.restaurant, self.monday, time(20, 0)
+            ),
+            4,
+        )
+        self.assertEqual(self._create(3).status_code, 400)
+
+        # La liberación ocurre tras el commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/reservations/reservations/{response.data['id']}/cancel/"
+            )
+        self.assertEqual(
+            self.engine.get_current_occupancy(
+                self.restaurant, self.monday, time(20, 0)
+            ),
+            0,
+        )
+
+        second = self._create(6).data["id"]
+        self.client.post(f"/api/reservations/reservations/{second}/confirm/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/reservations/reservations/{second}/complete/")
+        self.assertEqual(
+            self.engine.get_current_occupancy(
+                self.restaurant, self.monday, time(20, 0)
+            ),
+            0,
+        )
+
+    def test_reserve_with_dining_duration_checks_whole_stay(self):
+        """El script de reserva aplica la misma ventana de estancia."""
+        self.restaurant.dining_duration = 60
+        self.restaurant.save()
+        Reservation.objects.create(
+            restaurant=self.restaurant,
+            reservation_date=self.monday,
+            reservation_time=time(20, 30),
+            num_people=4,
+            status="confirmed",
+        )
+        # 20:00 + 60 min se solapa con la mesa de las 20:30 (4 + 3 > 6)
+        self.assertEqual(self._create(3).status_code, 400)
+        self.assertEqual(self._create(2).status_code, 201)
+
+    def _booked(self, slot_time):
+        return self.engine.get_current_occupancy(
+            self.restaurant, self.monday, slot_time
+        )
+
+    def test_update_moves_counters(self):
+        """Editar la reserva reserva el slot nuevo y libera el anterior."""
+        url = f"/api/reservations/reservations/{self._create(4).data['id']}/"
+
+        def patch(**changes):
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.patch(url, changes, format="json")
+
+        # Mismo slot: solo la diferencia
+        self.assertEqual(patch(num_people=6).status_code, 200)
+        self.assertEqual(self._booked(time(20, 0)), 6)
+        self.assertEqual(patch(num_people=3).status_code, 200)
+        self.assertEqual(self._booked(time(20, 0)), 3)
+
+        self.assertEqual(patch(reservation_time="22:00").status_code, 200)
+        self.assertEqual((self._booked(time(20, 0)), self._booked(time(22, 0))), (0, 3))
+
+        # Slot nuevo sin sitio: se rechaza y los contadores no cambian
+        self.assertEqual(self._create(5).status_code, 201)
+        self.assertEqual(patch(reservation_time="20:00").status_code, 400)
+        self.assertEqual((self._booked(time(20, 0)), self._booked(time(22, 0))), (5, 3))
+
+    def test_failed_insert_releases_the_whole_stay(self):
+        """Si perform_create falla se libera cada slot de la estancia."""
+        self.restaurant.dining_duration = 90
+        self.restaurant.save()
+        with mock.patch.object(
+            ReservationViewSet, "perform_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self._create(4)
+
+        stay = [time(20, 0), time(20, 30), time(21, 0)]
+        self.assertEqual(
+            {
+                slot_time: self.engine.get_current_occupancy(
+                    self.restaurant, self.monday, slot_time
+                )
+                for slot_time in stay
+            },
+            dict.fromkeys(stay, 0),
+        )
+        self.assertEqual(self._create(6).status_code, 201)
@@ -0,0 +1,124 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant
+from reservations import export
+from reservations.models import Reservation
+
+EXPORT_URL = "/api/reservations/reservations/export/"
+
+
+class ReservationExportTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Export Restaurant")
+        self.other = Restaurant.objects.create(name="Other Restaurant")
+        self.start = date.today() + timedelta(days=1)
+        reservations = []
+        for day in range(10):
+            for restaurant in (self.restaurant, self.other):
+                reservations.append(
+                    Reservation(
+                        restaurant=restaurant,
+                        customer_name="José, \"Pepe\"",
+                        customer_email="pepe@example.com",
+                        customer_phone="600000000",
+                        reservation_date=self.start + timedelta(days=day),
+                        reservation_time=time(20, 30),
+                        num_people=2,
+                        status="cancelled" if day % 2 else "confirmed",
+                    )
+                )
+        Reservation.objects.bulk_create(reservations)
+        self.client = APIClient()
+
+    def _content(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_csv_applies_the_list_filters(self):
+        response = self.client.get(
+            EXPORT_URL,
+            {
+                "restaurant_id": self.restaurant.id,
+                "status": "confirmed",
+                "date_from": (self.start + timedelta(days=2)).isoformat(),
+                "date_to": (self.start + timedelta(days=6)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="reservations.csv"', response["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(self._content(response).decode())))
+        self.assertEqual(
+            [row["reservation_date"] for row in rows],
+            [(self.start + timedelta(days=day)).isoformat() for day in (2, 4, 6)],
+        )
+        self.assertEqual(rows[0]["customer_name"], "José, \"Pepe\"")
+        self.assertEqual(rows[0]["reservation_time"], "20:30:00")
+        self.assertEqual(rows[0]["restaurant"], str(self.restaurant.id))
+
+    def test_ndjson_with_gzip(self):
+        response = self.client.get(EXPORT_URL, {"output": "ndjson", "gzip": "true"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        lines = gzip.decompress(self._content(response)).decode().splitlines()
+        self.assertEqual(len(lines), 20)
+        row = json.loads(lines[0])
+        self.assertEqual(set(row), set(export.EXPORT_FIELDS))
+        self.assertEqual(row["reservation_date"], self.start.isoformat())
+
+    def test_streams_in_bounded_batches(self):
+        """La cabecera sale sola y el resto en trozos de unos BATCH_SIZE bytes."""
+        with self.settings(RESERVATIONS_EXPORT_CHUNK_SIZE=3):
+            original = export.BATCH_SIZE
+            export.BATCH_SIZE = 300
+            try:
+                response = self.client.get(EXPORT_URL)
+                chunks = list(response.streaming_content)
+            finally:
+                export.BATCH_SIZE = original
+        self.assertEqual(chunks[0].decode().splitlines(), [",".join(export.EXPORT_FIELDS)])
+        self.assertGreater(len(chunks), 3)
+        self.assertTrue(all(len(chunk) < 300 + 200 for chunk in chunks))
+
+    def test_query_runs_while_streaming(self):
+        """Construir la respuesta no lee filas: la consulta ocurre al consumirla."""
+        with self.assertNumQueries(0):
+            response = self.client.get(EXPORT_URL)
+        with self.assertNumQueries(1):
+            self._content(response)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(EXPORT_URL, {"output": "xml"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(EXPORT_URL, {"date_from": "2026-13-01"}).status_code, 400
+        )
+
+    def test_command_writes_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "reservations.csv.gz")
+            call_command(
+                "export_reservations",
+                "--restaurant", str(self.other.id),
+                "--gzip",
+                "--output", path,
+                stderr=io.StringIO(),
+            )
+            with gzip.open(path, "rt") as exported:
+                rows = list(csv.DictReader(exported))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual({row["restaurant"] for row in rows}, {str(self.other.id)})
+
+        stdout = io.StringIO()
+        call_command("export_reservations", "--format", "ndjson", "--status", "cancelled", stdout=stdout)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 10)
+
+        with self.assertRaises(CommandError):
+            call_command("export_reservations", "--date-to", "ayer", stdout=io.StringIO())
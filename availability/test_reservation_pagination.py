@@ -0,0 +1,130 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant
+from reservations.models import Reservation
+
+LIST_URL = "/api/reservations/reservations/"
+MY_URL = "/api/reservations/reservations/my_reservations/"
+
+
+class ReservationCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Cursor Restaurant")
+        self.other = Restaurant.objects.create(name="Other Restaurant")
+        self.start = date.today() + timedelta(days=1)
+        # Varias reservas con la misma fecha y hora: el desempate es el id
+        reservations = []
+        for day in range(3):
+            for slot in (time(20, 0), time(20, 0), time(21, 0)):
+                for restaurant, email in (
+                    (self.restaurant, "ana@example.com"),
+                    (self.other, "luis@example.com"),
+                ):
+                    reservations.append(
+                        Reservation(
+                            restaurant=restaurant,
+                            customer_name="Cliente",
+                            customer_email=email,
+                            customer_phone="600000000",
+                            reservation_date=self.start + timedelta(days=day),
+                            reservation_time=slot,
+                            num_people=2,
+                            status="confirmed" if day else "pending",
+                        )
+                    )
+        Reservation.objects.bulk_create(reservations)
+        self.client = APIClient()
+
+    def _walk(self, url, params):
+        """Sigue los enlaces next y retorna (ids de cada página, última respuesta)."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([row["id"] for row in response.data["results"]])
+            if not response.data["next"]:
+                return pages, response
+            response = self.client.get(response.data["next"])
+
+    def _expected(self, **filters):
+        return list(
+            Reservation.objects.filter(**filters)
+            .order_by("reservation_date", "reservation_time", "id")
+            .values_list("id", flat=True)
+        )
+
+    def test_walks_every_row_once_in_order(self):
+        pages, _ = self._walk(LIST_URL, {"page_size": 4})
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 4, 2])
+        self.assertEqual(sum(pages, []), self._expected())
+
+    def test_filters_and_my_reservations_are_paginated(self):
+        pages, _ = self._walk(
+            LIST_URL,
+            {"restaurant_id": self.restaurant.id, "status": "confirmed", "page_size": 4},
+        )
+        self.assertEqual(
+            sum(pages, []), self._expected(restaurant=self.restaurant, status="confirmed")
+        )
+
+        pages, _ = self._walk(MY_URL, {"email": "luis@example.com", "page_size": 2})
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(sum(pages, []), self._expected(customer_email="luis@example.com"))
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get(LIST_URL, {"page_size": 5})
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(back.data["previous"])
+        self.assertIsNotNone(back.data["next"])
+
+    def test_pages_do_not_count_or_offset(self):
+        """Una sola consulta por página, sin COUNT(*) ni OFFSET."""
+        first = self.client.get(LIST_URL, {"page_size": 3})
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(first.data["next"])
+        self.assertEqual(len(response.data["results"]), 3)
+        sql = queries.captured_queries[0]["sql"].upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("count", response.data)
+
+    def test_count_is_opt_in(self):
+        response = self.client.get(
+            LIST_URL, {"restaurant_id": self.restaurant.id, "include_count": "true"}
+        )
+        self.assertIsInstance(response.data["count"], int)
+        if connection.vendor != "postgresql":
+            # Fuera de PostgreSQL es un COUNT(*) exacto
+            self.assertEqual(response.data["count"], 9)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(LIST_URL, {"cursor": "no-es-un-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_fast_list_matches_model_serializer(self):
+        """La ruta ligera produce exactamente los mismos bytes, página a página."""
+        Reservation.objects.filter(status="pending").update(
+            special_requests="Mesa junto a la ventana", status="cancelled"
+        )
+        for url, params in (
+            (LIST_URL, {"page_size": 4}),
+            (LIST_URL, {"restaurant_id": self.other.id, "page_size": 5}),
+            (MY_URL, {"email": "ana@example.com", "page_size": 3}),
+        ):
+            fast = self.client.get(url, params)
+            with override_settings(RESERVATIONS_FAST_LIST=False):
+                model = self.client.get(url, params)
+            while True:
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, model.content)
+                if not fast.data["next"]:
+                    break
+                fast = self.client.get(fast.data["next"])
+                with override_settings(RESERVATIONS_FAST_LIST=False):
+                    model = self.client.get(model.data["next"])
+        self.assertEqual(fast.data["results"][-1]["status_display"], "Confirmada")
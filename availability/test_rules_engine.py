@@ -1,8 +1,14 @@
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from datetime import date, time, timedelta
 from availability.models import Restaurant, AvailabilityRule
+from rest_framework.test import APIClient
+from availability.checks import check_overlapping_rules
+from availability.engine.indexes import OverlappingRulesError
 from availability.engine.rules import RuleEngine
 
+RULES_URL = "/api/availability/availability-rules/"
+
 
 class RuleEngineTest(TestCase):
     def setUp(self):
@@ -47,3 +53,200 @@ class RuleEngineTest(TestCase):
         self.assertIsNone(
             self.engine.get_rule(self.restaurant, self.monday, time_obj=time(18, 0))
         )
+
+    def _rule(self, start, end, capacity=10):
+        return AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=start,
+            end_time=end,
+            capacity=capacity,
+        )
+
+    def test_bisect_lookup_for_many_slots(self):
+        """Consultas en bloque desde el índice compilado, sin consultas a la BD."""
+        lunch = self._rule(time(13, 0), time(16, 0))
+        dinner = self._rule(time(20, 0), time(23, 0))
+        slots = [
+            (self.monday, time(12, 59)),
+            (self.monday, time(13, 0)),
+            (self.monday, time(16, 0)),
+            (self.monday + timedelta(days=7), time(22, 45)),
+            (self.monday + timedelta(days=1), time(21, 0)),
+        ]
+        self.engine.get_rules_for_day(self.restaurant, self.monday)
+        with self.assertNumQueries(0):
+            rules = self.engine.get_rules_for_slots(self.restaurant, slots)
+        self.assertEqual(
+            [rule and rule.id for rule in rules],
+            [None, lunch.id, None, dinner.id, None],
+        )
+
+    def test_overlapping_rules_invalidate_only_their_day(self):
+        """Filas solapadas ya guardadas: falla ese día, el resto del horario no."""
+        self._rule(time(12, 0), time(16, 0))
+        self._rule(time(15, 0), time(18, 0))
+        tuesday_rule = AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=1,
+            start_time=time(12, 0),
+            end_time=time(16, 0),
+            capacity=10,
+        )
+        tuesday = self.monday + timedelta(days=1)
+
+        with self.assertRaisesMessage(OverlappingRulesError, "Reglas solapadas"):
+            self.engine.get_rule(self.restaurant, self.monday, time(15, 30))
+        with self.assertRaises(OverlappingRulesError):
+            self.engine.get_rule(self.restaurant, self.monday)
+        with self.assertRaises(OverlappingRulesError):
+            self.engine.get_rule(
+                self.restaurant, self.monday, time(15, 30), use_lock=True
+            )
+        self.assertEqual(
+            self.engine.get_rule(self.restaurant, tuesday, time(13, 0)).id,
+            tuesday_rule.id,
+        )
+
+        # La búsqueda por ciudad recibe el día marcado, sin excepción
+        rules = self.engine.get_rules_for_restaurants([self.restaurant.id], self.monday)
+        self.assertIn("Reglas solapadas", rules[self.restaurant.id].error)
+
+    def test_model_clean_rejects_overlapping_rules(self):
+        self._rule(time(12, 0), time(16, 0))
+        rule = AvailabilityRule(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(15, 0),
+            end_time=time(18, 0),
+            capacity=4,
+        )
+        with self.assertRaisesMessage(ValidationError, "Se solapa con la regla"):
+            rule.full_clean()
+
+        rule.start_time = time(16, 0)
+        rule.full_clean()
+        rule.start_time, rule.end_time = time(18, 0), time(17, 0)
+        with self.assertRaises(ValidationError):
+            rule.full_clean()
+
+    def test_database_check_reports_overlapping_rows(self):
+        self._rule(time(12, 0), time(16, 0))
+        later = self._rule(time(15, 0), time(18, 0))
+        self.assertEqual(check_overlapping_rules(databases=None), [])
+
+        errors = check_overlapping_rules(databases=["default"])
+        self.assertEqual([error.id for error in errors], ["availability.E001"])
+        self.assertEqual(errors[0].obj, later)
+
+    def test_api_rejects_overlapping_rules(self):
+        self._rule(time(12, 0), time(16, 0))
+        client = APIClient()
+        payload = {
+            "restaurant": self.restaurant.id,
+            "day_of_week": 0,
+            "start_time": "15:00",
+            "end_time": "18:00",
+            "capacity": 4,
+        }
+
+        def post(**changes):
+            return client.post(RULES_URL, {**payload, **changes}, format="json")
+
+        self.assertEqual(post().status_code, 400)
+        self.assertEqual(post(start_time="16:00").status_code, 201)
+        # Una regla no disponible no entra en el horario
+        self.assertEqual(post(is_available=False).status_code, 201)
+
+
+class OverlappingRulesApiTest(TestCase):
+    """Un día con reglas solapadas guardadas responde 409 sin tumbar el resto."""
+
+    def setUp(self):
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        self.client = APIClient()
+        self.broken = Restaurant.objects.create(name="Solapado", city="Madrid")
+        for start, end in ((time(19, 0), time(22, 0)), (time(21, 0), time(23, 0))):
+            AvailabilityRule.objects.create(
+                restaurant=self.broken,
+                day_of_week=0,
+                start_time=start,
+                end_time=end,
+                capacity=10,
+            )
+        AvailabilityRule.objects.create(
+            restaurant=self.broken,
+            day_of_week=1,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=10,
+        )
+        self.healthy = Restaurant.objects.create(name="Correcto", city="Madrid")
+        AvailabilityRule.objects.create(
+            restaurant=self.healthy,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=10,
+        )
+
+    def test_check_date_returns_conflict_for_the_invalid_day_only(self):
+        url = "/api/availability/availability/check_date/"
+        params = {"restaurant_id": self.broken.id, "date": self.monday.isoformat()}
+
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["detail"].code, "invalid_schedule")
+        self.assertIn("Reglas solapadas", str(response.data["detail"]))
+
+        async_response = self.client.get("/api/availability/async/check_date/", params)
+        self.assertEqual(async_response.status_code, 409)
+
+        tuesday = (self.monday + timedelta(days=1)).isoformat()
+        self.assertEqual(
+            self.client.get(url, {**params, "date": tuesday}).status_code, 200
+        )
+
+    def test_range_and_search_skip_the_invalid_day(self):
+        with self.assertLogs("availability.services", "WARNING"):
+            response = self.client.get(
+                "/api/availability/availability/check_range/",
+                {
+                    "restaurant_id": self.broken.id,
+                    "start": self.monday.isoformat(),
+                    "end": (self.monday + timedelta(days=1)).isoformat(),
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [day["is_open"] for day in response.data["days"]], [False, True]
+        )
+
+        with self.assertLogs("availability.services", "WARNING") as logs:
+            response = self.client.get(
+                "/api/availability/availability/search/",
+                {"city": "madrid", "date": self.monday.isoformat()},
+            )
+        self.assertIn("omitido", logs.output[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["restaurant_id"] for result in response.data["results"]],
+            [self.healthy.id],
+        )
+
+    def test_reservation_on_invalid_day_returns_conflict(self):
+        response = self.client.post(
+            "/api/reservations/reservations/",
+            {
+                "restaurant": self.broken.id,
+                "customer_name": "Ana",
+                "customer_email": "ana@example.com",
+                "customer_phone": "600000000",
+                "reservation_date": self.monday.isoformat(),
+                "reservation_time": "20:00",
+                "num_people": 2,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
@@ -0,0 +1,126 @@
+import os
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from datetime import date, time, timedelta
+from availability.models import Restaurant, AvailabilityRule, Season, ExceptionDate
+from availability.engine.schedule import CompiledSchedule, schedule_cache
+from availability.services import AvailabilityService
+from config.cache import LOCMEM_CACHE, REDIS_CACHE, cache_settings
+
+
+class CompiledScheduleTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Schedule Restaurant")
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+
+    def test_compile_builds_sorted_weekday_table(self):
+        """Las reglas quedan agrupadas por día y ordenadas por hora de inicio."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(23, 0),
+            capacity=20,
+        )
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(12, 0),
+            end_time=time(16, 0),
+            capacity=10,
+        )
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=3,
+            start_time=time(12, 0),
+            end_time=time(16, 0),
+            capacity=10,
+            is_available=False,
+        )
+
+        with self.assertNumQueries(4):
+            schedule = CompiledSchedule.compile(self.restaurant.id, "v1")
+
+        self.assertEqual(
+            [rule.start_time for rule in schedule.get_rules(0)],
+            [time(12, 0), time(19, 0)],
+        )
+        self.assertEqual(schedule.get_rules(3), ())
+        with self.assertRaises(AttributeError):
+            schedule.version = "v2"
+
+    def test_warm_schedule_needs_no_queries(self):
+        """Un horario en caché no vuelve a consultar la base de datos."""
+        ExceptionDate.objects.create(
+            restaurant=self.restaurant,
+            date=self.monday,
+            reason="Cierre",
+            is_closed=True,
+        )
+        schedule_cache.get(self.restaurant)
+
+        with self.assertNumQueries(0):
+            schedule = schedule_cache.get(self.restaurant)
+        self.assertTrue(schedule.get_exception(self.monday).is_closed)
+
+    def test_signals_invalidate_schedule(self):
+        """Guardar o borrar reglas, temporadas o excepciones cambia la versión."""
+        version = schedule_cache.get(self.restaurant).version
+
+        season = Season.objects.create(
+            restaurant=self.restaurant,
+            name="Summer",
+            start_date=self.monday,
+            end_date=self.monday,
+            capacity_multiplier=2.0,
+        )
+        schedule = schedule_cache.get(self.restaurant)
+        self.assertNotEqual(schedule.version, version)
+        self.assertEqual(len(schedule.seasons), 1)
+
+        season.delete()
+        self.assertEqual(schedule_cache.get(self.restaurant).seasons, ())
+
+    def test_warm_check_slot_only_queries_occupancy(self):
+        """check_availability en caliente: solo la consulta de ocupación."""
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(12, 0),
+            end_time=time(16, 0),
+            capacity=10,
+        )
+        service = AvailabilityService()
+        service.check_availability(self.restaurant, self.monday, time(13, 0), 2)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                service.check_availability(self.restaurant, self.monday, time(13, 0), 2)
+            )
+
+
+class CacheSettingsTest(SimpleTestCase):
+    """La invalidación de horarios necesita una caché compartida entre workers."""
+
+    def _cache(self, require_redis=False, **env):
+        names = ("REDIS_URL", "CACHE_BACKEND", "CACHE_LOCATION")
+        environ = {k: v for k, v in os.environ.items() if k not in names}
+        with mock.patch.dict(os.environ, {**environ, **env}, clear=True):
+            return cache_settings(require_redis)["default"]
+
+    def test_redis_url_selects_shared_cache(self):
+        self.assertEqual(self._cache()["BACKEND"], LOCMEM_CACHE)
+        cache = self._cache(REDIS_URL="redis://redis:6379/0")
+        self.assertEqual(cache["BACKEND"], REDIS_CACHE)
+        # Otra base de datos que la de los contadores de capacidad
+        self.assertEqual(cache["LOCATION"], "redis://redis:6379/1")
+        self.assertEqual(
+            self._cache(require_redis=True)["LOCATION"], "redis://localhost:6379/1"
+        )
+
+    def test_explicit_backend_wins(self):
+        cache = self._cache(
+            REDIS_URL="redis://redis:6379/0", CACHE_BACKEND=LOCMEM_CACHE
+        )
+        self.assertEqual(cache, {"BACKEND": LOCMEM_CACHE, "LOCATION": ""})
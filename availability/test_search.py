@@ -0,0 +1,146 @@
+from django.test import TestCase
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule, Season, ExceptionDate
+from availability.services import AvailabilityService
+from reservations.models import Reservation
+
+SEARCH_URL = "/api/availability/availability/search/"
+
+
+class SearchAvailabilityTest(TestCase):
+    def setUp(self):
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        self.client = APIClient()
+
+    def _restaurant(self, name, city="Madrid", capacity=10, start=time(19, 0)):
+        restaurant = Restaurant.objects.create(name=name, city=city)
+        AvailabilityRule.objects.create(
+            restaurant=restaurant,
+            day_of_week=0,
+            start_time=start,
+            end_time=time(23, 0),
+            capacity=capacity,
+        )
+        return restaurant
+
+    def _search(self, **params):
+        return self.client.get(
+            SEARCH_URL,
+            {"city": "madrid", "date": self.monday.isoformat(), **params},
+        )
+
+    def test_filters_by_city_capacity_and_window(self):
+        full = self._restaurant("Llena")
+        Reservation.objects.create(
+            restaurant=full,
+            reservation_date=self.monday,
+            reservation_time=time(21, 0),
+            num_people=8,
+            status="confirmed",
+        )
+        self._restaurant("Tarde", start=time(22, 0))
+        self._restaurant("Lejos", city="Sevilla")
+        open_one = self._restaurant("Libre")
+
+        response = self._search(time_from="21:00", time_to="21:00", num_people=4)
+        self.assertEqual(
+            [result["restaurant_id"] for result in response.data["results"]],
+            [open_one.id],
+        )
+
+    def test_ranked_by_distance_to_preferred_time(self):
+        late = self._restaurant("B tarde", start=time(21, 30))
+        early = self._restaurant("A pronto", start=time(20, 0))
+        Reservation.objects.create(
+            restaurant=early,
+            reservation_date=self.monday,
+            reservation_time=time(21, 0),
+            num_people=10,
+            status="confirmed",
+        )
+        exact = self._restaurant("C exacto")
+
+        response = self._search(time_from="20:00", time_to="22:00", time="21:00")
+        self.assertEqual(
+            [result["restaurant_id"] for result in response.data["results"]],
+            [exact.id, early.id, late.id],
+        )
+        self.assertEqual(response.data["results"][0]["best_time"], time(21, 0))
+
+    def test_matches_per_restaurant_day_path(self):
+        """Excepciones y temporadas dan el mismo resultado que get_day_slots."""
+        special = self._restaurant("Especial")
+        ExceptionDate.objects.create(
+            restaurant=special, date=self.monday, reason="Evento", capacity=3
+        )
+        seasonal = self._restaurant("Temporada")
+        Season.objects.create(
+            restaurant=seasonal,
+            name="Alta",
+            start_date=self.monday,
+            end_date=self.monday,
+            capacity_multiplier=2.0,
+        )
+        closed = self._restaurant("Cerrado")
+        ExceptionDate.objects.create(
+            restaurant=closed, date=self.monday, reason="Cierre", is_closed=True
+        )
+
+        service = AvailabilityService()
+        results = service.search_availability(
+            Restaurant.objects.filter(city="Madrid"),
+            self.monday,
+            time(0, 0),
+            time(23, 59),
+            num_people=1,
+        )
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(
+                result["slots"],
+                service.get_day_slots(result["restaurant"], self.monday),
+            )
+
+    def test_finds_slots_of_every_rule_of_the_day(self):
+        """Comida y cena: la búsqueda de la cena no se queda en la primera regla."""
+        restaurant = self._restaurant("Dos turnos", start=time(20, 0))
+        AvailabilityRule.objects.create(
+            restaurant=restaurant,
+            day_of_week=0,
+            start_time=time(13, 0),
+            end_time=time(16, 0),
+            capacity=10,
+        )
+
+        response = self._search(time_from="20:30", time_to="21:30", num_people=4)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["best_time"], time(20, 30))
+
+        slot = AvailabilityService().search_availability(
+            Restaurant.objects.all(), self.monday, time(21, 0), time(21, 0), 4
+        )[0]["best_slot"]
+        self.assertTrue(
+            AvailabilityService().check_availability(
+                restaurant, self.monday, slot.time, 4
+            )
+        )
+
+    def test_query_count_does_not_grow_with_restaurants(self):
+        for number in range(3):
+            self._restaurant(f"R{number}")
+        small = int(self._search()["X-Query-Count"])
+
+        for number in range(3, 15):
+            self._restaurant(f"R{number}")
+        response = self._search()
+        self.assertEqual(int(response["X-Query-Count"]), small)
+        self.assertEqual(response.data["count"], 15)
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_requires_city_and_date(self):
+        self.assertEqual(self.client.get(SEARCH_URL).status_code, 400)
+        self.assertEqual(
+            self._search(time_from="22:00", time_to="21:00").status_code, 400
+        )
@@ -40,3 +40,68 @@ class SeasonEngineTest(TestCase):
         )
         capacity = self.engine.apply_multiplier(self.restaurant, self.today, 100)
         self.assertEqual(capacity, 100)
+
+    def test_overlapping_seasons_resolve_by_priority_then_specificity(self):
+        """Solapamiento: gana la mayor prioridad; a igualdad, el rango más corto."""
+        Season.objects.create(
+            restaurant=self.restaurant,
+            name="Summer",
+            start_date=self.today - timedelta(days=30),
+            end_date=self.today + timedelta(days=30),
+            capacity_multiplier=1.5,
+        )
+        Season.objects.create(
+            restaurant=self.restaurant,
+            name="Festival",
+            start_date=self.today,
+            end_date=self.today + timedelta(days=2),
+            capacity_multiplier=2.0,
+        )
+        # Más específica gana a igual prioridad
+        self.assertEqual(
+            self.engine.apply_multiplier(self.restaurant, self.today, 100), 200
+        )
+        # Fuera del festival vuelve a aplicar la temporada larga
+        self.assertEqual(
+            self.engine.apply_multiplier(
+                self.restaurant, self.today + timedelta(days=3), 100
+            ),
+            150,
+        )
+
+        Season.objects.create(
+            restaurant=self.restaurant,
+            name="Renovation",
+            start_date=self.today - timedelta(days=60),
+            end_date=self.today + timedelta(days=60),
+            capacity_multiplier=0.5,
+            priority=10,
+        )
+        self.assertEqual(
+            self.engine.apply_multiplier(self.restaurant, self.today, 100), 50
+        )
+
+    def test_get_seasons_by_date_matches_single_lookups(self):
+        """Resolución en bloque: mismo resultado que consultar día a día, sin queries."""
+        for offset, span, multiplier in [(0, 10, 1.5), (5, 3, 2.0), (20, 40, 0.8)]:
+            Season.objects.create(
+                restaurant=self.restaurant,
+                name=f"S{offset}",
+                start_date=self.today + timedelta(days=offset),
+                end_date=self.today + timedelta(days=offset + span),
+                capacity_multiplier=multiplier,
+            )
+        start = self.today - timedelta(days=5)
+        end = self.today + timedelta(days=400)
+        self.engine.get_season(self.restaurant, start)
+
+        with self.assertNumQueries(0):
+            by_date = self.engine.get_seasons_by_date(self.restaurant, start, end)
+
+        date_obj = start
+        while date_obj <= end:
+            self.assertEqual(
+                by_date.get(date_obj), self.engine.get_season(self.restaurant, date_obj)
+            )
+            date_obj += timedelta(days=1)
+        self.assertEqual(by_date[self.today + timedelta(days=6)].name, "S5")
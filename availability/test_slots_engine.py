@@ -25,3 +25,18 @@ class SlotGeneratorTest(TestCase):
         end = time(10, 0)
         slots = self.engine.generate_slots(self.date, start, end)
         self.assertEqual(len(slots), 0)
+
+    def test_grid_is_memoized_and_read_only(self):
+        """La misma franja comparte una rejilla compacta de minutos del día."""
+        grid = self.engine.grid(time(20, 0), time(21, 0), 20)
+        self.assertEqual(list(grid), [1200, 1220, 1240])
+        self.assertIs(grid, self.engine.grid(time(20, 0), time(21, 0), 20))
+        self.assertEqual(grid.itemsize, 2)
+        with self.assertRaises(TypeError):
+            grid[0] = 0
+
+    def test_generate_slots_reuses_time_objects(self):
+        first = self.engine.generate_slots(self.date, time(20, 0), time(21, 0))
+        second = self.engine.generate_slots(self.date, time(20, 0), time(21, 0))
+        self.assertEqual(first, [time(20, 0), time(20, 15), time(20, 30), time(20, 45)])
+        self.assertTrue(all(a is b for a, b in zip(first, second)))
@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import date, datetime, time, timezone
+from django.test import SimpleTestCase
+
+import migrate_sqlite_to_postgres as migration
+
+
+class SqliteMigrationTest(SimpleTestCase):
+    """Partes del script que no necesitan PostgreSQL."""
+
+    def setUp(self):
+        self.sqlite = sqlite3.connect(":memory:")
+        self.sqlite.executescript(
+            """
+            CREATE TABLE restaurant (id integer PRIMARY KEY, name text);
+            CREATE TABLE rule (id integer PRIMARY KEY,
+                               restaurant_id integer REFERENCES restaurant (id));
+            CREATE TABLE reservation (id integer PRIMARY KEY,
+                                      restaurant_id integer REFERENCES restaurant (id),
+                                      rule_id integer REFERENCES rule (id));
+            CREATE TABLE tag (id integer PRIMARY KEY, parent_id integer REFERENCES tag (id));
+            """
+        )
+        self.addCleanup(self.sqlite.close)
+
+    def test_load_levels_follow_foreign_keys(self):
+        tables = ["reservation", "rule", "restaurant", "tag"]
+        self.assertEqual(
+            migration.get_load_levels(self.sqlite, tables),
+            [["restaurant", "tag"], ["rule"], ["reservation"]],
+        )
+
+    def test_chunks_resume_after_a_rowid(self):
+        self.sqlite.executemany(
+            "INSERT INTO restaurant VALUES (?, ?)", [(i, f"R{i}") for i in range(1, 8)]
+        )
+        chunks = list(migration.iter_chunks(self.sqlite, "restaurant", ["id", "name"], 2, 2))
+        self.assertEqual(
+            [[rowid for rowid, _ in chunk] for chunk in chunks], [[3, 4], [5, 6], [7]]
+        )
+        self.assertEqual(chunks[0][0][1], (3, "R3"))
+
+    def test_copy_value_escapes_the_text_format(self):
+        self.assertEqual(migration.copy_value(None), "\\N")
+        self.assertEqual(migration.copy_value("a\tb\nc\\d"), "a\\tb\\nc\\\\d")
+        self.assertEqual(migration.copy_value(b"\x01\xff"), "\\\\x01ff")
+
+    def test_checksum_matches_sqlite_text_and_postgres_types(self):
+        """Lo que guarda SQLite y lo que devuelve psycopg2 dan el mismo checksum."""
+        pg_types = [
+            "bigint", "boolean", "timestamp with time zone", "date",
+            "time without time zone", "double precision", "text",
+        ]
+        sqlite_row = (1, 1, "2026-03-01 19:30:00.250000", "2026-03-01", "20:30:00", 1.5, None)
+        pg_row = (
+            1,
+            True,
+            datetime(2026, 3, 1, 19, 30, 0, 250000, tzinfo=timezone.utc),
+            date(2026, 3, 1),
+            time(20, 30),
+            1.5,
+            None,
+        )
+        self.assertEqual(
+            migration.rows_checksum([sqlite_row], pg_types),
+            migration.rows_checksum([pg_row], pg_types),
+        )
+        changed = pg_row[:2] + (pg_row[2].replace(second=1),) + pg_row[3:]
+        self.assertNotEqual(
+            migration.rows_checksum([sqlite_row], pg_types),
+            migration.rows_checksum([changed], pg_types),
+        )
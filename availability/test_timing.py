@@ -0,0 +1,69 @@
+from django.test import TestCase, override_settings
+from datetime import date, time, timedelta
+from rest_framework.test import APIClient
+from availability.models import Restaurant, AvailabilityRule
+from availability.engine.rules import RuleEngine
+from availability.engine.timing import RequestTiming
+
+
+class ServerTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Timing Restaurant")
+        today = date.today()
+        self.monday = today - timedelta(days=today.weekday()) + timedelta(days=7)
+        AvailabilityRule.objects.create(
+            restaurant=self.restaurant,
+            day_of_week=0,
+            start_time=time(19, 0),
+            end_time=time(21, 0),
+            capacity=10,
+        )
+
+    def _check_date(self):
+        return APIClient().get(
+            "/api/availability/availability/check_date/",
+            {"restaurant_id": self.restaurant.id, "date": self.monday.isoformat()},
+        )
+
+    def test_disabled_by_default(self):
+        self.assertNotIn("Server-Timing", self._check_date())
+
+    @override_settings(AVAILABILITY_TIMING_ENABLED=True)
+    def test_header_and_log_line(self):
+        with self.assertLogs("availability.timing", level="INFO") as logs:
+            response = self._check_date()
+
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "exceptions;dur=", "rules;dur=", "capacity;dur="):
+            self.assertIn(metric, header)
+        self.assertTrue(header.endswith(tuple("0123456789")))
+        self.assertIn(
+            '"path": "/api/availability/availability/check_date/"', logs.output[0]
+        )
+        self.assertIn('"queries":', logs.output[0])
+
+    @override_settings(
+        AVAILABILITY_TIMING_ENABLED=True, AVAILABILITY_TIMING_SAMPLE_RATE=0
+    )
+    def test_unsampled_requests_are_not_measured(self):
+        self.assertNotIn("Server-Timing", self._check_date())
+
+
+class EngineTimingTest(TestCase):
+    def test_nested_calls_are_counted_once(self):
+        """get_rule llama a otros métodos del motor: solo cuenta la llamada externa."""
+        restaurant = Restaurant.objects.create(name="Nested")
+        timing = RequestTiming().activate()
+        try:
+            RuleEngine().get_rule(restaurant, date.today(), time(20, 0))
+        finally:
+            timing.deactivate()
+        self.assertEqual(list(timing.engines), ["rules"])
+        self.assertNotIn("rules", timing._active)
+
+    def test_inactive_timing_does_not_record(self):
+        timing = RequestTiming()
+        RuleEngine().get_rules_for_day(
+            Restaurant.objects.create(name="Off"), date.today()
+        )
+        self.assertEqual(timing.engines, {})
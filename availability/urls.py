@@ -6,8 +6,10 @@ from .views import (
     AvailabilityRuleViewSet,
     SeasonViewSet,
     ExceptionDateViewSet,
-    AvailabilityViewSet
+    AvailabilityViewSet,
+    database_connections,
 )
+from . import async_views
 
 # Definición del router para el ViewSet de la app
 router = DefaultRouter()
@@ -20,6 +22,13 @@ router.register(r'availability', AvailabilityViewSet, basename='availability')
 app_name = 'availability'
 
 urlpatterns = [
+    # Consultas de disponibilidad async (servir con config.asgi para aprovecharlas)
+    path('async/check_date/', async_views.check_date, name='async-check-date'),
+    path('async/check_range/', async_views.check_range, name='async-check-range'),
+    path('async/check_slot/', async_views.check_slot, name='async-check-slot'),
+    path('async/search/', async_views.search, name='async-search'),
+    # Estado de las conexiones a la base de datos (pool o persistentes)
+    path('database-connections/', database_connections, name='database-connections'),
     # Incluye todas las rutas registradas en el router bajo el prefijo base de la app
     path('', include(router.urls)),
 ]
\ No newline at end of file
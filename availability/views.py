@@ -1,18 +1,72 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.utils.http import parse_etags
 from django.utils.translation import gettext_lazy as _
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from .models import Restaurant, AvailabilityRule, Season, ExceptionDate
 from .serializers import (
+    InvalidScheduleError,
     RestaurantSerializer,
     AvailabilityRuleSerializer,
     SeasonSerializer,
     ExceptionDateSerializer
 )
 from .services import AvailabilityService
+from .profiling import QueryCounter, connection_stats
+from .engine.indexes import OverlappingRulesError
+from .engine.versions import availability_versions
+
+
+def _availability_etag(restaurant_id, start_str, end_str, *variant):
+    """
+    ETag de la disponibilidad de un restaurante entre dos fechas (inclusive).
+    Solo lee la caché, nunca la base de datos. Retorna None si los parámetros
+    no son válidos: la vista sigue su camino normal y devuelve el error.
+    """
+    try:
+        restaurant_id = int(restaurant_id)
+        start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end = datetime.strptime(end_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+    days = (end - start).days + 1
+    if days < 1 or days > getattr(settings, 'AVAILABILITY_MAX_RANGE_DAYS', 90):
+        return None
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    return availability_versions.etag(restaurant_id, dates, variant)
+
+
+def _parse_num_people(value):
+    """num_people opcional: None si no viene, False si no es un entero positivo."""
+    if not value:
+        return None
+    try:
+        num_people = int(value)
+    except (TypeError, ValueError):
+        return False
+    return num_people if num_people >= 1 else False
+
+
+def _not_modified(request, etag):
+    """Respuesta 304 si If-None-Match contiene la ETag actual."""
+    if etag and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+    return None
+
+
+def _set_etag(response, etag):
+    if etag:
+        response['ETag'] = etag
+        # El cliente puede guardarla, pero debe revalidar en cada uso
+        response['Cache-Control'] = 'private, no-cache'
 
 
 class RestaurantViewSet(viewsets.ModelViewSet):
@@ -74,6 +128,12 @@ class AvailabilityViewSet(viewsets.ViewSet):
     """ViewSet para consultar disponibilidad"""
     permission_classes = [AllowAny]
 
+    def handle_exception(self, exc):
+        # Un día con reglas solapadas responde 409 con el detalle, no 500
+        if isinstance(exc, OverlappingRulesError):
+            exc = InvalidScheduleError(detail=str(exc))
+        return super().handle_exception(exc)
+
     @action(detail=False, methods=['get'])
     def check_date(self, request):
         """
@@ -81,9 +141,12 @@ class AvailabilityViewSet(viewsets.ViewSet):
         Parámetros query:
         - restaurant_id: ID del restaurante
         - date: Fecha en formato YYYY-MM-DD
+        - num_people: Número de personas (opcional). Filtra availability y slots;
+          sin él, slots incluye todas las horas con su max_party_size
         """
         restaurant_id = request.query_params.get('restaurant_id')
         date_str = request.query_params.get('date')
+        num_people_str = request.query_params.get('num_people', '')
 
         if not restaurant_id or not date_str:
             return Response(
@@ -91,6 +154,12 @@ class AvailabilityViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Antes de cualquier consulta: si no ha cambiado nada, 304 sin tocar la base de datos
+        etag = _availability_etag(restaurant_id, date_str, date_str, num_people_str)
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
         try:
             restaurant = Restaurant.objects.get(id=restaurant_id)
         except Restaurant.DoesNotExist:
@@ -107,14 +176,231 @@ class AvailabilityViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        num_people = _parse_num_people(num_people_str)
+        if num_people is False:
+            return Response(
+                {'error': 'num_people debe ser un entero mayor que 0'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         service = AvailabilityService()
-        availability = service.get_availability_by_date(restaurant, date)
+        with QueryCounter() as queries:
+            day = service.get_day_availability(restaurant, date, num_people)
 
-        return Response({
+        response = Response({
             'restaurant': restaurant.name,
             'date': date,
-            'availability': availability
+            'num_people': num_people,
+            'availability': day['availability'],
+            'slots': day['slots'],
+        })
+        # Número de consultas del motor, para detectar regresiones
+        response['X-Query-Count'] = queries.count
+        _set_etag(response, etag)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def check_range(self, request):
+        """
+        Calendario de disponibilidad para un rango de fechas
+        Parámetros query:
+        - restaurant_id: ID del restaurante
+        - start: Fecha inicial en formato YYYY-MM-DD
+        - end: Fecha final (inclusive) en formato YYYY-MM-DD
+        - num_people: Número de personas (opcional, por defecto 2)
+        """
+        restaurant_id = request.query_params.get('restaurant_id')
+        start_str = request.query_params.get('start')
+        end_str = request.query_params.get('end')
+        num_people_str = request.query_params.get('num_people', '2')
+
+        if not restaurant_id or not start_str or not end_str:
+            return Response(
+                {'error': 'restaurant_id, start y end son requeridos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        etag = _availability_etag(restaurant_id, start_str, end_str, num_people_str)
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+
+        try:
+            restaurant = Restaurant.objects.get(id=restaurant_id)
+        except Restaurant.DoesNotExist:
+            return Response(
+                {'error': 'Restaurante no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            start = datetime.strptime(start_str, '%Y-%m-%d').date()
+            end = datetime.strptime(end_str, '%Y-%m-%d').date()
+            num_people = int(num_people_str)
+            if num_people < 1:
+                raise ValueError(num_people)
+        except ValueError:
+            return Response(
+                {'error': 'Parámetros inválidos. Use YYYY-MM-DD y un num_people entero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        max_days = getattr(settings, 'AVAILABILITY_MAX_RANGE_DAYS', 90)
+        if end < start or (end - start).days + 1 > max_days:
+            return Response(
+                {'error': f'El rango debe ser válido y de como máximo {max_days} días'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = AvailabilityService()
+        with QueryCounter() as queries:
+            days = service.get_availability_by_range(restaurant, start, end, num_people)
+
+        response = Response({
+            'restaurant': restaurant.name,
+            'start': start,
+            'end': end,
+            'num_people': num_people,
+            'days': days
+        })
+        response['X-Query-Count'] = queries.count
+        _set_etag(response, etag)
+        return response
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Busca restaurantes de una ciudad con sitio en una franja horaria
+        Parámetros query:
+        - city: Ciudad (Restaurant.city, sin distinguir mayúsculas)
+        - date: Fecha en formato YYYY-MM-DD
+        - time_from / time_to: Franja en formato HH:MM (opcional, todo el día)
+        - time: Hora preferida para ordenar (opcional, por defecto time_from)
+        - num_people: Número de personas (opcional, por defecto 2)
+        Resultados paginados, ordenados por cercanía a la hora preferida.
+        """
+        city = request.query_params.get('city')
+        date_str = request.query_params.get('date')
+
+        if not city or not date_str:
+            return Response(
+                {'error': 'city y date son requeridos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            time_from = datetime.strptime(
+                request.query_params.get('time_from', '00:00'), '%H:%M'
+            ).time()
+            time_to = datetime.strptime(
+                request.query_params.get('time_to', '23:59'), '%H:%M'
+            ).time()
+            preferred = request.query_params.get('time')
+            preferred_time = datetime.strptime(preferred, '%H:%M').time() if preferred else None
+            num_people = int(request.query_params.get('num_people', '2'))
+            if num_people < 1 or time_to < time_from:
+                raise ValueError(num_people)
+        except ValueError:
+            return Response(
+                {'error': 'Parámetros inválidos. Use YYYY-MM-DD, HH:MM y un num_people entero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = AvailabilityService()
+        with QueryCounter() as queries:
+            matches = service.search_availability(
+                Restaurant.objects.filter(city__iexact=city),
+                date,
+                time_from,
+                time_to,
+                num_people,
+                preferred_time,
+            )
+
+        paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+        page = paginator.paginate_queryset(matches, request, view=self)
+        response = paginator.get_paginated_response([
+            {
+                'restaurant_id': match['restaurant'].id,
+                'name': match['restaurant'].name,
+                'address': match['restaurant'].address,
+                'best_time': match['best_slot'].time,
+                'slots': [
+                    {'time': slot.time, 'remaining': slot.remaining}
+                    for slot in match['slots']
+                ],
+            }
+            for match in page
+        ])
+        response['X-Query-Count'] = queries.count
+        return response
+
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """
+        Primeros slots con sitio a partir de una fecha y hora
+        Parámetros query:
+        - restaurant_id: ID del restaurante
+        - date: Fecha inicial en formato YYYY-MM-DD
+        - time: Hora inicial en formato HH:MM (opcional, desde el inicio del día)
+        - num_people: Número de personas (opcional, por defecto 2)
+        - limit: Número de slots a devolver (opcional, por defecto 5, máximo 50)
+        - days: Días a recorrer como máximo (opcional, por defecto y como
+          máximo AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS)
+        """
+        restaurant_id = request.query_params.get('restaurant_id')
+        date_str = request.query_params.get('date')
+
+        if not restaurant_id or not date_str:
+            return Response(
+                {'error': 'restaurant_id y date son requeridos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        max_days = getattr(settings, 'AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS', 60)
+        try:
+            date = datetime.strptime(date_str, '%Y-%m-%d').date()
+            time = datetime.strptime(request.query_params.get('time', '00:00'), '%H:%M').time()
+            num_people = int(request.query_params.get('num_people', '2'))
+            limit = int(request.query_params.get('limit', '5'))
+            days = int(request.query_params.get('days', max_days))
+            if num_people < 1 or not 1 <= limit <= 50 or not 1 <= days <= max_days:
+                raise ValueError(num_people)
+        except ValueError:
+            return Response(
+                {'error': (
+                    'Parámetros inválidos. Use YYYY-MM-DD, HH:MM, un num_people entero, '
+                    f'limit entre 1 y 50 y days entre 1 y {max_days}'
+                )},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            restaurant = Restaurant.objects.get(id=restaurant_id)
+        except Restaurant.DoesNotExist:
+            return Response(
+                {'error': 'Restaurante no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        service = AvailabilityService()
+        with QueryCounter() as queries:
+            slots = service.next_available_slots(
+                restaurant, date, time, num_people, limit, days
+            )
+
+        response = Response({
+            'restaurant': restaurant.name,
+            'num_people': num_people,
+            'searched_until': date + timedelta(days=days - 1),
+            'slots': [
+                {'date': slot_date, 'time': slot.time, 'remaining': slot.remaining}
+                for slot_date, slot in slots
+            ],
         })
+        response['X-Query-Count'] = queries.count
+        return response
 
     @action(detail=False, methods=['post'])
     def check_slot(self, request):
@@ -171,3 +457,110 @@ class AvailabilityViewSet(viewsets.ViewSet):
             'num_people': num_people,
             'is_available': is_available
         })
+
+    @action(detail=False, methods=['post'])
+    def check_slots(self, request):
+        """
+        check_slot para muchas consultas en una petición
+        Body:
+        {
+            "slots": [
+                {"restaurant_id": 1, "date": "2026-02-10", "time": "19:30", "num_people": 4},
+                ...
+            ]
+        }
+        Un resultado por consulta y en el mismo orden; las consultas inválidas
+        llevan 'error' en lugar de 'is_available'. Restaurantes, horarios y
+        ocupación se cargan agrupados, no una vez por consulta.
+        """
+        probes = request.data.get('slots')
+        if not isinstance(probes, list) or not probes:
+            return Response(
+                {'error': 'slots debe ser una lista no vacía'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_items = getattr(settings, 'AVAILABILITY_CHECK_SLOTS_MAX_ITEMS', 200)
+        if len(probes) > max_items:
+            return Response(
+                {'error': f'Máximo {max_items} consultas por petición'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        service = AvailabilityService()
+        with QueryCounter() as queries:
+            restaurants = Restaurant.objects.only('id', 'name').in_bulk([
+                probe['restaurant_id'] for probe in probes
+                if isinstance(probe, dict)
+                and str(probe.get('restaurant_id', '')).isdigit()
+            ])
+
+            results = []
+            valid = []
+            for index, probe in enumerate(probes):
+                result, parsed = self._parse_probe(index, probe, restaurants)
+                results.append(result)
+                if parsed:
+                    valid.append((result, parsed))
+
+            checked = service.check_slots([parsed for _, parsed in valid])
+            for (result, _), is_available in zip(valid, checked):
+                result['is_available'] = is_available
+
+        response = Response({'results': results})
+        response['X-Query-Count'] = queries.count
+        return response
+
+    @staticmethod
+    def _parse_probe(index, probe, restaurants):
+        """
+        Valida una consulta de check_slots. Retorna (resultado, consulta) con
+        consulta = (restaurant, date, time, num_people), o None si no es válida.
+        """
+        if not isinstance(probe, dict):
+            return {'index': index, 'error': 'Cada consulta debe ser un objeto'}, None
+
+        restaurant_id = probe.get('restaurant_id')
+        date_str = probe.get('date')
+        time_str = probe.get('time')
+        num_people = probe.get('num_people')
+        if not all([restaurant_id, date_str, time_str, num_people]):
+            return {'index': index, 'error': 'Todos los parámetros son requeridos'}, None
+
+        try:
+            date = datetime.strptime(str(date_str), '%Y-%m-%d').date()
+            time = datetime.strptime(str(time_str), '%H:%M').time()
+            num_people = int(num_people)
+            if num_people < 1:
+                raise ValueError(num_people)
+        except (TypeError, ValueError):
+            return {
+                'index': index,
+                'error': 'Parámetros inválidos. Use YYYY-MM-DD, HH:MM y un num_people entero',
+            }, None
+
+        restaurant = (
+            restaurants.get(int(restaurant_id))
+            if str(restaurant_id).isdigit() else None
+        )
+        if restaurant is None:
+            return {'index': index, 'error': 'Restaurante no encontrado'}, None
+
+        result = {
+            'index': index,
+            'restaurant_id': restaurant.pk,
+            'restaurant': restaurant.name,
+            'date': date,
+            'time': time,
+            'num_people': num_people,
+        }
+        return result, (restaurant, date, time, num_people)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def database_connections(request):
+    """
+    Modo de reutilización de conexiones y, con DB_POOL, estadísticas del pool
+    de psycopg 3 del proceso que atiende la petición (solo staff)
+    """
+    return Response(connection_stats())
@@ -0,0 +1,4 @@
+"""
+Benchmarks del motor de disponibilidad sobre SQLite en memoria.
+Ver benchmarks/runner.py y la sección Benchmarks del README.
+"""
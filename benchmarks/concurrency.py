@@ -0,0 +1,317 @@
+"""
+Rendimiento bajo carga concurrente: WSGI con workers síncronos (las vistas
+DRF) frente a ASGI con las vistas async (availability/async_views.py).
+
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency --endpoint check_range --latency-ms 10
+    python -m benchmarks.concurrency --workers 4 --concurrency 64
+
+Ambos caminos se llaman en proceso a través de los handlers reales de Django
+(get_wsgi_application / get_asgi_application), sin servidor HTTP. WSGI atiende
+con --workers hilos, como un gunicorn con ese número de workers síncronos;
+ASGI atiende hasta --concurrency peticiones a la vez en un único event loop.
+
+SQLite en memoria no tiene latencia de red: --latency-ms añade una espera a
+cada consulta SQL para simular una base de datos remota, que es donde un worker
+síncrono se queda bloqueado. Con --latency-ms 0 ambos caminos quedan limitados
+por CPU (y el GIL) y la comparación mide solo el coste de cada handler.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from .runner import BENCHMARKS_DIR, _percentile, setup_django
+
+# Base de datos en memoria compartida entre hilos (cada hilo abre su conexión)
+SHARED_MEMORY_DB = "file:benchmarks_concurrency?mode=memory&cache=shared"
+
+DEFAULT_OUTPUT = BENCHMARKS_DIR / "concurrency.json"
+
+WSGI_PREFIX = "/api/availability/availability/"
+ASGI_PREFIX = "/api/availability/async/"
+
+ENDPOINTS = ("check_date", "check_range", "search")
+
+
+def build_targets(dataset, endpoint, requests):
+    """Lista de (endpoint, query string) que recorre restaurantes y fechas."""
+    from .datagen import CITIES
+
+    targets = []
+    for index in range(requests):
+        restaurant_id = dataset.restaurant_ids[index % len(dataset.restaurant_ids)]
+        day = dataset.start_date + timedelta(days=index % dataset.days)
+        if endpoint == "check_date":
+            params = {"restaurant_id": restaurant_id, "date": day.isoformat()}
+        elif endpoint == "check_range":
+            params = {
+                "restaurant_id": restaurant_id,
+                "start": day.isoformat(),
+                "end": (day + timedelta(days=29)).isoformat(),
+            }
+        else:
+            params = {
+                "city": CITIES[index % len(CITIES)],
+                "date": day.isoformat(),
+                "time_from": "20:00",
+                "time_to": "22:00",
+                "num_people": 4,
+            }
+        targets.append((f"{endpoint}/", urlencode(params)))
+    return targets
+
+
+def install_latency(seconds):
+    """Añade `seconds` de espera a cada consulta de las conexiones nuevas."""
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # La conexión de cada hilo se reabre en cada petición (CONN_MAX_AGE=0)
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False)
+    return install
+
+
+def _summary(latencies, statuses, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": sum(1 for status in statuses if status >= 400),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "median": round(statistics.median(latencies) * 1000, 3),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 3),
+        },
+    }
+
+
+def run_wsgi(targets, workers):
+    """
+    Sirve targets con el handler WSGI desde `workers` hilos. Un target
+    (path, query, body) se envía como POST con body en JSON.
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def call(target):
+        path, query, *body = target
+        body = json.dumps(body[0]).encode() if body else b""
+        environ = {
+            "REQUEST_METHOD": "POST" if body else "GET",
+            "PATH_INFO": WSGI_PREFIX + path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": "127.0.0.1",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "127.0.0.1",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+        }
+        if body:
+            environ["CONTENT_TYPE"] = "application/json"
+            environ["CONTENT_LENGTH"] = str(len(body))
+        status = []
+        started = time.perf_counter()
+        response = application(
+            environ, lambda line, headers, exc_info=None: status.append(line)
+        )
+        try:
+            b"".join(response)
+        finally:
+            # Emite request_finished, que cierra la conexión del hilo
+            response.close()
+        return time.perf_counter() - started, int(status[0].split()[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(call, targets))
+    elapsed = time.perf_counter() - started
+    return _summary([r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+async def _serve_asgi(application, targets, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(target):
+        path, query = target
+        full_path = ASGI_PREFIX + path
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": full_path,
+            "raw_path": full_path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"127.0.0.1")],
+            "server": ("127.0.0.1", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        request_sent = False
+        messages = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Sin desconexión: Django cancela esta espera al terminar la respuesta
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        async with semaphore:
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            return time.perf_counter() - started, messages[0]["status"]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call(target) for target in targets))
+    elapsed = time.perf_counter() - started
+    return _summary([r[0] for r in results], [r[1] for r in results], elapsed)
+
+
+def run_asgi(targets, concurrency):
+    """Sirve targets con el handler ASGI, hasta `concurrency` a la vez."""
+    from django.core.asgi import get_asgi_application
+
+    return asyncio.run(_serve_asgi(get_asgi_application(), targets, concurrency))
+
+
+def run_concurrency(
+    endpoint="check_date",
+    requests=400,
+    workers=4,
+    concurrency=32,
+    latency_ms=5.0,
+    restaurants=10,
+    reservations=5000,
+    days=60,
+    seed=42,
+):
+    """Genera los datos y mide el mismo lote de peticiones por WSGI y por ASGI."""
+    from django.core.management import call_command
+    from django.db.backends.signals import connection_created
+
+    from .datagen import generate
+
+    if endpoint not in ENDPOINTS:
+        raise ValueError(f"Endpoint desconocido: {endpoint}")
+
+    # La conexión de este hilo mantiene viva la base de datos compartida
+    call_command("migrate", verbosity=0, interactive=False)
+    dataset = generate(restaurants, reservations, days, seed)
+    targets = build_targets(dataset, endpoint, requests)
+
+    # Calentamiento sin latencia: horarios compilados en caché para ambos caminos
+    warmup = targets[: len(dataset.restaurant_ids)]
+    run_wsgi(warmup, 1)
+    run_asgi(warmup, 1)
+
+    install = install_latency(latency_ms / 1000) if latency_ms else None
+    try:
+        wsgi = run_wsgi(targets, workers)
+        asgi = run_asgi(targets, concurrency)
+    finally:
+        if install:
+            connection_created.disconnect(install)
+
+    return {
+        "meta": {
+            "endpoint": endpoint,
+            "requests": requests,
+            "workers": workers,
+            "concurrency": concurrency,
+            "latency_ms": latency_ms,
+            "restaurants": restaurants,
+            "reservations": reservations,
+            "days": days,
+            "seed": seed,
+        },
+        "wsgi": wsgi,
+        "asgi": asgi,
+    }
+
+
+def format_table(results):
+    meta = results["meta"]
+    lines = [
+        f"{'camino':<28}{'req/s':>10}{'mediana ms':>12}{'p95 ms':>10}{'errores':>9}"
+    ]
+    for name, label in (
+        ("wsgi", f"WSGI ({meta['workers']} workers)"),
+        ("asgi", f"ASGI (concurrencia {meta['concurrency']})"),
+    ):
+        result = results[name]
+        lines.append(
+            f"{label:<28}{result['requests_per_second']:>10}"
+            f"{result['latency_ms']['median']:>12}{result['latency_ms']['p95']:>10}"
+            f"{result['errors']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.concurrency",
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="check_date")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=4, help="Hilos WSGI")
+    parser.add_argument(
+        "--concurrency", type=int, default=32, help="Peticiones ASGI simultáneas"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=5.0, help="Espera añadida por consulta"
+    )
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault("BENCHMARK_DB", SHARED_MEMORY_DB)
+    setup_django()
+    results = run_concurrency(
+        options.endpoint,
+        options.requests,
+        options.workers,
+        options.concurrency,
+        options.latency_ms,
+        options.restaurants,
+        options.reservations,
+        options.days,
+        options.seed,
+    )
+
+    Path(options.output).write_text(json.dumps(results, indent=2) + "\n")
+    print(format_table(results))
+    print(f"\nResultados en {options.output}")
+    return 1 if results["wsgi"]["errors"] or results["asgi"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
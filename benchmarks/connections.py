@@ -0,0 +1,248 @@
+"""
+Coste de abrir conexiones en check_slot: la misma tanda de peticiones por el
+handler WSGI con cada perfil de conexión de config/database.py.
+
+    python -m benchmarks.connections
+    python -m benchmarks.connections --connect-ms 5 --requests 1000
+    BENCHMARK_POSTGRES=1 DB_NAME=bench python -m benchmarks.connections --connect-ms 0
+
+Perfiles:
+- per_request: CONN_MAX_AGE=0, una conexión nueva por petición (sin pool)
+- persistent: CONN_MAX_AGE=60 y CONN_HEALTH_CHECKS, una conexión por hilo
+- pool: pool de psycopg 3 (DB_POOL); solo con PostgreSQL y psycopg 3
+
+Por defecto usa SQLite en un fichero temporal (en memoria Django nunca cierra
+la conexión), donde conectar es casi gratis: --connect-ms añade esa espera a
+cada conexión que abre Django para simular TCP, TLS y autenticación contra un
+PostgreSQL remoto. Con BENCHMARK_POSTGRES=1 el coste es el real y conviene
+--connect-ms 0; el pool solo se mide ahí.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from .runner import BENCHMARKS_DIR, setup_django
+
+DEFAULT_OUTPUT = BENCHMARKS_DIR / "connections.json"
+
+PROFILES = ("per_request", "persistent", "pool")
+
+
+def build_check_slot_targets(dataset, requests):
+    """Targets POST de check_slot que recorren restaurantes, fechas y horas."""
+    from .datagen import SERVICE_TIMES
+
+    targets = []
+    for index in range(requests):
+        targets.append(
+            (
+                "check_slot/",
+                "",
+                {
+                    "restaurant_id": dataset.restaurant_ids[
+                        index % len(dataset.restaurant_ids)
+                    ],
+                    "date": (
+                        dataset.start_date + timedelta(days=index % dataset.days)
+                    ).isoformat(),
+                    "time": SERVICE_TIMES[index % len(SERVICE_TIMES)].strftime("%H:%M"),
+                    "num_people": 2,
+                },
+            )
+        )
+    return targets
+
+
+def profile_settings(profile):
+    """CONN_MAX_AGE, CONN_HEALTH_CHECKS y la opción pool de cada perfil."""
+    if profile == "per_request":
+        return {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "pool": None}
+    if profile == "persistent":
+        return {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True, "pool": None}
+    return {
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "pool": {"min_size": 2, "max_size": 10},
+    }
+
+
+def pool_supported():
+    from django.db import connection
+
+    if connection.vendor != "postgresql":
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def apply_profile(profile):
+    """
+    Cambia el perfil del alias default. Las conexiones se crean por hilo con
+    este mismo dict de settings, así que los hilos nuevos ya lo usan.
+    """
+    from django.db import connections
+
+    connections.close_all()
+    close_pool = getattr(connections["default"], "close_pool", None)
+    if close_pool:
+        close_pool()
+
+    values = profile_settings(profile)
+    settings_dict = connections.settings["default"]
+    settings_dict["CONN_MAX_AGE"] = values["CONN_MAX_AGE"]
+    settings_dict["CONN_HEALTH_CHECKS"] = values["CONN_HEALTH_CHECKS"]
+    settings_dict["OPTIONS"].pop("pool", None)
+    if values["pool"]:
+        settings_dict["OPTIONS"]["pool"] = values["pool"]
+
+
+def run_profiles(targets, profiles, workers=1, connect_ms=0.0):
+    """Mide targets con cada perfil; retorna {perfil: resumen}."""
+    from django.db.backends.signals import connection_created
+
+    from availability.profiling import connection_stats
+    from .concurrency import run_wsgi
+
+    connects = []
+
+    def on_connect(sender, connection, **kwargs):
+        connects.append(1)
+        if connect_ms:
+            time.sleep(connect_ms / 1000)
+
+    results = {}
+    connection_created.connect(on_connect, weak=False)
+    try:
+        for profile in profiles:
+            if profile == "pool" and not pool_supported():
+                results[profile] = {"skipped": "requiere PostgreSQL y psycopg 3"}
+                continue
+
+            apply_profile(profile)
+            connects.clear()
+            result = run_wsgi(targets, workers)
+            result["connects_per_request"] = round(len(connects) / len(targets), 3)
+            if profile == "pool":
+                result["pool"] = connection_stats()["pool"]
+            results[profile] = result
+    finally:
+        connection_created.disconnect(on_connect)
+        apply_profile("per_request")
+    return results
+
+
+def run_connections(
+    requests=300,
+    workers=1,
+    connect_ms=3.0,
+    profiles=PROFILES,
+    restaurants=10,
+    reservations=5000,
+    days=60,
+    seed=42,
+):
+    """Genera los datos y mide check_slot con cada perfil de conexión."""
+    from django.core.management import call_command
+    from django.db import connection
+
+    from .concurrency import run_wsgi
+    from .datagen import generate
+
+    call_command("migrate", verbosity=0, interactive=False)
+    dataset = generate(restaurants, reservations, days, seed)
+    targets = build_check_slot_targets(dataset, requests)
+
+    # Calentamiento: horarios compilados en caché para todos los perfiles
+    run_wsgi(targets[: len(dataset.restaurant_ids)], 1)
+
+    return {
+        "meta": {
+            "endpoint": "check_slot",
+            "requests": requests,
+            "workers": workers,
+            "connect_ms": connect_ms,
+            "database": connection.vendor,
+            "restaurants": restaurants,
+            "reservations": reservations,
+            "days": days,
+            "seed": seed,
+        },
+        "profiles": run_profiles(targets, profiles, workers, connect_ms),
+    }
+
+
+def format_table(results):
+    lines = [
+        f"{'perfil':<14}{'conexiones/pet':>16}{'req/s':>10}"
+        f"{'mediana ms':>12}{'p95 ms':>10}{'errores':>9}"
+    ]
+    for name, result in results["profiles"].items():
+        if "skipped" in result:
+            lines.append(f"{name:<14}  omitido: {result['skipped']}")
+            continue
+        lines.append(
+            f"{name:<14}{result['connects_per_request']:>16}"
+            f"{result['requests_per_second']:>10}"
+            f"{result['latency_ms']['median']:>12}{result['latency_ms']['p95']:>10}"
+            f"{result['errors']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.connections",
+        description=__doc__.strip().splitlines()[0],
+    )
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=1, help="Hilos WSGI")
+    parser.add_argument(
+        "--connect-ms",
+        type=float,
+        default=3.0,
+        help="Espera añadida a cada conexión nueva",
+    )
+    parser.add_argument("--profile", action="append", dest="profiles", choices=PROFILES)
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    options = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not os.environ.get("BENCHMARK_POSTGRES"):
+            os.environ.setdefault(
+                "BENCHMARK_DB", str(Path(directory) / "bench.sqlite3")
+            )
+        setup_django()
+        results = run_connections(
+            options.requests,
+            options.workers,
+            options.connect_ms,
+            options.profiles or PROFILES,
+            options.restaurants,
+            options.reservations,
+            options.days,
+            options.seed,
+        )
+
+    Path(options.output).write_text(json.dumps(results, indent=2) + "\n")
+    print(format_table(results))
+    print(f"\nResultados en {options.output}")
+    return (
+        1 if any(result.get("errors") for result in results["profiles"].values()) else 0
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
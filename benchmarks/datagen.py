@@ -0,0 +1,185 @@
+"""
+Generador determinista de datos para benchmarks.
+Con la misma semilla y parámetros produce exactamente las mismas filas.
+"""
+
+import random
+from collections import namedtuple
+from datetime import date, time, timedelta
+
+from availability.engine.occupancy import occupancy_table
+from availability.engine.schedule import schedule_cache
+from availability.models import AvailabilityRule, ExceptionDate, Restaurant, Season
+from reservations.models import Reservation
+
+# Lunes fijo: las fechas no dependen del día en que se ejecuta
+DEFAULT_START_DATE = date(2030, 1, 7)
+
+CITIES = ["Madrid", "Barcelona", "Valencia", "Sevilla", "Bilbao", "Málaga"]
+
+# (inicio, fin) de los turnos de comida y cena
+SERVICES = [(time(13, 0), time(16, 0)), (time(20, 0), time(23, 30))]
+
+PARTY_SIZES = [1, 2, 2, 2, 3, 4, 4, 5, 6, 8]
+STATUSES = ["confirmed"] * 12 + ["pending"] * 5 + ["cancelled"] * 2 + ["completed"]
+
+# Clientes distintos; varias reservas comparten email
+CUSTOMERS = 2000
+
+BATCH_SIZE = 2000
+
+Dataset = namedtuple(
+    "Dataset", ["restaurant_ids", "start_date", "days", "emails", "seed"]
+)
+
+
+def _service_times(start, end, interval=15):
+    times = []
+    minutes = start.hour * 60 + start.minute
+    while minutes < end.hour * 60 + end.minute:
+        times.append(time(minutes // 60, minutes % 60))
+        minutes += interval
+    return times
+
+
+SERVICE_TIMES = [
+    slot_time for start, end in SERVICES for slot_time in _service_times(start, end)
+]
+
+
+def customer_email(number):
+    return f"cliente{number}@example.com"
+
+
+def generate(
+    restaurants=10,
+    reservations=5000,
+    days=60,
+    seed=42,
+    start_date=DEFAULT_START_DATE,
+):
+    """
+    Crea restaurantes con reglas de comida y cena (un día de cierre semanal),
+    temporadas solapadas, excepciones y reservas repartidas en `days` días.
+    Retorna un Dataset con los ids y el rango de fechas generados.
+    """
+    rng = random.Random(seed)
+    restaurant_ids = []
+    closed_days = {}
+
+    for number in range(restaurants):
+        restaurant = Restaurant.objects.create(
+            name=f"Benchmark {number:03d}",
+            email=f"restaurante{number}@example.com",
+            phone=f"+34 600 {number:06d}",
+            address=f"Calle {number}",
+            city=rng.choice(CITIES),
+            country="España",
+            default_capacity=rng.randint(30, 80),
+            dining_duration=rng.choice([None, 90, 120]),
+        )
+        restaurant_ids.append(restaurant.id)
+        closed_days[restaurant.id] = rng.randrange(7)
+
+    rules = []
+    seasons = []
+    exceptions = []
+    for restaurant_id in restaurant_ids:
+        for day_of_week in range(7):
+            if day_of_week == closed_days[restaurant_id]:
+                continue
+            for start, end in SERVICES:
+                rules.append(
+                    AvailabilityRule(
+                        restaurant_id=restaurant_id,
+                        day_of_week=day_of_week,
+                        start_time=start,
+                        end_time=end,
+                        capacity=rng.randint(20, 60),
+                    )
+                )
+
+        # Temporada alta y un evento corto solapado con más prioridad
+        high_start = start_date + timedelta(days=rng.randrange(max(days // 4, 1)))
+        seasons.append(
+            Season(
+                restaurant_id=restaurant_id,
+                name="Temporada alta",
+                start_date=high_start,
+                end_date=high_start + timedelta(days=days // 2),
+                capacity_multiplier=1.25,
+            )
+        )
+        event_start = high_start + timedelta(days=rng.randrange(max(days // 4, 1)))
+        seasons.append(
+            Season(
+                restaurant_id=restaurant_id,
+                name="Evento",
+                start_date=event_start,
+                end_date=event_start + timedelta(days=3),
+                capacity_multiplier=0.5,
+                priority=1,
+            )
+        )
+
+        offsets = rng.sample(range(days), k=min(2, days))
+        exceptions.append(
+            ExceptionDate(
+                restaurant_id=restaurant_id,
+                date=start_date + timedelta(days=offsets[0]),
+                reason="Cierre por inventario",
+                is_closed=True,
+            )
+        )
+        if len(offsets) > 1:
+            exceptions.append(
+                ExceptionDate(
+                    restaurant_id=restaurant_id,
+                    date=start_date + timedelta(days=offsets[1]),
+                    reason="Evento privado",
+                    capacity=rng.randint(10, 20),
+                )
+            )
+
+    AvailabilityRule.objects.bulk_create(rules, batch_size=BATCH_SIZE)
+    Season.objects.bulk_create(seasons, batch_size=BATCH_SIZE)
+    ExceptionDate.objects.bulk_create(exceptions, batch_size=BATCH_SIZE)
+
+    batch = []
+    for _ in range(reservations):
+        restaurant_id = rng.choice(restaurant_ids)
+        reservation_date = start_date + timedelta(days=rng.randrange(days))
+        if reservation_date.weekday() == closed_days[restaurant_id]:
+            reservation_date += timedelta(days=1)
+        batch.append(
+            Reservation(
+                restaurant_id=restaurant_id,
+                customer_name="Cliente Benchmark",
+                customer_email=customer_email(rng.randrange(CUSTOMERS)),
+                customer_phone="600000000",
+                reservation_date=reservation_date,
+                reservation_time=rng.choice(SERVICE_TIMES),
+                num_people=rng.choice(PARTY_SIZES),
+                status=rng.choice(STATUSES),
+            )
+        )
+        if len(batch) >= BATCH_SIZE:
+            Reservation.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Reservation.objects.bulk_create(batch)
+
+    # bulk_create no emite señales: se invalidan los horarios y se calcula
+    # SlotOccupancy a mano (las reservas movidas pueden caer en start + days)
+    end_date = start_date + timedelta(days=days)
+    for restaurant_id in restaurant_ids:
+        schedule_cache.invalidate(restaurant_id)
+        occupancy_table.rebuild(restaurant_id, start_date, end_date)
+
+    return Dataset(
+        restaurant_ids,
+        start_date,
+        days,
+        [customer_email(number) for number in range(min(CUSTOMERS, 50))],
+        seed,
+    )
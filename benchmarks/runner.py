@@ -0,0 +1,304 @@
+"""
+Runner de benchmarks: genera los datos, mide cada escenario y compara con
+una línea base guardada.
+
+    python -m benchmarks
+    python -m benchmarks --scenario check_date --scenario check_slot
+    python -m benchmarks --update-baseline
+
+Por escenario se registra tiempo de pared (mediana, p95, media y mínimo por
+iteración), consultas SQL por iteración, respuestas con error, memoria pico
+(tracemalloc, en una pasada aparte para no distorsionar los tiempos) y, en los
+listados paginados, filas servidas por segundo.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCHMARKS_DIR / "results.json"
+
+# Parámetros que deben coincidir para comparar con la línea base
+COMPARABLE_KEYS = (
+    "restaurants",
+    "reservations",
+    "days",
+    "seed",
+    "iterations",
+    "warmup",
+    "capacity_backend",
+)
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _count_rows(response):
+    """Filas de una respuesta paginada ('results'); 0 en el resto."""
+    data = getattr(response, "data", None)
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return len(data["results"])
+    return 0
+
+
+def measure(run, iterations, warmup=5, memory_iterations=10, offset=0):
+    """
+    Ejecuta run(i) `warmup` veces sin medir, `iterations` veces midiendo
+    tiempo y consultas y `memory_iterations` veces con tracemalloc.
+    Cada llamada recibe un índice distinto para no repetir escrituras.
+    """
+    from availability.profiling import QueryCounter
+
+    index = offset
+    for _ in range(warmup):
+        run(index)
+        index += 1
+
+    timings = []
+    errors = 0
+    rows = 0
+    with QueryCounter() as queries:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = run(index)
+            timings.append((time.perf_counter() - started) * 1000)
+            if getattr(response, "status_code", 200) >= 400:
+                errors += 1
+            rows += _count_rows(response)
+            index += 1
+
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            run(index)
+            index += 1
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "wall_ms": {
+            "median": round(statistics.median(timings), 3),
+            "p95": round(_percentile(timings, 0.95), 3),
+            "mean": round(statistics.fmean(timings), 3),
+            "min": round(min(timings), 3),
+        },
+        "queries_per_iteration": round(queries.count / iterations, 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+        # Solo en listados paginados: filas servidas por segundo de pared
+        "rows_per_second": round(rows / (sum(timings) / 1000)) if rows else None,
+    }
+
+
+def run_benchmarks(
+    scenarios=None,
+    restaurants=10,
+    reservations=5000,
+    days=60,
+    seed=42,
+    iterations=50,
+    warmup=5,
+):
+    """Crea el esquema y los datos y mide los escenarios pedidos."""
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    from .datagen import generate
+    from .scenarios import SCENARIOS
+
+    names = scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Escenarios desconocidos: {', '.join(unknown)}")
+
+    call_command("migrate", verbosity=0, interactive=False)
+    started = time.perf_counter()
+    dataset = generate(restaurants, reservations, days, seed)
+    generation_seconds = time.perf_counter() - started
+
+    client = APIClient()
+    results = {}
+    for name in names:
+        run = SCENARIOS[name].setup(client, dataset)
+        results[name] = measure(run, iterations, warmup)
+
+    import django
+
+    return {
+        "meta": {
+            "restaurants": restaurants,
+            "reservations": reservations,
+            "days": days,
+            "seed": seed,
+            "iterations": iterations,
+            "warmup": warmup,
+            "capacity_backend": settings.AVAILABILITY_CAPACITY_BACKEND,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "generation_seconds": round(generation_seconds, 3),
+        },
+        "scenarios": results,
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Lista de regresiones frente a la línea base: más consultas por iteración,
+    o mediana de tiempo / memoria pico por encima de (1 + tolerance).
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+
+        if current["queries_per_iteration"] > base["queries_per_iteration"]:
+            regressions.append(
+                f"{name}: consultas {base['queries_per_iteration']} -> "
+                f"{current['queries_per_iteration']}"
+            )
+        limit = base["wall_ms"]["median"] * (1 + tolerance)
+        if current["wall_ms"]["median"] > limit:
+            regressions.append(
+                f"{name}: mediana {base['wall_ms']['median']} ms -> "
+                f"{current['wall_ms']['median']} ms"
+            )
+        limit = base["peak_memory_kb"] * (1 + tolerance)
+        if current["peak_memory_kb"] > limit:
+            regressions.append(
+                f"{name}: memoria pico {base['peak_memory_kb']} KB -> "
+                f"{current['peak_memory_kb']} KB"
+            )
+    return regressions
+
+
+def write_errors(results):
+    """
+    Escenarios de escritura con respuestas de error: una reserva rechazada no
+    hace el INSERT, así que sus tiempos y consultas no valen como medida.
+    """
+    from .scenarios import SCENARIOS
+
+    return [
+        f"{name}: {result['errors']} respuestas con error en un escenario de escritura"
+        for name, result in results["scenarios"].items()
+        if name in SCENARIOS and SCENARIOS[name].writes and result["errors"]
+    ]
+
+
+def same_parameters(results, baseline):
+    return all(
+        results["meta"].get(key) == baseline.get("meta", {}).get(key)
+        for key in COMPARABLE_KEYS
+    )
+
+
+def format_table(results):
+    lines = [
+        f"{'escenario':<32}{'mediana ms':>12}{'p95 ms':>10}"
+        f"{'consultas':>11}{'memoria KB':>12}{'errores':>9}{'filas/s':>10}"
+    ]
+    for name, result in results["scenarios"].items():
+        lines.append(
+            f"{name:<32}{result['wall_ms']['median']:>12}"
+            f"{result['wall_ms']['p95']:>10}{result['queries_per_iteration']:>11}"
+            f"{result['peak_memory_kb']:>12}{result['errors']:>9}"
+            f"{result.get('rows_per_second') or '-':>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.strip().splitlines()[0]
+    )
+    parser.add_argument(
+        "--scenario", action="append", dest="scenarios", help="Repetible"
+    )
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--reservations", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="Margen de tiempo y memoria"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Guarda los resultados como nueva línea base",
+    )
+    options = parser.parse_args(argv)
+
+    setup_django()
+    results = run_benchmarks(
+        options.scenarios,
+        options.restaurants,
+        options.reservations,
+        options.days,
+        options.seed,
+        options.iterations,
+        options.warmup,
+    )
+
+    Path(options.output).write_text(json.dumps(results, indent=2) + "\n")
+    print(format_table(results))
+    print(f"\nResultados en {options.output}")
+
+    failures = write_errors(results)
+    for failure in failures:
+        print(f"ERRORES {failure}")
+    if failures:
+        if options.update_baseline:
+            print("Línea base sin actualizar")
+        return 1
+
+    baseline_path = Path(options.baseline)
+    if options.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Línea base actualizada: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print("Sin línea base: use --update-baseline para crearla")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text())
+    if not same_parameters(results, baseline):
+        print("La línea base usa otros parámetros: no se compara")
+        return 0
+
+    regressions = compare(results, baseline, options.tolerance)
+    for regression in regressions:
+        print(f"REGRESIÓN {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Escenarios medidos por el runner. Cada escenario recibe el contexto
+(cliente HTTP y Dataset) y retorna una función run(iteration) que ejecuta
+una petición y retorna la respuesta. Los escenarios de escritura (writes=True)
+no deben dar ninguna respuesta de error: el runner falla si alguno la da.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.test import override_settings
+
+from .datagen import CITIES, SERVICE_TIMES, SERVICES
+
+Scenario = namedtuple("Scenario", ["name", "description", "setup", "writes"])
+
+SCENARIOS = {}
+
+AVAILABILITY_URL = "/api/availability/availability/"
+RESERVATIONS_URL = "/api/reservations/reservations/"
+
+# Reservas por iteración en el escenario de creación masiva
+BULK_BATCH = 50
+
+# Filas por página en los escenarios de listado completo (max_page_size)
+LIST_PAGE_SIZE = 100
+
+# Personas por reserva en los escenarios de escritura
+PARTY_SIZE = 2
+
+# Reservas de los escenarios de escritura por (restaurante, día, turno)
+BOOKINGS_PER_SERVICE = 4
+
+
+def scenario(name, description, writes=False):
+    def register(setup):
+        SCENARIOS[name] = Scenario(name, description, setup, writes)
+        return setup
+
+    return register
+
+
+def _restaurant(dataset, iteration):
+    return dataset.restaurant_ids[iteration % len(dataset.restaurant_ids)]
+
+
+def _date(dataset, iteration):
+    return dataset.start_date + timedelta(days=iteration % dataset.days)
+
+
+class Bookings:
+    """
+    Reservas que siempre caben, compartidas por los escenarios de escritura
+    del mismo Dataset (ninguna se repite entre escenarios).
+
+    Recorre días, restaurantes y turnos, así que un lote del bulk agrupa las
+    reservas de pocos (restaurante, día), como una importación real. En cada
+    turno usa BOOKINGS_PER_SERVICE horas repartidas, y solo las que tienen
+    sitio para PARTY_SIZE * BOOKINGS_PER_SERVICE personas antes de empezar. Como las
+    estancias no pasan de un turno al siguiente, aunque todas las reservas del
+    benchmark en un turno se solapen siguen cabiendo: ningún cierre, día sin
+    reglas o slot lleno da un error.
+    """
+
+    _by_dataset = {}
+
+    def __init__(self, dataset):
+        from availability.services import AvailabilityService
+
+        candidates = []
+        for offset in range(dataset.days):
+            day = dataset.start_date + timedelta(days=offset)
+            for restaurant_id in dataset.restaurant_ids:
+                for start, end in SERVICES:
+                    times = [t for t in SERVICE_TIMES if start <= t < end]
+                    for number in range(BOOKINGS_PER_SERVICE):
+                        slot = times[number * len(times) // BOOKINGS_PER_SERVICE]
+                        candidates.append((restaurant_id, day, slot))
+
+        fits = AvailabilityService().check_slots(
+            [
+                (restaurant_id, day, slot, PARTY_SIZE * BOOKINGS_PER_SERVICE)
+                for restaurant_id, day, slot in candidates
+            ]
+        )
+        self.slots = [slot for slot, ok in zip(candidates, fits) if ok]
+        self.used = 0
+
+    @classmethod
+    def of(cls, dataset):
+        entry = cls._by_dataset.get(id(dataset))
+        if entry is None or entry[0] is not dataset:
+            entry = (dataset, cls(dataset))
+            cls._by_dataset[id(dataset)] = entry
+        return entry[1]
+
+    def take(self, count):
+        """Los siguientes `count` payloads de reserva."""
+        if self.used + count > len(self.slots):
+            raise RuntimeError(
+                f"Sin reservas que quepan: {len(self.slots)} disponibles "
+                f"(aumenta --days o --restaurants)"
+            )
+        slots = self.slots[self.used : self.used + count]
+        self.used += count
+        return [
+            {
+                "restaurant": restaurant_id,
+                "customer_name": "Cliente Benchmark",
+                "customer_email": "benchmark@example.com",
+                "customer_phone": "600000000",
+                "reservation_date": day.isoformat(),
+                "reservation_time": slot.strftime("%H:%M"),
+                "num_people": PARTY_SIZE,
+            }
+            for restaurant_id, day, slot in slots
+        ]
+
+
+@scenario("check_date", "GET check_date de un restaurante y fecha")
+def check_date(client, dataset):
+    def run(iteration):
+        return client.get(
+            f"{AVAILABILITY_URL}check_date/",
+            {
+                "restaurant_id": _restaurant(dataset, iteration),
+                "date": _date(dataset, iteration).isoformat(),
+            },
+        )
+
+    return run
+
+
+@scenario("check_range", "GET check_range de 30 días")
+def check_range(client, dataset):
+    def run(iteration):
+        start = _date(dataset, iteration)
+        return client.get(
+            f"{AVAILABILITY_URL}check_range/",
+            {
+                "restaurant_id": _restaurant(dataset, iteration),
+                "start": start.isoformat(),
+                "end": (start + timedelta(days=29)).isoformat(),
+            },
+        )
+
+    return run
+
+
+@scenario("check_slot", "POST check_slot de una hora y grupo")
+def check_slot(client, dataset):
+    def run(iteration):
+        slot = SERVICE_TIMES[iteration % len(SERVICE_TIMES)]
+        return client.post(
+            f"{AVAILABILITY_URL}check_slot/",
+            {
+                "restaurant_id": _restaurant(dataset, iteration),
+                "date": _date(dataset, iteration).isoformat(),
+                "time": slot.strftime("%H:%M"),
+                "num_people": 2,
+            },
+            format="json",
+        )
+
+    return run
+
+
+@scenario("search", "GET search de una ciudad en una franja de cena")
+def search(client, dataset):
+    def run(iteration):
+        return client.get(
+            f"{AVAILABILITY_URL}search/",
+            {
+                "city": CITIES[iteration % len(CITIES)],
+                "date": _date(dataset, iteration).isoformat(),
+                "time_from": "20:00",
+                "time_to": "22:00",
+                "time": "21:00",
+                "num_people": 4,
+            },
+        )
+
+    return run
+
+
+@scenario(
+    "reservation_create", "POST de una reserva (validación + INSERT)", writes=True
+)
+def reservation_create(client, dataset):
+    bookings = Bookings.of(dataset)
+
+    def run(iteration):
+        (payload,) = bookings.take(1)
+        return client.post(RESERVATIONS_URL, payload, format="json")
+
+    return run
+
+
+@scenario(
+    "reservation_bulk_create", f"POST bulk/ con {BULK_BATCH} reservas", writes=True
+)
+def reservation_bulk_create(client, dataset):
+    bookings = Bookings.of(dataset)
+
+    def run(iteration):
+        # all_or_nothing: un solo item rechazado convierte la respuesta en 400
+        return client.post(
+            f"{RESERVATIONS_URL}bulk/",
+            {"mode": "all_or_nothing", "reservations": bookings.take(BULK_BATCH)},
+            format="json",
+        )
+
+    return run
+
+
+@scenario("reservation_list", "GET de la primera página de reservas")
+def reservation_list(client, dataset):
+    def run(iteration):
+        return client.get(RESERVATIONS_URL)
+
+    return run
+
+
+@scenario("reservation_list_by_restaurant", "GET de reservas filtradas")
+def reservation_list_by_restaurant(client, dataset):
+    def run(iteration):
+        return client.get(
+            RESERVATIONS_URL,
+            {"restaurant_id": _restaurant(dataset, iteration), "status": "confirmed"},
+        )
+
+    return run
+
+
+def _list_page(client, dataset, iteration):
+    return client.get(
+        RESERVATIONS_URL,
+        {"restaurant_id": _restaurant(dataset, iteration), "page_size": LIST_PAGE_SIZE},
+    )
+
+
+@scenario("reservation_list_page", f"GET de {LIST_PAGE_SIZE} reservas (values())")
+def reservation_list_page(client, dataset):
+    def run(iteration):
+        return _list_page(client, dataset, iteration)
+
+    return run
+
+
+@scenario(
+    "reservation_list_page_model",
+    f"GET de {LIST_PAGE_SIZE} reservas con ModelSerializer (RESERVATIONS_FAST_LIST=False)",
+)
+def reservation_list_page_model(client, dataset):
+    def run(iteration):
+        with override_settings(RESERVATIONS_FAST_LIST=False):
+            return _list_page(client, dataset, iteration)
+
+    return run
+
+
+@scenario("my_reservations", "GET my_reservations de un cliente")
+def my_reservations(client, dataset):
+    def run(iteration):
+        return client.get(
+            f"{RESERVATIONS_URL}my_reservations/",
+            {"email": dataset.emails[iteration % len(dataset.emails)]},
+        )
+
+    return run
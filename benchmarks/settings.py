@@ -0,0 +1,41 @@
+"""
+Settings de benchmarks: los de config.settings sobre SQLite en memoria,
+sin Redis ni Postgres. Se puede apuntar a un fichero con BENCHMARK_DB, o a
+PostgreSQL con BENCHMARK_POSTGRES=1.
+"""
+
+import os
+import warnings
+
+from config.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
+
+# BENCHMARK_POSTGRES=1 usa la base de datos de config.settings (variables DB_*):
+# el runner la migra y la llena, así que debe ser una base de datos desechable
+if not os.environ.get("BENCHMARK_POSTGRES"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("BENCHMARK_DB", ":memory:"),
+        }
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmarks",
+    }
+}
+# Un solo proceso: la caché local sí es compartida, las ETags son válidas
+AVAILABILITY_ETAG_ENABLED = True
+
+# Los directorios de estáticos no existen fuera de Docker
+STATICFILES_DIRS = []
+warnings.filterwarnings("ignore", message="No directory at")
+
+AVAILABILITY_CAPACITY_BACKEND = os.environ.get("BENCHMARK_CAPACITY_BACKEND", "database")
+
+# SQLite ignora el INCLUDE de los índices cubrientes pensados para PostgreSQL
+SILENCED_SYSTEM_CHECKS = ["models.W040"]
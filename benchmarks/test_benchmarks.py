@@ -0,0 +1,134 @@
+from django.test import TestCase, TransactionTestCase
+
+from availability.models import Restaurant
+from reservations.models import Reservation
+from benchmarks.datagen import generate
+from benchmarks.concurrency import build_targets, run_asgi, run_wsgi
+from benchmarks.runner import compare, measure, write_errors
+from benchmarks.scenarios import SCENARIOS
+
+
+def snapshot():
+    return list(
+        Reservation.objects.order_by("id").values_list(
+            "restaurant__name",
+            "customer_email",
+            "reservation_date",
+            "reservation_time",
+            "num_people",
+            "status",
+        )
+    )
+
+
+class DatagenTest(TestCase):
+    def test_same_seed_generates_same_rows(self):
+        generate(restaurants=3, reservations=200, days=14, seed=7)
+        first = snapshot()
+        Restaurant.objects.all().delete()
+
+        generate(restaurants=3, reservations=200, days=14, seed=7)
+        self.assertEqual(snapshot(), first)
+        self.assertEqual(len(first), 200)
+
+    def test_rules_skip_one_weekday(self):
+        dataset = generate(restaurants=2, reservations=0, days=7)
+        for restaurant_id in dataset.restaurant_ids:
+            weekdays = set(
+                Restaurant.objects.get(id=restaurant_id).availability_rules.values_list(
+                    "day_of_week", flat=True
+                )
+            )
+            self.assertEqual(len(weekdays), 6)
+
+
+class RunnerTest(TestCase):
+    def test_scenarios_run_without_errors(self):
+        from rest_framework.test import APIClient
+
+        # 28 días: los escenarios de escritura consumen reservas que quepan
+        dataset = generate(restaurants=2, reservations=100, days=28)
+        client = APIClient()
+        for name, scenario in SCENARIOS.items():
+            result = measure(
+                scenario.setup(client, dataset),
+                iterations=2,
+                warmup=1,
+                memory_iterations=1,
+            )
+            self.assertEqual(result["errors"], 0, name)
+            self.assertGreater(result["queries_per_iteration"], 0, name)
+
+    def test_write_scenarios_fail_on_errors(self):
+        results = {
+            "scenarios": {
+                "check_date": {"errors": 3},
+                "reservation_create": {"errors": 2},
+                "reservation_bulk_create": {"errors": 0},
+            }
+        }
+        self.assertEqual(len(write_errors(results)), 1)
+        self.assertIn("reservation_create", write_errors(results)[0])
+
+    def test_write_scenarios_never_reuse_a_booking(self):
+        from benchmarks.scenarios import Bookings
+
+        dataset = generate(restaurants=2, reservations=100, days=14)
+        bookings = Bookings.of(dataset)
+        self.assertIs(Bookings.of(dataset), bookings)
+        payloads = bookings.take(5) + bookings.take(5)
+        keys = {
+            (p["restaurant"], p["reservation_date"], p["reservation_time"])
+            for p in payloads
+        }
+        self.assertEqual(len(keys), 10)
+        with self.assertRaises(RuntimeError):
+            bookings.take(len(bookings.slots))
+
+    def test_compare_flags_more_queries_and_slower_median(self):
+        baseline = {
+            "scenarios": {
+                "check_date": {
+                    "queries_per_iteration": 2,
+                    "wall_ms": {"median": 10.0},
+                    "peak_memory_kb": 100.0,
+                }
+            }
+        }
+        results = {
+            "scenarios": {
+                "check_date": {
+                    "queries_per_iteration": 3,
+                    "wall_ms": {"median": 11.0},
+                    "peak_memory_kb": 100.0,
+                }
+            }
+        }
+        regressions = compare(results, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("consultas", regressions[0])
+
+
+class ConcurrencyTest(TransactionTestCase):
+    # Los hilos abren sus propias conexiones: los datos deben estar confirmados
+    def test_wsgi_and_asgi_serve_the_same_requests(self):
+        dataset = generate(restaurants=2, reservations=50, days=7)
+        for endpoint in ("check_date", "check_range", "search"):
+            targets = build_targets(dataset, endpoint, 6)
+            for result in (run_wsgi(targets, workers=2), run_asgi(targets, 3)):
+                self.assertEqual(result["requests"], 6, endpoint)
+                self.assertEqual(result["errors"], 0, endpoint)
+
+
+class ConnectionsTest(TransactionTestCase):
+    def test_profiles_serve_check_slot(self):
+        from benchmarks.connections import build_check_slot_targets, run_profiles
+
+        dataset = generate(restaurants=2, reservations=50, days=7)
+        targets = build_check_slot_targets(dataset, 6)
+        results = run_profiles(targets, ("per_request", "persistent", "pool"))
+        for profile in ("per_request", "persistent"):
+            self.assertEqual(results[profile]["requests"], 6, profile)
+            self.assertEqual(results[profile]["errors"], 0, profile)
+        # SQLite: el pool de psycopg 3 solo existe en PostgreSQL
+        self.assertIn("skipped", results["pool"])
@@ -0,0 +1,57 @@
+"""
+Caché de Django, común a config/settings.py y config/settings_postgres.py.
+Todo se lee con decouple:
+
+- CACHE_BACKEND / CACHE_LOCATION: backend y ubicación explícitos.
+- Sin CACHE_BACKEND, si hay REDIS_URL (o el settings exige Redis) se usa
+  RedisCache en la base de datos 1 del mismo servidor; la 0 es la de los
+  contadores de capacidad (AVAILABILITY_CAPACITY_BACKEND=redis), y un
+  cache.clear() haría FLUSHDB sobre ellos.
+- Sin ninguna de las dos, LocMemCache. Es por proceso: con varios workers
+  (gunicorn --workers N) la invalidación de horarios compilados y las versiones
+  de las ETags solo llegan al worker que hizo el cambio. Sirve para desarrollo
+  con un único proceso y para los tests.
+"""
+
+from urllib.parse import urlsplit, urlunsplit
+
+from decouple import config
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+REDIS_CACHE = 'django.core.cache.backends.redis.RedisCache'
+
+CACHE_REDIS_DB = 1
+
+
+def _redis_db(url, db):
+    """La misma URL de Redis apuntando a otra base de datos."""
+    return urlunsplit(urlsplit(url)._replace(path=f'/{db}'))
+
+
+def cache_settings(require_redis=False):
+    """Dict CACHES; Redis por defecto si hay REDIS_URL o require_redis."""
+    redis_url = config('REDIS_URL', default='')
+    use_redis = require_redis or bool(redis_url)
+    backend = config('CACHE_BACKEND', default=REDIS_CACHE if use_redis else LOCMEM_CACHE)
+
+    location = ''
+    if backend == REDIS_CACHE:
+        location = _redis_db(redis_url or 'redis://localhost:6379/0', CACHE_REDIS_DB)
+    return {
+        'default': {
+            'BACKEND': backend,
+            'LOCATION': config('CACHE_LOCATION', default=location),
+        }
+    }
+
+
+def auto_bool(value):
+    """Cast para decouple: 'auto' (o vacío) -> None, que decide el código; si no, bool."""
+    value = value.strip().lower()
+    if value in ('', 'auto'):
+        return None
+    if value in ('1', 'true', 'yes', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f'Se esperaba auto o un booleano: {value!r}')
@@ -0,0 +1,49 @@
+"""
+Reutilización de conexiones a PostgreSQL, común a config/settings.py y
+config/settings_postgres.py. Todo se lee con decouple:
+
+- DB_POOL=False (por defecto): conexiones persistentes. Cada hilo conserva su
+  conexión DB_CONN_MAX_AGE segundos (0 = una por petición, None = sin límite)
+  y, con DB_CONN_HEALTH_CHECKS, la comprueba al reutilizarla en una petición
+  nueva para no fallar con una conexión caída (p. ej. tras reiniciar PostgreSQL).
+- DB_POOL=True: pool de psycopg 3 (Django >= 5.1, `pip install "psycopg[pool]"`)
+  de DB_POOL_MIN_SIZE a DB_POOL_MAX_SIZE conexiones por proceso, compartido
+  entre hilos. Exige CONN_MAX_AGE=0: cada petición toma una conexión del pool y
+  la devuelve al terminar. DB_CONN_HEALTH_CHECKS comprueba la conexión al
+  sacarla del pool. Es el modo para ASGI, donde Django recomienda no usar
+  conexiones persistentes.
+"""
+
+from decouple import config
+
+
+def _max_age(value):
+    return None if value.lower() in ('', 'none') else int(value)
+
+
+def connection_settings(conn_max_age=60):
+    """Claves CONN_MAX_AGE, CONN_HEALTH_CHECKS y OPTIONS de DATABASES['default']."""
+    options = {'connect_timeout': config('DB_CONNECT_TIMEOUT', default=10, cast=int)}
+    health_checks = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+    if not config('DB_POOL', default=False, cast=bool):
+        return {
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=str(conn_max_age), cast=_max_age),
+            'CONN_HEALTH_CHECKS': health_checks,
+            'OPTIONS': options,
+        }
+
+    # Argumentos de psycopg_pool.ConnectionPool
+    options['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        # Segundos de espera por una conexión libre antes de fallar
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        # Segundos que una conexión ociosa sobrante sigue abierta
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+    }
+    return {
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': health_checks,
+        'OPTIONS': options,
+    }
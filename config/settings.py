@@ -2,6 +2,9 @@ import os
 from pathlib import Path
 from decouple import config, Csv
 
+from .cache import auto_bool, cache_settings
+from .database import connection_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'availability.middleware.ServerTimingMiddleware',  # Opt-in: AVAILABILITY_TIMING_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -83,6 +87,8 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='postgres'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # Conexiones persistentes o pool de psycopg 3 (DB_POOL), ver config/database.py
+        **connection_settings(conn_max_age=60),
     }
 }
 
@@ -112,6 +118,58 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Motor de disponibilidad
+# Máximo de días que acepta /api/availability/availability/check_range/
+AVAILABILITY_MAX_RANGE_DAYS = config('AVAILABILITY_MAX_RANGE_DAYS', default=90, cast=int)
+# Segundos que un horario compilado (reglas, temporadas, excepciones) vive en caché
+AVAILABILITY_SCHEDULE_CACHE_TIMEOUT = config('AVAILABILITY_SCHEDULE_CACHE_TIMEOUT', default=300, cast=int)
+# Segundos que vive la versión de un día usada en las ETags
+AVAILABILITY_ETAG_TIMEOUT = config('AVAILABILITY_ETAG_TIMEOUT', default=60, cast=int)
+# ETags y 304 en check_date/check_range: 'auto' solo con una caché compartida
+# entre procesos (con LocMemCache cada worker daría 304 obsoletos)
+AVAILABILITY_ETAG_ENABLED = config('AVAILABILITY_ETAG_ENABLED', default='auto', cast=auto_bool)
+# Días que recorre como máximo /api/availability/availability/next_available/
+AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS = config('AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS', default=60, cast=int)
+# Máximo de consultas por petición a /api/availability/availability/check_slots/
+AVAILABILITY_CHECK_SLOTS_MAX_ITEMS = config('AVAILABILITY_CHECK_SLOTS_MAX_ITEMS', default=200, cast=int)
+
+# Backend de ocupación: 'database' (SlotOccupancy), 'ledger' (UPDATE
+# condicional sobre SlotLedger), 'redis' o 'memory' (tests)
+AVAILABILITY_CAPACITY_BACKEND = config('AVAILABILITY_CAPACITY_BACKEND', default='database')
+AVAILABILITY_REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Máximo de reservaciones por petición a /api/reservations/reservations/bulk/
+RESERVATIONS_BULK_MAX_ITEMS = config('RESERVATIONS_BULK_MAX_ITEMS', default=500, cast=int)
+
+# Filas por lectura del cursor al exportar reservaciones (export/ y export_reservations)
+RESERVATIONS_EXPORT_CHUNK_SIZE = config('RESERVATIONS_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Listados de reservaciones con values() y ReservationRowSerializer (mismo JSON)
+RESERVATIONS_FAST_LIST = config('RESERVATIONS_FAST_LIST', default=True, cast=bool)
+
+# Cabecera Server-Timing y log 'availability.timing' por petición (opt-in, muestreado)
+AVAILABILITY_TIMING_ENABLED = config('AVAILABILITY_TIMING_ENABLED', default=False, cast=bool)
+AVAILABILITY_TIMING_SAMPLE_RATE = config('AVAILABILITY_TIMING_SAMPLE_RATE', default=1.0, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'availability.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Cache: Redis si hay REDIS_URL, si no LocMemCache (solo un proceso; ver
+# config/cache.py). CACHE_BACKEND y CACHE_LOCATION la fijan explícitamente
+CACHES = cache_settings()
+
 # CORS Configuration (Permite peticiones desde frontend local)
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000').split(',')
 
@@ -1,6 +1,9 @@
 from pathlib import Path
 from decouple import config, Csv
 
+from .cache import auto_bool, cache_settings
+from .database import connection_settings
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # ============================
@@ -34,6 +37,7 @@ INSTALLED_APPS = [
 # Middleware (orden corregido)
 # ============================
 MIDDLEWARE = [
+    'availability.middleware.ServerTimingMiddleware',  # Opt-in: AVAILABILITY_TIMING_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Debe ir arriba
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -79,10 +83,8 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
-        'CONN_MAX_AGE': 600,
-        'OPTIONS': {
-            'connect_timeout': 10,
-        }
+        # Conexiones persistentes o pool de psycopg 3 (DB_POOL), ver config/database.py
+        **connection_settings(conn_max_age=600),
     }
 }
 
@@ -108,6 +110,40 @@ REST_FRAMEWORK = {
     ],
 }
 
+# ============================
+# Motor de disponibilidad
+# ============================
+AVAILABILITY_MAX_RANGE_DAYS = config('AVAILABILITY_MAX_RANGE_DAYS', default=90, cast=int)
+AVAILABILITY_SCHEDULE_CACHE_TIMEOUT = config('AVAILABILITY_SCHEDULE_CACHE_TIMEOUT', default=300, cast=int)
+AVAILABILITY_ETAG_TIMEOUT = config('AVAILABILITY_ETAG_TIMEOUT', default=60, cast=int)
+AVAILABILITY_ETAG_ENABLED = config('AVAILABILITY_ETAG_ENABLED', default='auto', cast=auto_bool)
+AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS = config('AVAILABILITY_NEXT_AVAILABLE_MAX_DAYS', default=60, cast=int)
+AVAILABILITY_CHECK_SLOTS_MAX_ITEMS = config('AVAILABILITY_CHECK_SLOTS_MAX_ITEMS', default=200, cast=int)
+
+# Backend de ocupación: 'database' (SlotOccupancy), 'ledger' (UPDATE
+# condicional sobre SlotLedger), 'redis' o 'memory' (tests)
+AVAILABILITY_CAPACITY_BACKEND = config('AVAILABILITY_CAPACITY_BACKEND', default='database')
+AVAILABILITY_REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+
+# Máximo de reservaciones por petición a /api/reservations/reservations/bulk/
+RESERVATIONS_BULK_MAX_ITEMS = config('RESERVATIONS_BULK_MAX_ITEMS', default=500, cast=int)
+
+# Filas por lectura del cursor al exportar reservaciones (export/ y export_reservations)
+RESERVATIONS_EXPORT_CHUNK_SIZE = config('RESERVATIONS_EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Listados de reservaciones con values() y ReservationRowSerializer (mismo JSON)
+RESERVATIONS_FAST_LIST = config('RESERVATIONS_FAST_LIST', default=True, cast=bool)
+
+# Cabecera Server-Timing y log 'availability.timing' por petición (opt-in, muestreado)
+AVAILABILITY_TIMING_ENABLED = config('AVAILABILITY_TIMING_ENABLED', default=False, cast=bool)
+AVAILABILITY_TIMING_SAMPLE_RATE = config('AVAILABILITY_TIMING_SAMPLE_RATE', default=1.0, cast=float)
+
+# ============================
+# Cache
+# ============================
+# Redis (base de datos 1 del servidor de REDIS_URL), ver config/cache.py
+CACHES = cache_settings(require_redis=True)
+
 # ============================
 # CORS
 # ============================
@@ -165,6 +201,11 @@ LOGGING = {
             'formatter': 'simple',
             'level': 'WARNING',
         },
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+            'level': 'INFO',
+        },
         'file': {
             'class': 'logging.handlers.RotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
@@ -189,6 +230,11 @@ LOGGING = {
             'level': 'WARNING',
             'propagate': False,
         },
+        'availability.timing': {
+            'handlers': ['timing'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
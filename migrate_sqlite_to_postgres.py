@@ -1,17 +1,16 @@
 #!/usr/bin/env python
 import sys
+import io
+import argparse
+import hashlib
 import sqlite3
 import psycopg2
 import logging
 from pathlib import Path
-from datetime import datetime
-from django.conf import settings
+from datetime import date, datetime, time, timezone
+from concurrent.futures import ThreadPoolExecutor
 from decouple import config
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -25,17 +24,23 @@ POSTGRES_CONFIG = {
     'port': config('DB_PORT', default=5432, cast=int),
 }
 
-TABLES_TO_MIGRATE = [
-    'availability_restaurant',
-    'availability_availabilityrule',
-    'availability_season',
-    'availability_exceptiondate',
-    'reservations_reservation',
-    'auth_user',
-    'auth_group',
-    'auth_permission',
-    'django_content_type',
-]
+# Filas por lectura de SQLite, COPY y punto de control
+CHUNK_SIZE = 10000
+# Tablas de un mismo nivel de dependencias que se cargan a la vez
+WORKERS = 4
+
+# Progreso por tabla en PostgreSQL: se actualiza en la misma transacción que
+# cada bloque, así que tras una interrupción se reanuda justo tras el último
+CHECKPOINT_TABLE = 'sqlite_migration_checkpoint'
+
+
+class MigrationError(Exception):
+    pass
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
 
 def test_postgresql_connection():
     try:
@@ -60,160 +65,411 @@ def test_sqlite_connection():
         logger.error(f"✗ Error conectando a SQLite: {e}")
         return False
 
-def get_sqlite_tables():
-    conn = sqlite3.connect(str(SQLITE_DB))
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return tables
+def connect_postgresql():
+    conn = psycopg2.connect(**POSTGRES_CONFIG)
+    with conn.cursor() as cursor:
+        # SQLite guarda las fechas con hora en UTC sin zona (USE_TZ)
+        cursor.execute("SET TIME ZONE 'UTC'")
+    conn.commit()
+    return conn
+
+def get_sqlite_tables(sqlite_conn):
+    cursor = sqlite_conn.cursor()
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+    )
+    return [row[0] for row in cursor.fetchall()]
 
 def get_table_schema(sqlite_conn, table_name):
     cursor = sqlite_conn.cursor()
-    cursor.execute(f"PRAGMA table_info({table_name})")
+    cursor.execute(f"PRAGMA table_info({quote(table_name)})")
     columns = cursor.fetchall()
     return columns
 
-def migrate_table_data(table_name, sqlite_conn, pg_conn):
+def get_load_levels(sqlite_conn, tables):
+    """
+    Ordena las tablas por sus claves foráneas: una lista de niveles en la que
+    cada tabla solo depende de tablas de niveles anteriores. Las tablas de un
+    mismo nivel son independientes y se pueden cargar en paralelo.
+    """
+    cursor = sqlite_conn.cursor()
+    pending = {}
+    for table in tables:
+        cursor.execute(f"PRAGMA foreign_key_list({quote(table)})")
+        pending[table] = {
+            row[2] for row in cursor.fetchall() if row[2] in tables and row[2] != table
+        }
+
+    levels = []
+    loaded = set()
+    while pending:
+        level = sorted(table for table, deps in pending.items() if deps <= loaded)
+        if not level:
+            raise MigrationError(f"Dependencias circulares entre: {', '.join(sorted(pending))}")
+        levels.append(level)
+        loaded.update(level)
+        for table in level:
+            del pending[table]
+    return levels
+
+def copy_value(value):
+    """Valor en el formato de texto de COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, (bytes, memoryview)):
+        return '\\\\x' + bytes(value).hex()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+def canonical_value(value, pg_type):
+    """
+    Representación común de un valor leído de SQLite o de PostgreSQL, según el
+    tipo de la columna destino, para que ambos lados den el mismo checksum.
+    """
+    if value is None:
+        return '\\N'
+    if pg_type == 'boolean':
+        return 't' if str(value).lower() in ('1', 't', 'true') else 'f'
+    if pg_type.startswith('timestamp'):
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(' ')
+    if pg_type == 'date':
+        return (date.fromisoformat(value) if isinstance(value, str) else value).isoformat()
+    if pg_type.startswith('time'):
+        return (time.fromisoformat(value) if isinstance(value, str) else value).isoformat()
+    if pg_type in ('smallint', 'integer', 'bigint'):
+        return str(int(value))
+    if pg_type in ('real', 'double precision', 'numeric'):
+        return repr(float(value))
+    if pg_type == 'bytea':
+        return bytes(value).hex()
+    return str(value)
+
+def rows_checksum(rows, pg_types):
+    digest = hashlib.md5(usedforsecurity=False)
+    for row in rows:
+        digest.update(
+            '\x1f'.join(
+                canonical_value(value, pg_type) for value, pg_type in zip(row, pg_types)
+            ).encode()
+        )
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+def get_postgresql_columns(pg_conn, table_name):
+    """{columna: tipo} de la tabla en PostgreSQL; vacío si no existe."""
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = %s
+            """,
+            [table_name],
+        )
+        return dict(cursor.fetchall())
+
+def ensure_checkpoint_table(pg_conn):
+    with pg_conn.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                table_name text PRIMARY KEY,
+                last_rowid bigint NOT NULL DEFAULT 0,
+                rows bigint NOT NULL DEFAULT 0,
+                checksum text NOT NULL DEFAULT '',
+                done boolean NOT NULL DEFAULT false,
+                updated_at timestamptz NOT NULL DEFAULT now()
+            )
+        """)
+    pg_conn.commit()
+
+def load_checkpoint(pg_conn, table_name):
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT last_rowid, rows, checksum, done FROM {CHECKPOINT_TABLE} WHERE table_name = %s",
+            [table_name],
+        )
+        return cursor.fetchone() or (0, 0, '', False)
+
+def save_checkpoint(cursor, table_name, last_rowid, rows, checksum, done=False):
+    cursor.execute(
+        f"""
+        INSERT INTO {CHECKPOINT_TABLE} (table_name, last_rowid, rows, checksum, done)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (table_name) DO UPDATE SET
+            last_rowid = EXCLUDED.last_rowid,
+            rows = EXCLUDED.rows,
+            checksum = EXCLUDED.checksum,
+            done = EXCLUDED.done,
+            updated_at = now()
+        """,
+        [table_name, last_rowid, rows, checksum, done],
+    )
+
+def reset_migration(pg_conn, tables):
+    """Vacía las tablas destino y los puntos de control para empezar de cero."""
+    with pg_conn.cursor() as cursor:
+        if tables:
+            cursor.execute(f"TRUNCATE {', '.join(quote(table) for table in tables)} CASCADE")
+        cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE}")
+    pg_conn.commit()
+    logger.info(f"✓ {len(tables)} tablas destino vaciadas y puntos de control borrados")
+
+def iter_chunks(sqlite_conn, table_name, columns, after_rowid, chunk_size):
+    """Bloques [(rowid, fila)] de la tabla desde after_rowid, leídos con fetchmany."""
+    cursor = sqlite_conn.cursor()
+    cursor.execute(
+        f"SELECT rowid, {', '.join(quote(column) for column in columns)} "
+        f"FROM {quote(table_name)} WHERE rowid > ? ORDER BY rowid",
+        [after_rowid],
+    )
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            return
+        yield [(row[0], row[1:]) for row in chunk]
+
+def verify_chunk(pg_cursor, table_name, columns, pk_index, pg_types, rows):
+    """
+    Relee de PostgreSQL las filas del bloque por clave primaria y compara
+    su checksum con el del origen. Retorna el checksum del bloque.
+    """
+    expected = rows_checksum(rows, pg_types)
+    keys = [row[pk_index] for row in rows]
+    pg_cursor.execute(
+        f"SELECT {', '.join(quote(column) for column in columns)} FROM {quote(table_name)} "
+        f"WHERE {quote(columns[pk_index])} = ANY(%s)",
+        [keys],
+    )
+    stored = {
+        canonical_value(row[pk_index], pg_types[pk_index]): row
+        for row in pg_cursor.fetchall()
+    }
+    loaded = [stored.get(canonical_value(key, pg_types[pk_index])) for key in keys]
+    if None in loaded or rows_checksum(loaded, pg_types) != expected:
+        raise MigrationError(
+            f"{table_name}: el checksum del bloque {keys[0]}..{keys[-1]} no coincide"
+        )
+    return expected
+
+def migrate_table_data(table_name, chunk_size=CHUNK_SIZE):
+    """
+    Copia una tabla con conexiones propias (se ejecuta en un hilo). Lee de
+    SQLite con fetchmany y carga cada bloque con COPY FROM STDIN; en la misma
+    transacción relee el bloque, compara checksums y guarda el punto de
+    control. Retorna el número de filas copiadas en esta ejecución.
+    """
+    sqlite_conn = sqlite3.connect(str(SQLITE_DB))
+    pg_conn = connect_postgresql()
     try:
-        sqlite_cursor = sqlite_conn.cursor()
-        pg_cursor = pg_conn.cursor()
-        
-        sqlite_cursor.execute(f"SELECT * FROM {table_name}")
-        rows = sqlite_cursor.fetchall()
-        
-        schema = get_table_schema(sqlite_conn, table_name)
-        column_names = [col[1] for col in schema]
-        
-        if not rows:
-            logger.info(f"  - {table_name}: 0 registros")
+        rowid, total, checksum, done = load_checkpoint(pg_conn, table_name)
+        if done:
+            logger.info(f"  - {table_name}: ya migrada ({total} registros), se omite")
             return 0
-        
-        placeholders = ', '.join(['%s'] * len(column_names))
-        insert_query = f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders})"
-        
-        batch_size = 1000
-        for i in range(0, len(rows), batch_size):
-            batch = rows[i:i + batch_size]
-            pg_cursor.executemany(insert_query, batch)
-        
-        pg_conn.commit()
-        logger.info(f"  - {table_name}: {len(rows)} registros migrados")
-        return len(rows)
-        
-    except Exception as e:
+
+        schema = get_table_schema(sqlite_conn, table_name)
+        columns = [col[1] for col in schema]
+        pk_index = next((i for i, col in enumerate(schema) if col[5] == 1), None)
+        if pk_index is None:
+            raise MigrationError(f"{table_name}: sin clave primaria, no se puede verificar")
+        pg_columns = get_postgresql_columns(pg_conn, table_name)
+        pg_types = [pg_columns[column] for column in columns]
+        if rowid:
+            logger.info(f"  - {table_name}: se reanuda tras {total} registros")
+
+        copy_query = (
+            f"COPY {quote(table_name)} ({', '.join(quote(column) for column in columns)}) "
+            "FROM STDIN"
+        )
+        migrated = 0
+        with pg_conn.cursor() as pg_cursor:
+            for chunk in iter_chunks(sqlite_conn, table_name, columns, rowid, chunk_size):
+                rows = [row for _, row in chunk]
+                buffer = io.StringIO()
+                for row in rows:
+                    buffer.write('\t'.join(copy_value(value) for value in row))
+                    buffer.write('\n')
+                buffer.seek(0)
+                pg_cursor.copy_expert(copy_query, buffer)
+
+                chunk_checksum = verify_chunk(
+                    pg_cursor, table_name, columns, pk_index, pg_types, rows
+                )
+                rowid = chunk[-1][0]
+                total += len(rows)
+                migrated += len(rows)
+                checksum = hashlib.md5(
+                    (checksum + chunk_checksum).encode(), usedforsecurity=False
+                ).hexdigest()
+                save_checkpoint(pg_cursor, table_name, rowid, total, checksum)
+                pg_conn.commit()
+
+            save_checkpoint(pg_cursor, table_name, rowid, total, checksum, done=True)
+            pg_conn.commit()
+
+        logger.info(f"  - {table_name}: {migrated} registros migrados ({total} en total)")
+        return migrated
+    except Exception:
         pg_conn.rollback()
-        logger.error(f"  ✗ Error migrando {table_name}: {e}")
-        return 0
+        raise
+    finally:
+        sqlite_conn.close()
+        pg_conn.close()
+
+def migrate_level(tables, chunk_size, workers):
+    """Carga en paralelo las tablas de un nivel. Retorna (filas, tablas con error)."""
+    migrated = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='copy') as executor:
+        futures = {
+            executor.submit(migrate_table_data, table, chunk_size): table for table in tables
+        }
+        for future, table in futures.items():
+            try:
+                migrated += future.result()
+            except Exception as e:
+                logger.error(f"  ✗ Error migrando {table}: {e}")
+                failed.append(table)
+    return migrated, failed
 
-def migrate_sequences(pg_conn):
+def migrate_sequences(pg_conn, tables):
     try:
         cursor = pg_conn.cursor()
-        
-        cursor.execute("""
-            SELECT sequence_name 
-            FROM information_schema.sequences 
-            WHERE sequence_schema = 'public'
-        """)
-        sequences = cursor.fetchall()
-        
-        for seq in sequences:
-            seq_name = seq[0]
-            table_name = seq_name.replace('_seq', '')
-            
-            if '_id_seq' in seq_name:
-                base_table = table_name.replace('_id', '')
-                cursor.execute(f"SELECT MAX(id) FROM {base_table}")
-                max_id = cursor.fetchone()[0]
-                
-                if max_id:
-                    cursor.execute(f"ALTER SEQUENCE {seq_name} RESTART WITH {max_id + 1}")
-        
+
+        for table in tables:
+            cursor.execute(
+                """
+                SELECT a.attname, pg_get_serial_sequence(%s, a.attname)
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+                WHERE i.indrelid = %s::regclass AND i.indisprimary
+                """,
+                [quote(table), quote(table)],
+            )
+            for column, sequence in cursor.fetchall():
+                if sequence:
+                    cursor.execute(
+                        f"SELECT setval(%s, COALESCE(MAX({quote(column)}), 1), "
+                        f"MAX({quote(column)}) IS NOT NULL) FROM {quote(table)}",
+                        [sequence],
+                    )
+
         pg_conn.commit()
         logger.info("✓ Secuencias actualizadas")
     except Exception as e:
         pg_conn.rollback()
         logger.error(f"✗ Error actualizando secuencias: {e}")
 
-def verify_migration(sqlite_conn, pg_conn):
-    logger.info("\n📊 Verificación de integridad:")
-    
-    sqlite_cursor = sqlite_conn.cursor()
-    pg_cursor = pg_conn.cursor()
-    
-    all_tables = get_sqlite_tables()
-    total_source = 0
-    total_dest = 0
-    
-    for table in all_tables:
-        if table.startswith('sqlite_'):
-            continue
-            
-        sqlite_cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        source_count = sqlite_cursor.fetchone()[0]
-        
-        try:
-            pg_cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            dest_count = pg_cursor.fetchone()[0]
-        except:
-            dest_count = 0
-        
-        total_source += source_count
-        total_dest += dest_count
-        
-        match = "✓" if source_count == dest_count else "✗"
-        logger.info(f"  {match} {table}: SQLite={source_count}, PostgreSQL={dest_count}")
-    
-    return total_source, total_dest
-
-def main():
+def verify_migration(pg_conn, tables):
+    """
+    Resumen de los puntos de control: cada bloque ya se verificó por checksum
+    al cargarlo, aquí solo se comprueba que todas las tablas terminaron.
+    """
+    logger.info("\n📊 Verificación de integridad (checksum por bloque):")
+
+    total = 0
+    complete = True
+    for table in tables:
+        _, rows, checksum, done = load_checkpoint(pg_conn, table)
+        total += rows
+        complete = complete and done
+        match = "✓" if done else "✗"
+        logger.info(f"  {match} {table}: {rows} registros, checksum {checksum or '-'}")
+
+    return total, complete
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Migración SQLite → PostgreSQL")
+    parser.add_argument('--sqlite', type=Path, default=SQLITE_DB, help='Fichero SQLite de origen')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Filas por bloque')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='Tablas cargadas a la vez')
+    parser.add_argument(
+        '--reset', action='store_true',
+        help='Vacía las tablas destino y los puntos de control antes de empezar'
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global SQLITE_DB
+    # Solo al ejecutarlo como script: importarlo (tests) no toca el logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s'
+    )
+    args = parse_args(argv)
+    SQLITE_DB = args.sqlite
+
     logger.info("=" * 70)
     logger.info("MIGRACIÓN SQLite → PostgreSQL")
     logger.info("=" * 70)
-    
+
     if not test_sqlite_connection():
         sys.exit(1)
-    
+
     if not test_postgresql_connection():
         sys.exit(1)
-    
-    logger.info("\n🔄 Iniciando migración de datos...\n")
-    
+
     sqlite_conn = sqlite3.connect(str(SQLITE_DB))
-    pg_conn = psycopg2.connect(**POSTGRES_CONFIG)
-    
-    tables = get_sqlite_tables()
+    pg_conn = connect_postgresql()
+    ensure_checkpoint_table(pg_conn)
+
+    tables = []
+    for table in get_sqlite_tables(sqlite_conn):
+        if get_postgresql_columns(pg_conn, table):
+            tables.append(table)
+        else:
+            logger.warning(f"  ⚠ {table} no existe en PostgreSQL, se omite")
+    levels = get_load_levels(sqlite_conn, tables)
+    sqlite_conn.close()
+
+    if args.reset:
+        reset_migration(pg_conn, tables)
+
+    logger.info("\n🔄 Iniciando migración de datos...\n")
+
     total_migrated = 0
-    
-    logger.info("Migrando datos:")
-    for table in tables:
-        if table.startswith('sqlite_'):
-            continue
-        migrated = migrate_table_data(table, sqlite_conn, pg_conn)
+    for number, level in enumerate(levels, start=1):
+        logger.info(f"Nivel {number}: {', '.join(level)}")
+        migrated, failed = migrate_level(level, args.chunk_size, args.workers)
         total_migrated += migrated
-    
-    migrate_sequences(pg_conn)
-    
+        if failed:
+            # Los niveles siguientes dependen de estas tablas
+            logger.error(
+                f"\n✗ MIGRACIÓN INTERRUMPIDA en: {', '.join(failed)}. "
+                "Corrija el error y vuelva a ejecutar para reanudar."
+            )
+            pg_conn.close()
+            sys.exit(1)
+
+    migrate_sequences(pg_conn, tables)
+
     logger.info("\n" + "=" * 70)
-    total_source, total_dest = verify_migration(sqlite_conn, pg_conn)
+    total_dest, complete = verify_migration(pg_conn, tables)
     logger.info("=" * 70)
-    
-    if total_source == total_dest:
+
+    if complete:
         logger.info(f"\n✓ MIGRACIÓN COMPLETADA EXITOSAMENTE")
-        logger.info(f"  Total de registros: {total_dest}")
+        logger.info(f"  Registros en esta ejecución: {total_migrated}, total: {total_dest}")
     else:
-        logger.warning(f"\n⚠ ADVERTENCIA: Discrepancia en conteos")
-        logger.warning(f"  Origen: {total_source}, Destino: {total_dest}")
-    
+        logger.warning(f"\n⚠ ADVERTENCIA: hay tablas sin terminar")
+
     logger.info("\n📝 Próximos pasos:")
     logger.info("  1. Verificar datos en PostgreSQL")
     logger.info("  2. Cambiar DATABASES en settings.py a PostgreSQL")
     logger.info("  3. Ejecutar: python manage.py migrate")
     logger.info("  4. Hacer backup de db.sqlite3")
-    
-    sqlite_conn.close()
+    logger.info(f"  5. Borrar la tabla {CHECKPOINT_TABLE} cuando ya no haga falta reanudar")
+
     pg_conn.close()
-    
+
     logger.info("\n✓ Proceso finalizado\n")
 
 if __name__ == '__main__':
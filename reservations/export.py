@@ -0,0 +1,96 @@
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Columnas exportadas, en orden; 'restaurant' es el id como en el serializer
+EXPORT_FIELDS = (
+    'id',
+    'restaurant',
+    'customer_name',
+    'customer_email',
+    'customer_phone',
+    'reservation_date',
+    'reservation_time',
+    'num_people',
+    'special_requests',
+    'status',
+    'created_at',
+    'updated_at',
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Bytes aproximados por trozo de la respuesta: pocas escrituras sin retener filas
+BATCH_SIZE = 64 * 1024
+
+
+def export_rows(queryset, chunk_size):
+    """
+    Filas del queryset como diccionarios, leídas con iterator(): en PostgreSQL
+    con un cursor de servidor de chunk_size filas, sin caché del queryset ni
+    instancias de modelo, así que la memoria no depende del total exportado.
+    """
+    return (
+        queryset.order_by('reservation_date', 'reservation_time', 'id')
+        .values(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+class _Echo:
+    """Pseudo-fichero para csv.writer: writerow() retorna la línea escrita."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_export(rows, export_format='csv', compress=False):
+    """
+    Genera el fichero de exportación en trozos de bytes de unos BATCH_SIZE.
+    El primer trozo (la cabecera CSV o la primera fila) sale en cuanto se lee,
+    para que el cliente reciba bytes sin esperar al resto. Con compress=True
+    la salida es gzip y cada trozo se vacía con Z_SYNC_FLUSH, así que el
+    compresor tampoco acumula datos.
+    """
+    lines = iter_csv(rows) if export_format == 'csv' else iter_ndjson(rows)
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(data):
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    first = next(lines, None)
+    if first is not None:
+        yield emit(first.encode())
+
+    batch = []
+    size = 0
+    for line in lines:
+        batch.append(line)
+        size += len(line)
+        if size >= BATCH_SIZE:
+            yield emit(''.join(batch).encode())
+            batch = []
+            size = 0
+    if batch:
+        yield emit(''.join(batch).encode())
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+
+def filter_reservations(queryset, params):
+    """
+    Aplica los filtros del listado de reservas (restaurant_id, email, status,
+    date_from y date_to, ambos inclusive). Lo comparten ReservationViewSet, la
+    exportación y el comando export_reservations.
+    Lanza ValueError si una fecha no tiene el formato YYYY-MM-DD.
+    """
+    restaurant_id = params.get('restaurant_id')
+    if restaurant_id:
+        queryset = queryset.filter(restaurant_id=restaurant_id)
+
+    email = params.get('email')
+    if email:
+        queryset = queryset.filter(customer_email=email)
+
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+
+    date_from = params.get('date_from')
+    if date_from:
+        queryset = queryset.filter(reservation_date__gte=_parse_date(date_from))
+
+    date_to = params.get('date_to')
+    if date_to:
+        queryset = queryset.filter(reservation_date__lte=_parse_date(date_to))
+
+    return queryset
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'Fecha inválida: {value}. Use YYYY-MM-DD')
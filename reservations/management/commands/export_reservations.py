@@ -0,0 +1,71 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reservations.export import EXPORT_FORMATS, export_rows, iter_export
+from reservations.filters import filter_reservations
+from reservations.models import Reservation
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta reservaciones a CSV o NDJSON en streaming, con los mismos "
+        "filtros que el listado de la API. La memoria no depende del número de filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', type=int, help='ID del restaurante (por defecto todos)')
+        parser.add_argument('--email', help='Email del cliente')
+        parser.add_argument('--status', help='Estado de la reservación')
+        parser.add_argument('--date-from', help='Fecha inicial YYYY-MM-DD (inclusive)')
+        parser.add_argument('--date-to', help='Fecha final YYYY-MM-DD (inclusive)')
+        parser.add_argument(
+            '--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv'
+        )
+        parser.add_argument('--gzip', action='store_true', help='Comprime la salida con gzip')
+        parser.add_argument('--output', help='Fichero de salida (por defecto la salida estándar)')
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=getattr(settings, 'RESERVATIONS_EXPORT_CHUNK_SIZE', 2000),
+            help='Filas por lectura del cursor'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor que 0')
+
+        params = {
+            'restaurant_id': options['restaurant'],
+            'email': options['email'],
+            'status': options['status'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+        }
+        try:
+            queryset = filter_reservations(Reservation.objects.all(), params)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        chunks = iter_export(
+            export_rows(queryset, options['chunk_size']),
+            options['export_format'],
+            options['gzip'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exportación escrita en {options['output']}"))
+            return
+
+        if options['gzip']:
+            # Binario: directamente al buffer de la salida estándar real
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        for chunk in chunks:
+            self.stdout.write(chunk.decode(), ending='')
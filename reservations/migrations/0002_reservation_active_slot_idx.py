@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0006_season_active_range_idx"),
+        ("reservations", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                condition=models.Q(("status__in", ["confirmed", "pending"])),
+                fields=["restaurant", "reservation_date", "reservation_time"],
+                include=("num_people",),
+                name="reservation_active_slot_idx",
+            ),
+        ),
+    ]
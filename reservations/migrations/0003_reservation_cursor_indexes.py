@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("availability", "0006_season_active_range_idx"),
+        ("reservations", "0002_reservation_active_slot_idx"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="reservation",
+            options={
+                "ordering": ["reservation_date", "reservation_time", "id"],
+                "verbose_name": "Reservación",
+                "verbose_name_plural": "Reservaciones",
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name="reservation",
+            name="reservation_restaur_d27b89_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="reservation",
+            name="reservation_custome_f4fe2a_idx",
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["reservation_date", "reservation_time", "id"],
+                name="reservation_cursor_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["restaurant", "reservation_date", "reservation_time", "id"],
+                name="reservation_restaurant_cur_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["customer_email", "reservation_date", "reservation_time", "id"],
+                name="reservation_email_cursor_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reservation",
+            index=models.Index(
+                fields=["status", "reservation_date", "reservation_time", "id"],
+                name="reservation_status_cursor_idx",
+            ),
+        ),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from availability.models import Restaurant
 
+# Estados que ocupan capacidad en un slot
+ACTIVE_STATUSES = ['confirmed', 'pending']
+
 
 class Reservation(models.Model):
     """Modelo de Reservación"""
@@ -45,11 +48,42 @@ class Reservation(models.Model):
     class Meta:
         verbose_name = _('Reservación')
         verbose_name_plural = _('Reservaciones')
-        ordering = ['reservation_date', 'reservation_time']
+        ordering = ['reservation_date', 'reservation_time', 'id']
         indexes = [
-            models.Index(fields=['restaurant', 'reservation_date']),
-            models.Index(fields=['customer_email']),
+            # Paginación por cursor (ver reservations/pagination.py): cada
+            # filtro del listado termina en (fecha, hora, id) para que la
+            # página siguiente sea un rango del índice sin ordenar
+            models.Index(
+                fields=['reservation_date', 'reservation_time', 'id'],
+                name='reservation_cursor_idx',
+            ),
+            models.Index(
+                fields=['restaurant', 'reservation_date', 'reservation_time', 'id'],
+                name='reservation_restaurant_cur_idx',
+            ),
+            models.Index(
+                fields=['customer_email', 'reservation_date', 'reservation_time', 'id'],
+                name='reservation_email_cursor_idx',
+            ),
+            models.Index(
+                fields=['status', 'reservation_date', 'reservation_time', 'id'],
+                name='reservation_status_cursor_idx',
+            ),
+            # Ocupación por slot de las reservas activas: parcial sobre los
+            # estados que cuentan y, en PostgreSQL, con num_people incluido
+            # para que la suma se resuelva solo con el índice
+            models.Index(
+                fields=['restaurant', 'reservation_date', 'reservation_time'],
+                include=['num_people'],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name='reservation_active_slot_idx',
+            ),
         ]
 
+    def save(self, *args, **kwargs):
+        # post_save actualiza SlotOccupancy: misma transacción que la fila
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.customer_name} - {self.reservation_date} {self.reservation_time}"
@@ -0,0 +1,136 @@
+import json
+from datetime import date, time
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset):
+    """
+    Número aproximado de filas de un queryset. En PostgreSQL sale de la
+    estimación del planificador (EXPLAIN, sin recorrer la tabla); en el resto
+    de bases de datos es un COUNT(*) exacto.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ReservationCursorPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset) sobre (reservation_date, reservation_time, id).
+    El cursor guarda la clave de la última fila y la página siguiente se pide
+    con WHERE (fecha, hora, id) > clave, así que ninguna página usa OFFSET ni
+    COUNT(*) y todas cuestan lo mismo con el índice que empieza por esas
+    columnas (ver Reservation.Meta.indexes).
+    CursorPagination de DRF solo posiciona por el primer campo y desempata con
+    OFFSET; con miles de reservas por día eso volvería a recorrer filas.
+
+    ?include_count=true añade 'count', una estimación del total.
+    """
+
+    ordering = ('reservation_date', 'reservation_time', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'include_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = estimate_count(queryset)
+
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        if reverse:
+            queryset = queryset.order_by(*('-' + field for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.cursor and self.cursor.position is not None:
+            queryset = queryset.filter(self._after(self.cursor.position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+
+        # Hacia delante siempre hay página anterior si venimos de un cursor;
+        # hacia atrás, siempre hay siguiente
+        has_cursor = self.cursor is not None and self.cursor.position is not None
+        self.has_next = has_following if not reverse else True
+        self.has_previous = has_cursor if not reverse else has_following
+        return self.page
+
+    def _after(self, position, reverse):
+        """Filtro keyset: filas estrictamente después (o antes) de la clave."""
+        try:
+            date_str, time_str, pk = position.split('|')
+            key = (date.fromisoformat(date_str), time.fromisoformat(time_str), int(pk))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        op = 'lt' if reverse else 'gt'
+        reservation_date, reservation_time, pk = key
+        return Q(**{f'reservation_date__{op}e': reservation_date}) & (
+            Q(**{f'reservation_date__{op}': reservation_date})
+            | Q(reservation_date=reservation_date, **{f'reservation_time__{op}': reservation_time})
+            | Q(
+                reservation_date=reservation_date,
+                reservation_time=reservation_time,
+                **{f'id__{op}': pk},
+            )
+        )
+
+    @staticmethod
+    def _position(reservation):
+        # Instancia del modelo o fila de values() (listado ligero)
+        if isinstance(reservation, dict):
+            key = (
+                reservation['reservation_date'],
+                reservation['reservation_time'],
+                reservation['id'],
+            )
+        else:
+            key = (reservation.reservation_date, reservation.reservation_time, reservation.pk)
+        reservation_date, reservation_time, pk = key
+        return f'{reservation_date.isoformat()}|{reservation_time.isoformat()}|{pk}'
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(0, False, self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(0, True, self._position(self.page[0])))
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'description': 'Total aproximado; solo con ?include_count=true',
+        }
+        return response_schema
@@ -2,11 +2,32 @@ from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
 from rest_framework.exceptions import APIException
 from .models import Reservation
+from availability.engine.indexes import OverlappingRulesError
 from availability.models import Restaurant
+from availability.serializers import InvalidScheduleError
 from availability.services import AvailabilityService
 
 
+class PreloadedRestaurantField(serializers.PrimaryKeyRelatedField):
+    """
+    Resuelve el restaurante desde context['restaurants'] ({id: Restaurant})
+    si la vista los precargó, evitando una consulta por item en lotes.
+    """
+
+    def to_internal_value(self, data):
+        restaurants = self.context.get('restaurants')
+        if restaurants is None:
+            return super().to_internal_value(data)
+        try:
+            return restaurants[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class ReservationSerializer(serializers.ModelSerializer):
+    restaurant = PreloadedRestaurantField(queryset=Restaurant.objects.all())
     status_display = serializers.CharField(
         source='get_status_display',
         read_only=True
@@ -24,6 +45,10 @@ class ReservationSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """Valida la disponibilidad de la reservación"""
+        # La creación masiva valida la capacidad por grupos en la vista
+        if self.context.get('skip_availability'):
+            return data
+
         restaurant = data.get('restaurant')
         reservation_date = data.get('reservation_date')
         reservation_time = data.get('reservation_time')
@@ -33,15 +58,25 @@ class ReservationSerializer(serializers.ModelSerializer):
         # Esto facilita el testing y permite configurar el servicio desde la vista
         availability_service = self.context.get('availability_service') or AvailabilityService()
 
+        # Al crear, la vista pide reservar la capacidad (atómico en backends con contador)
+        check = (
+            availability_service.reserve
+            if self.context.get('reserve_capacity')
+            else availability_service.check_availability
+        )
+
         try:
             # Usamos use_lock=True para prevenir Race Conditions (requiere transacción en la vista)
-            is_available = availability_service.check_availability(
+            is_available = check(
                 restaurant=restaurant,
                 date=reservation_date,
                 time=reservation_time,
                 num_people=num_people,
                 use_lock=True
             )
+        except OverlappingRulesError as e:
+            # Reglas solapadas guardadas: solo ese día queda sin reservas
+            raise InvalidScheduleError(detail=str(e))
         except ImproperlyConfigured as e:
             # Error crítico de configuración (ej. reglas solapadas): Retornamos 500
             raise APIException(detail=f"Error de configuración del sistema: {str(e)}")
@@ -52,3 +87,50 @@ class ReservationSerializer(serializers.ModelSerializer):
             )
 
         return data
+
+
+class ReservationRowSerializer:
+    """
+    Serializador de solo lectura para los listados. Recibe filas de
+    queryset.values(*ReservationRowSerializer.columns) y produce el mismo JSON
+    que ReservationSerializer sin instanciar modelos ni recorrer campos de DRF
+    por fila. Las etiquetas de status salen de una tabla precalculada una vez
+    por respuesta (en el idioma activo) en lugar de get_status_display().
+    """
+
+    fields = ReservationSerializer.Meta.fields
+    columns = tuple(field for field in fields if field != 'status_display')
+
+    # Mismos campos que usa ReservationSerializer: respetan los formatos y la
+    # zona horaria configurados en DRF
+    date_field = serializers.DateField()
+    time_field = serializers.TimeField()
+    datetime_field = serializers.DateTimeField()
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @property
+    def data(self):
+        labels = {value: str(label) for value, label in Reservation.STATUS_CHOICES}
+        date_repr = self.date_field.to_representation
+        time_repr = self.time_field.to_representation
+        datetime_repr = self.datetime_field.to_representation
+        return [
+            {
+                'id': row['id'],
+                'restaurant': row['restaurant'],
+                'customer_name': row['customer_name'],
+                'customer_email': row['customer_email'],
+                'customer_phone': row['customer_phone'],
+                'reservation_date': date_repr(row['reservation_date']),
+                'reservation_time': time_repr(row['reservation_time']),
+                'num_people': row['num_people'],
+                'special_requests': row['special_requests'],
+                'status': row['status'],
+                'status_display': labels.get(row['status'], row['status']),
+                'created_at': datetime_repr(row['created_at']),
+                'updated_at': datetime_repr(row['updated_at']),
+            }
+            for row in self.rows
+        ]
@@ -2,39 +2,65 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 
 from .models import Reservation
-from .serializers import ReservationSerializer
+from availability.models import Restaurant
+from availability.engine.capacity import ACTIVE_STATUSES
+from availability.engine.indexes import OverlappingRulesError
+from availability.engine.occupancy import occupancy_table
+from availability.engine.versions import availability_versions
+from .export import EXPORT_FORMATS, export_rows, iter_export
+from .filters import filter_reservations
+from .pagination import ReservationCursorPagination
+from .serializers import ReservationRowSerializer, ReservationSerializer
+from availability.serializers import InvalidScheduleError
 from availability.services import AvailabilityService
 
+# Campos que deciden qué capacidad ocupa una reserva
+BOOKING_FIELDS = ('restaurant', 'reservation_date', 'reservation_time', 'num_people')
+
+NO_CAPACITY = 'No hay disponibilidad para esta fecha y hora, o el restaurante se encuentra cerrado.'
+
 
 class ReservationViewSet(viewsets.ModelViewSet):
     """ViewSet para Reservation"""
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
     permission_classes = [AllowAny]
+    pagination_class = ReservationCursorPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
         
-        # Filtrar por restaurante si se proporciona
-        restaurant_id = self.request.query_params.get('restaurant_id', None)
-        if restaurant_id:
-            queryset = queryset.filter(restaurant_id=restaurant_id)
-        
-        # Filtrar por email si se proporciona
-        email = self.request.query_params.get('email', None)
-        if email:
-            queryset = queryset.filter(customer_email=email)
-        
-        # Filtrar por estado si se proporciona
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        return queryset
+        # Filtros por restaurante, email, estado y rango de fechas
+        try:
+            return filter_reservations(queryset, self.request.query_params)
+        except ValueError as exc:
+            raise ValidationError({'error': str(exc)})
+
+    def list(self, request, *args, **kwargs):
+        """Listado paginado; por defecto por la ruta ligera (ver _list_rows)."""
+        if not getattr(settings, 'RESERVATIONS_FAST_LIST', True):
+            return super().list(request, *args, **kwargs)
+        return self._list_rows(self.filter_queryset(self.get_queryset()))
+
+    def _list_rows(self, queryset):
+        """
+        Ruta de lectura de los listados: solo las columnas del serializer con
+        values(), sin instancias de Reservation, y ReservationRowSerializer.
+        El JSON es idéntico al de ReservationSerializer.
+        """
+        rows = queryset.values(*ReservationRowSerializer.columns)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(ReservationRowSerializer(rows).data)
+        return self.get_paginated_response(ReservationRowSerializer(page).data)
 
     def create(self, request, *args, **kwargs):
         """Crea una nueva reservación"""
@@ -46,15 +72,123 @@ class ReservationViewSet(viewsets.ModelViewSet):
             # Pasamos el servicio a través del contexto del serializador
             serializer = self.get_serializer(
                 data=request.data,
-                context={'availability_service': availability_service}
+                context={
+                    'availability_service': availability_service,
+                    'reserve_capacity': True,
+                }
             )
             
             serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
+            try:
+                self.perform_create(serializer)
+            except Exception:
+                # La capacidad ya quedó reservada en la validación: se devuelve
+                # con la ventana de toda la estancia, como en _release_bulk
+                availability_service.release(Reservation(**serializer.validated_data))
+                raise
             
             headers = self.get_success_headers(serializer.data)
             return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def update(self, request, *args, **kwargs):
+        """Edita una reservación; la capacidad se ajusta en perform_update"""
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('update', 'partial_update'):
+            # La disponibilidad de una edición se comprueba en perform_update,
+            # con la reserva ya fuera de su slot anterior
+            context['skip_availability'] = True
+        return context
+
+    def perform_update(self, serializer):
+        """
+        Si cambia el restaurante, la fecha, la hora o el tamaño de una reserva
+        activa, libera la capacidad del slot anterior y ocupa la del nuevo, o
+        rechaza el cambio si no cabe. Corre dentro de la transacción de update().
+        - database: se guarda y se comprueba el estado nuevo, que ya cuenta la
+          reserva movida (sin contarla dos veces); si no cabe se revierte todo
+        - ledger / redis: se reserva el slot nuevo y el anterior se libera tras
+          el commit. Si solo cambia num_people se reserva o libera la diferencia;
+          un cambio de hora que se solapa con la estancia anterior cuenta ambas
+          hasta el commit, así que en un slot justo puede rechazarse
+        """
+        instance = serializer.instance
+        old = {field: getattr(instance, field) for field in BOOKING_FIELDS}
+        new = {field: serializer.validated_data.get(field, old[field]) for field in BOOKING_FIELDS}
+        if new == old or instance.status not in ACTIVE_STATUSES:
+            serializer.save()
+            return
+
+        availability_service = AvailabilityService()
+        try:
+            if not availability_service.capacity_engine.atomic_reserve:
+                serializer.save()
+                if not self._fits(availability_service, new, num_people=0):
+                    raise ValidationError({'non_field_errors': [NO_CAPACITY]})
+                return
+
+            same_slot = all(new[field] == old[field] for field in BOOKING_FIELDS[:3])
+            if same_slot:
+                # Mismo slot: solo la diferencia de personas
+                reserved = {**new, 'num_people': new['num_people'] - old['num_people']}
+                released = {**old, 'num_people': -reserved['num_people']}
+            else:
+                reserved, released = new, old
+
+            if reserved['num_people'] > 0 and not self._fits(
+                availability_service, reserved, reserve=True
+            ):
+                raise ValidationError({'non_field_errors': [NO_CAPACITY]})
+        except OverlappingRulesError as exc:
+            raise InvalidScheduleError(detail=str(exc))
+
+        try:
+            serializer.save()
+        except Exception:
+            if reserved['num_people'] > 0:
+                availability_service.release(Reservation(**reserved))
+            raise
+        if released['num_people'] > 0:
+            self._release_capacity(Reservation(**released))
+
+    @staticmethod
+    def _fits(availability_service, booking, num_people=None, reserve=False):
+        check = availability_service.reserve if reserve else availability_service.check_availability
+        return check(
+            restaurant=booking['restaurant'],
+            date=booking['reservation_date'],
+            time=booking['reservation_time'],
+            num_people=booking['num_people'] if num_people is None else num_people,
+            use_lock=True,
+        )
+
+    def perform_destroy(self, instance):
+        was_active = instance.status in ACTIVE_STATUSES
+        super().perform_destroy(instance)
+        if was_active:
+            self._release_capacity(instance)
+
+    def _set_status(self, reservation, new_status):
+        """Cambia el estado y libera la capacidad si la reserva deja de estar activa."""
+        was_active = reservation.status in ACTIVE_STATUSES
+        reservation.status = new_status
+        reservation.save()
+
+        if was_active and new_status not in ACTIVE_STATUSES:
+            self._release_capacity(reservation)
+
+    def _release_capacity(self, reservation):
+        availability_service = AvailabilityService()
+        # Solo los motores con contadores propios (ledger, redis) tienen algo
+        # que devolver; el de base de datos lee SlotOccupancy
+        if not availability_service.capacity_engine.atomic_reserve:
+            return
+        # Tras el commit, para no liberar capacidad de un cambio revertido
+        transaction.on_commit(lambda: availability_service.release(reservation))
+
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """Confirma una reservación"""
@@ -66,8 +200,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = 'confirmed'
-        reservation.save()
+        self._set_status(reservation, 'confirmed')
         
         return Response(
             self.get_serializer(reservation).data,
@@ -85,8 +218,7 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = 'cancelled'
-        reservation.save()
+        self._set_status(reservation, 'cancelled')
         
         return Response(
             self.get_serializer(reservation).data,
@@ -104,14 +236,165 @@ class ReservationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = 'completed'
-        reservation.save()
+        self._set_status(reservation, 'completed')
         
         return Response(
             self.get_serializer(reservation).data,
             status=status.HTTP_200_OK
         )
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Crea varias reservaciones en una sola petición.
+        Body: {"mode": "all_or_nothing" | "best_effort", "reservations": [...]}
+        Agrupa por (restaurante, fecha), valida la capacidad una vez por grupo
+        contra el total acumulado en memoria e inserta con bulk_create.
+        Retorna el resultado de cada item en el mismo orden.
+        """
+        mode = request.data.get('mode', 'all_or_nothing')
+        items = request.data.get('reservations')
+
+        if mode not in ('all_or_nothing', 'best_effort'):
+            return Response(
+                {'error': 'mode debe ser all_or_nothing o best_effort'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'reservations debe ser una lista no vacía'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_items = getattr(settings, 'RESERVATIONS_BULK_MAX_ITEMS', 500)
+        if len(items) > max_items:
+            return Response(
+                {'error': f'Máximo {max_items} reservaciones por petición'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 1. Validación de campos (sin disponibilidad) y agrupación
+        restaurants = Restaurant.objects.in_bulk([
+            item['restaurant'] for item in items
+            if isinstance(item, dict) and str(item.get('restaurant', '')).isdigit()
+        ])
+        results = [None] * len(items)
+        groups = {}
+        # Un único serializer valida todos los items: construir sus campos
+        # (get_fields) costaba más que validarlos si se creaba uno por item
+        validator = self.get_serializer(
+            context={'skip_availability': True, 'restaurants': restaurants}
+        )
+        for index, item in enumerate(items):
+            try:
+                data = validator.run_validation(item)
+            except ValidationError as exc:
+                results[index] = {
+                    'index': index, 'status': 'error',
+                    'errors': self._item_errors(exc.detail),
+                }
+                continue
+            key = (data['restaurant'].pk, data['reservation_date'])
+            groups.setdefault(key, []).append((index, data))
+
+        atomic = mode == 'all_or_nothing'
+        if atomic and any(results):
+            return self._bulk_response(mode, results, created=[], failed=True)
+
+        availability_service = AvailabilityService()
+        no_capacity = [NO_CAPACITY]
+
+        with transaction.atomic():
+            # 2. Capacidad: bloqueos y ocupación de todos los días del lote de
+            # una vez; después cada grupo se decide en memoria
+            availability_service.lock_days(groups)
+            occupancy = availability_service.capacity_engine.get_occupancy_for_days(groups)
+            accepted = []
+            for (restaurant_id, reservation_date), group in groups.items():
+                errors = {'non_field_errors': no_capacity}
+                try:
+                    reserved = availability_service.reserve_batch(
+                        group[0][1]['restaurant'],
+                        reservation_date,
+                        [(data['reservation_time'], data['num_people']) for _, data in group],
+                        starts=occupancy[(restaurant_id, reservation_date)],
+                    )
+                except OverlappingRulesError as exc:
+                    # Día con reglas solapadas: fallan solo sus items, como el 409
+                    # de la creación individual
+                    reserved = [False] * len(group)
+                    errors = {'non_field_errors': [
+                        ErrorDetail(str(exc), code=InvalidScheduleError.default_code)
+                    ]}
+                for (index, data), ok in zip(group, reserved):
+                    if ok:
+                        accepted.append((index, data))
+                    else:
+                        results[index] = {
+                            'index': index, 'status': 'error', 'errors': errors,
+                        }
+
+            if atomic and len(accepted) < len(items):
+                # Se devuelve lo reservado en contadores externos y se revierte todo
+                self._release_bulk(availability_service, accepted)
+                transaction.set_rollback(True)
+                return self._bulk_response(mode, results, created=[], failed=True)
+
+            # 3. Inserción en bloque
+            try:
+                created = Reservation.objects.bulk_create(
+                    [Reservation(**data) for _, data in accepted]
+                )
+            except Exception:
+                self._release_bulk(availability_service, accepted)
+                raise
+            for (index, _), reservation in zip(accepted, created):
+                results[index] = {'index': index, 'status': 'created', 'id': reservation.pk}
+            # bulk_create no emite post_save: se suman aquí a SlotOccupancy
+            # y se invalidan las ETags de cada día
+            occupancy_table.add_reservations(created)
+            availability_versions.invalidate_many({
+                (data['restaurant'].id, data['reservation_date']) for _, data in accepted
+            })
+
+        return self._bulk_response(mode, results, created=created, failed=False)
+
+    @staticmethod
+    def _item_errors(detail):
+        # Mismo formato que serializer.errors: un item null da una lista
+        if isinstance(detail, dict):
+            return detail
+        if len(detail) == 1 and getattr(detail[0], 'code', None) == 'null':
+            detail = [ErrorDetail('No data provided', code='null')]
+        return {api_settings.NON_FIELD_ERRORS_KEY: detail}
+
+    @staticmethod
+    def _release_bulk(availability_service, accepted):
+        for _, data in accepted:
+            availability_service.release(Reservation(**data))
+
+    @staticmethod
+    def _bulk_response(mode, results, created, failed):
+        if failed:
+            # Todo o nada: los items válidos quedan como 'skipped'
+            http_status = status.HTTP_400_BAD_REQUEST
+        elif len(created) == len(results):
+            http_status = status.HTTP_201_CREATED
+        else:
+            http_status = status.HTTP_200_OK
+
+        return Response(
+            {
+                'mode': mode,
+                'created': len(created),
+                'failed': len(results) - len(created),
+                'results': [
+                    result or {'index': index, 'status': 'skipped'}
+                    for index, result in enumerate(results)
+                ],
+            },
+            status=http_status
+        )
+
     @action(detail=False, methods=['get'])
     def my_reservations(self, request):
         """Obtiene las reservaciones de un cliente por email"""
@@ -124,6 +407,39 @@ class ReservationViewSet(viewsets.ModelViewSet):
             )
         
         reservations = Reservation.objects.filter(customer_email=email)
-        serializer = self.get_serializer(reservations, many=True)
+        if getattr(settings, 'RESERVATIONS_FAST_LIST', True):
+            return self._list_rows(reservations)
+
+        page = self.paginate_queryset(reservations)
+        serializer = self.get_serializer(page, many=True)
         
-        return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta las reservaciones filtradas (mismos filtros que el listado) sin
+        paginar, como respuesta en streaming.
+        Parámetros: output=csv|ndjson (por defecto csv) y gzip=true.
+        """
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'output debe ser csv o ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compress = request.query_params.get('gzip', '').lower() in ('1', 'true')
+
+        rows = export_rows(
+            self.get_queryset(),
+            getattr(settings, 'RESERVATIONS_EXPORT_CHUNK_SIZE', 2000),
+        )
+        filename = f'reservations.{export_format}'
+        if compress:
+            filename += '.gz'
+        response = StreamingHttpResponse(
+            iter_export(rows, export_format, compress),
+            content_type='application/gzip' if compress else EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response